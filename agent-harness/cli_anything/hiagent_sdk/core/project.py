@@ -45,6 +45,7 @@ class Project:
         self.project_root = Path(project_root)
         self.config_file = self.project_root / ".hiagent" / "config.json"
         self.session_dir = self.project_root / ".hiagent" / "sessions"
+        self.upload_index_file = self.project_root / ".hiagent" / "upload_index.json"
         self._config: Optional[ProjectConfig] = None
 
         # Ensure directories exist
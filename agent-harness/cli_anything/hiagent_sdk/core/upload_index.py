@@ -0,0 +1,191 @@
+"""Content-addressed upload index for HiAgent SDK CLI."""
+
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from pydantic import BaseModel
+
+from cli_anything.hiagent_sdk.core.session import _locked_save_json
+
+_EXPIRE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_EXPIRE_PART = re.compile(r"(\d+)([smhd])")
+
+
+def parse_expire(expire: str) -> Optional[int]:
+    """Parse an UP expire string such as ``15h`` or ``1h30m`` into seconds.
+
+    Returns None when the string is not understood.
+    """
+    expire = expire.strip().lower()
+    if not expire or _EXPIRE_PART.sub("", expire):
+        return None
+    return sum(int(n) * _EXPIRE_UNITS[unit] for n, unit in _EXPIRE_PART.findall(expire))
+
+
+class UploadIndexEntry(BaseModel):
+    """A previously uploaded file, keyed by content hash and expire."""
+
+    sha256: str
+    expire: str
+    id: str
+    path: str
+    size: int
+    uploaded_at: float
+    expires_at: float
+    last_used_at: float
+
+
+class UploadIndex:
+    """Maps (sha256, expire) to the ``Path`` returned by ``UploadRaw``.
+
+    Entries are treated as expired ``safety_margin`` seconds before the server
+    side expiry so that a returned path is still usable by the caller. When
+    ``verify`` is set, hits are cross-checked with ``LongLive`` before reuse.
+    The index is safe to share between upload worker threads.
+
+    The file is written when entries are added or removed, once per
+    ``batch`` at most; the recency updates of lookups are written with the
+    next change.
+    """
+
+    def __init__(
+        self,
+        index_file: Path,
+        max_entries: int = 1024,
+        safety_margin: int = 300,
+        verify: bool = False,
+    ):
+        """Initialize upload index."""
+        self.index_file = Path(index_file)
+        self.max_entries = max_entries
+        self.safety_margin = safety_margin
+        self.verify = verify
+        self._entries: Optional[Dict[str, UploadIndexEntry]] = None
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._dirty = False
+
+    @staticmethod
+    def _key(sha256: str, expire: str) -> str:
+        return f"{sha256}:{expire}"
+
+    @property
+    def entries(self) -> Dict[str, UploadIndexEntry]:
+        """Get index entries, loading them from file on first access."""
+        if self._entries is None:
+            self._entries = self._load()
+        return self._entries
+
+    def _load(self) -> Dict[str, UploadIndexEntry]:
+        if not self.index_file.exists():
+            return {}
+        try:
+            with open(self.index_file, "r") as f:
+                data = json.load(f)
+            return {k: UploadIndexEntry(**v) for k, v in data.items()}
+        except Exception:
+            return {}
+
+    def save(self) -> None:
+        """Save index entries to file."""
+        with self._lock:
+            _locked_save_json(
+                self.index_file,
+                {k: v.model_dump() for k, v in self.entries.items()},
+                indent=2,
+            )
+            self._dirty = False
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if not self._batch_depth:
+            self.save()
+
+    @contextmanager
+    def batch(self) -> Iterator["UploadIndex"]:
+        """Defer saving until the outermost batch exits, then save once if needed."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._dirty:
+                    self.save()
+
+    def lookup(self, sha256: str, expire: str) -> Optional[UploadIndexEntry]:
+        """Get an unexpired entry for the content, or None."""
+        with self._lock:
+            key = self._key(sha256, expire)
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            now = time.time()
+            if entry.expires_at - self.safety_margin <= now:
+                self.discard(sha256, expire)
+                return None
+            entry.last_used_at = now
+            self._dirty = True
+            return entry
+
+    def record(
+        self, sha256: str, expire: str, id: str, path: str, size: int
+    ) -> Optional[UploadIndexEntry]:
+        """Record an uploaded file. Uploads with unknown expire are not indexed."""
+        with self._lock:
+            ttl = parse_expire(expire)
+            if ttl is None:
+                return None
+            now = time.time()
+            entry = UploadIndexEntry(
+                sha256=sha256,
+                expire=expire,
+                id=id,
+                path=path,
+                size=size,
+                uploaded_at=now,
+                expires_at=now + ttl,
+                last_used_at=now,
+            )
+            self.entries[self._key(sha256, expire)] = entry
+            self._evict(now)
+            self._changed()
+            return entry
+
+    def discard(self, sha256: str, expire: str) -> bool:
+        """Remove an entry."""
+        with self._lock:
+            if self.entries.pop(self._key(sha256, expire), None) is None:
+                return False
+            self._changed()
+            return True
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """Drop expired entries, then least recently used ones above max_entries."""
+        with self._lock:
+            removed = self._evict(time.time() if now is None else now)
+            if removed:
+                self._changed()
+            return removed
+
+    def _evict(self, now: float) -> int:
+        entries = self.entries
+        removed = [
+            k for k, v in entries.items() if v.expires_at - self.safety_margin <= now
+        ]
+        for k in removed:
+            del entries[k]
+
+        overflow = len(entries) - self.max_entries
+        if overflow > 0:
+            lru = sorted(entries, key=lambda k: entries[k].last_used_at)[:overflow]
+            for k in lru:
+                del entries[k]
+            removed.extend(lru)
+        return len(removed)
@@ -331,5 +331,134 @@ def observe_alert_ai_process(
         sys.exit(1)
 
 
+@cli.group("file")
+@click.pass_context
+def file_group(ctx: click.Context):
+    """UP file upload/download commands."""
+    pass
+
+
+@file_group.command("upload")
+@click.option(
+    "--file",
+    "file_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="File to upload",
+)
+@click.option(
+    "--dir",
+    "dir_path",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Upload every file under this directory",
+)
+@click.option("--expire", default="15h", help="Expire time, e.g. 15h")
+@click.option("--content-type", default="application/octet-stream", help="Content type")
+@click.option("--id", "file_id", default=None, help="File ID (single file only)")
+@click.option("--workers", type=int, default=4, help="Parallel uploads for --dir")
+@click.option(
+    "--dedup", is_flag=True, help="Skip content already uploaded from this project"
+)
+@click.option("--verify", is_flag=True, help="Cross-check --dedup hits with LongLive")
+@click.pass_obj
+def file_upload(
+    ctx: CLIContext,
+    file_path: Optional[Path],
+    dir_path: Optional[Path],
+    expire: str,
+    content_type: str,
+    file_id: Optional[str],
+    workers: int,
+    dedup: bool,
+    verify: bool,
+):
+    """Upload a file, or a whole directory with a worker pool."""
+    try:
+        from cli_anything.hiagent_sdk.core.upload_index import UploadIndex
+        from cli_anything.hiagent_sdk.utils.hiagent_backend import (
+            upload_directory,
+            upload_raw_file,
+        )
+
+        if (file_path is None) == (dir_path is None):
+            raise click.UsageError("exactly one of --file or --dir is required")
+
+        index = None
+        if dedup:
+            index = UploadIndex(ctx.project.upload_index_file, verify=verify)
+
+        up_service = ctx.service_manager.get_up_upload_service()
+        if file_path is not None:
+            result = upload_raw_file(
+                up_service,
+                file_path,
+                file_id=file_id,
+                expire=expire,
+                content_type=content_type,
+                index=index,
+            )
+            state = "reused" if result["cached"] else "uploaded"
+            ctx.exporter.print_result(result, True, f"File {state}: {result['path']}")
+            return
+
+        result = upload_directory(
+            up_service,
+            dir_path,
+            expire=expire,
+            content_type=content_type,
+            workers=workers,
+            index=index,
+        )
+        ctx.exporter.print_result(
+            result,
+            not result["failed"],
+            f"Uploaded {result['uploaded']} files, reused {result['cached']}, "
+            f"failed {len(result['failed'])} in {result['elapsed_seconds']}s "
+            f"({result['files_per_second']} files/s, {result['mb_per_second']} MB/s)",
+        )
+        if result["failed"]:
+            sys.exit(1)
+
+    except click.UsageError:
+        raise
+    except Exception as e:
+        ctx.exporter.print_result(None, False, f"Error: {str(e)}")
+        sys.exit(1)
+
+
+@file_group.command("download")
+@click.option("--path", "path", required=True, help="File path returned by upload")
+@click.option(
+    "--output",
+    required=True,
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Save to",
+)
+@click.option("--key", default=None, help="Download key, fetched when omitted")
+@click.pass_obj
+def file_download(
+    ctx: CLIContext,
+    path: str,
+    output: Path,
+    key: Optional[str],
+):
+    """Download a file."""
+    try:
+        from cli_anything.hiagent_sdk.utils.hiagent_backend import download_file
+
+        result = download_file(
+            ctx.service_manager.get_up_upload_service(),
+            path=path,
+            save_to=output,
+            key=key,
+            up_download_service=ctx.service_manager.get_up_download_service(),
+        )
+        ctx.exporter.print_result(result, True, f"File saved to {result['saved_to']}")
+    except Exception as e:
+        ctx.exporter.print_result(None, False, f"Error: {str(e)}")
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     cli()
@@ -1,3 +1,5 @@
+import json
+
 from click.testing import CliRunner
 
 from cli_anything.hiagent_sdk.hiagent_cli import cli
@@ -23,3 +25,35 @@ def test_project_short_option_is_rejected():
 
     assert result.exit_code != 0
     assert "No such option" in result.output
+
+
+def test_file_upload_requires_file_or_dir():
+    result = CliRunner().invoke(cli, ["file", "upload"])
+
+    assert result.exit_code != 0
+    assert "exactly one of --file or --dir" in result.output
+
+
+def test_file_upload_dir_json(tmp_path, monkeypatch):
+    from cli_anything.hiagent_sdk.core.services import ServiceManager
+    from cli_anything.hiagent_sdk.utils import hiagent_backend
+    from hiagent_api import up_types
+
+    class _UpSvc:
+        def UploadRaw(self, req, f):
+            return up_types.UploadRawResponse(
+                Path=f"path/{req.Id}", Sha256=req.Sha256, Size=len(f.read())
+            )
+
+    monkeypatch.setattr(hiagent_backend, "ensure_volc_credentials", lambda: None)
+    monkeypatch.setattr(ServiceManager, "get_up_upload_service", lambda self: _UpSvc())
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "a.txt").write_bytes(b"abc")
+
+    result = CliRunner().invoke(cli, ["--json", "file", "upload", "--dir", "docs"])
+
+    assert result.exit_code == 0, result.output
+    data = json.loads(result.output)
+    assert data["data"]["uploaded"] == 1
+    assert data["data"]["files"][0]["file"] == "a.txt"
@@ -1,8 +1,11 @@
 import sys
 import types
+from hashlib import sha256
 from pathlib import Path
 
+from cli_anything.hiagent_sdk.core import upload_index
 from cli_anything.hiagent_sdk.core.services import ServiceManager
+from cli_anything.hiagent_sdk.core.upload_index import UploadIndex, parse_expire
 from cli_anything.hiagent_sdk.utils import hiagent_backend
 from hiagent_api import up_types
 
@@ -59,3 +62,163 @@ def test_download_file_uses_separate_download_service(tmp_path, monkeypatch):
 
     assert result["saved_to"] == str(out)
     assert out.read_bytes() == b"ok"
+
+
+class _CountingUpSvc:
+    def __init__(self, long_live_error=None):
+        self.uploads = 0
+        self.long_lives = 0
+        self.long_live_error = long_live_error
+
+    def UploadRaw(self, req, f):
+        self.uploads += 1
+        data = f.read()
+        return up_types.UploadRawResponse(
+            Path=f"path/{self.uploads}", Sha256=req.Sha256, Size=len(data)
+        )
+
+    def LongLive(self, params):
+        self.long_lives += 1
+        if self.long_live_error:
+            raise self.long_live_error
+        return up_types.LongLiveResponse(Path=params.Path, Size=0)
+
+
+def test_upload_raw_file_skips_indexed_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(hiagent_backend, "ensure_volc_credentials", lambda: None)
+    src = tmp_path / "a.txt"
+    src.write_bytes(b"hello")
+    index = UploadIndex(tmp_path / "index.json")
+    svc = _CountingUpSvc()
+
+    first = hiagent_backend.upload_raw_file(svc, src, index=index)
+    second = hiagent_backend.upload_raw_file(svc, src, index=index)
+
+    assert svc.uploads == 1
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["path"] == first["path"]
+    assert second["id"] == first["id"]
+
+    # a different expire is a different key
+    hiagent_backend.upload_raw_file(svc, src, expire="2h", index=index)
+    assert svc.uploads == 2
+
+    # the index survives a reload from disk
+    reloaded = UploadIndex(tmp_path / "index.json")
+    assert reloaded.lookup(first["sha256"], "15h").path == first["path"]
+
+
+def test_upload_raw_file_honours_explicit_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(hiagent_backend, "ensure_volc_credentials", lambda: None)
+    src = tmp_path / "a.txt"
+    src.write_bytes(b"hello")
+    index = UploadIndex(tmp_path / "index.json")
+    svc = _CountingUpSvc()
+
+    hiagent_backend.upload_raw_file(svc, src, index=index)
+    named = hiagent_backend.upload_raw_file(svc, src, file_id="mine", index=index)
+    assert named["id"] == "mine" and named["cached"] is False
+    assert svc.uploads == 2
+
+    again = hiagent_backend.upload_raw_file(svc, src, file_id="mine", index=index)
+    assert again["id"] == "mine" and again["cached"] is True
+    assert svc.uploads == 2
+
+
+def test_upload_raw_file_verify_reuploads_when_long_live_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(hiagent_backend, "ensure_volc_credentials", lambda: None)
+    src = tmp_path / "a.txt"
+    src.write_bytes(b"hello")
+    index = UploadIndex(tmp_path / "index.json", verify=True)
+    svc = _CountingUpSvc()
+
+    hiagent_backend.upload_raw_file(svc, src, index=index)
+    hiagent_backend.upload_raw_file(svc, src, index=index)
+    assert (svc.uploads, svc.long_lives) == (1, 1)
+
+    svc.long_live_error = Exception("not found")
+    result = hiagent_backend.upload_raw_file(svc, src, index=index)
+    assert result["cached"] is False
+    assert result["path"] == "path/2"
+    assert svc.uploads == 2
+
+
+def test_upload_index_eviction(tmp_path, monkeypatch):
+    index = UploadIndex(tmp_path / "index.json", max_entries=2, safety_margin=0)
+    now = [1000.0]
+    monkeypatch.setattr(upload_index.time, "time", lambda: now[0])
+
+    index.record("a", "1m", "ia", "pa", 1)
+    now[0] += 1
+    index.record("b", "1h", "ib", "pb", 1)
+    now[0] += 1
+    assert index.lookup("a", "1m") is not None
+    now[0] += 1
+    index.record("c", "1h", "ic", "pc", 1)
+
+    # "b" is least recently used once "a" was looked up
+    assert set(index.entries) == {"a:1m", "c:1h"}
+
+    now[0] += 60
+    assert index.lookup("a", "1m") is None
+    assert index.record("d", "forever", "id", "pd", 1) is None
+    assert parse_expire("1h30m") == 5400
+
+
+def test_file_sha256_matches_full_read(tmp_path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(bytes(range(256)) * 1000)
+    assert (
+        hiagent_backend.file_sha256(src, chunk_size=4096)
+        == sha256(src.read_bytes()).hexdigest()
+    )
+
+
+def test_upload_directory_reports_results_and_throughput(tmp_path, monkeypatch):
+    monkeypatch.setattr(hiagent_backend, "ensure_volc_credentials", lambda: None)
+    root = tmp_path / "docs"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_bytes(b"aaa")
+    (root / "sub" / "b.txt").write_bytes(b"bb")
+    (root / "sub" / "c.txt").write_bytes(b"aaa")
+    index = UploadIndex(tmp_path / "index.json")
+    svc = _CountingUpSvc()
+
+    first = hiagent_backend.upload_directory(svc, root, workers=1, index=index)
+    assert [r["file"] for r in first["files"]] == ["a.txt", "sub/b.txt", "sub/c.txt"]
+    assert (first["uploaded"], first["cached"]) == (2, 1)
+    assert first["bytes_uploaded"] == 5
+    assert first["failed"] == []
+
+    second = hiagent_backend.upload_directory(svc, root, workers=3, index=index)
+    assert (second["uploaded"], second["cached"]) == (0, 3)
+    assert svc.uploads == 2
+
+
+def test_upload_directory_dedupes_and_saves_index_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(hiagent_backend, "ensure_volc_credentials", lambda: None)
+    saves = []
+    save = upload_index._locked_save_json
+    monkeypatch.setattr(
+        upload_index,
+        "_locked_save_json",
+        lambda *a, **kw: saves.append(1) or save(*a, **kw),
+    )
+    root = tmp_path / "docs"
+    root.mkdir()
+    for name in ("a", "b", "c", "d"):
+        (root / f"{name}.txt").write_bytes(b"same")
+    (root / "e.txt").write_bytes(b"other")
+    index = UploadIndex(tmp_path / "index.json")
+    svc = _CountingUpSvc()
+
+    result = hiagent_backend.upload_directory(svc, root, workers=4, index=index)
+    assert svc.uploads == 2
+    assert (result["uploaded"], result["cached"]) == (2, 3)
+    assert len({r["path"] for r in result["files"]}) == 2
+    assert len(saves) == 1
+
+    # hits alone do not rewrite the file
+    index.lookup(result["files"][0]["sha256"], "15h")
+    assert len(saves) == 1
@@ -1,14 +1,19 @@
 import configparser
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from hashlib import sha256
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
 from dotenv import dotenv_values
 from hiagent_api import up_types
 from hiagent_api.up import UpService
 
+from cli_anything.hiagent_sdk.core.upload_index import UploadIndex
+
 
 def _read_volc_dotenv() -> dict:
     dotenv_path = Path(os.path.expanduser("~/.volc/.env"))
@@ -69,20 +74,61 @@ def ensure_volc_credentials() -> None:
     )
 
 
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Hash a file with a single reusable buffer, so memory stays bounded."""
+    digest = sha256()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with file_path.open("rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+
 def upload_raw_file(
     up_service: UpService,
     file_path: Path,
     file_id: Optional[str] = None,
     expire: str = "15h",
     content_type: str = "application/octet-stream",
+    index: Optional[UploadIndex] = None,
+    digest: Optional[str] = None,
 ) -> dict:
     ensure_volc_credentials()
     if not file_path.is_file():
         raise FileNotFoundError(str(file_path))
 
-    file_id = file_id or f"cli-{uuid.uuid4().hex}"
-    digest = sha256(file_path.read_bytes()).hexdigest()
+    digest = digest or file_sha256(file_path)
+
+    if index is not None:
+        entry = index.lookup(digest, expire)
+        if entry is not None and file_id is not None and entry.id != file_id:
+            # an explicit ID must be honoured, only reuse an upload made under it
+            entry = None
+        if entry is not None and index.verify:
+            try:
+                up_service.LongLive(
+                    up_types.LongLiveRequest(Path=entry.path, Id=entry.id)
+                )
+            except Exception:
+                index.discard(digest, expire)
+                entry = None
+        if entry is not None:
+            return {
+                "id": entry.id,
+                "path": entry.path,
+                "sha256": entry.sha256,
+                "size": entry.size,
+                "cached": True,
+            }
 
+    file_id = file_id or f"cli-{uuid.uuid4().hex}"
     req = up_types.UploadRawRequest(
         Expire=expire,
         Id=file_id,
@@ -93,11 +139,15 @@ def upload_raw_file(
     with file_path.open("rb") as f:
         resp = up_service.UploadRaw(req, f)
 
+    if index is not None:
+        index.record(digest, expire, file_id, resp.Path, resp.Size)
+
     return {
         "id": file_id,
         "path": resp.Path,
         "sha256": resp.Sha256,
         "size": resp.Size,
+        "cached": False,
     }
 
 
@@ -125,3 +175,86 @@ def download_file(
         "saved_to": str(save_to),
         "size": size,
     }
+
+
+def upload_directory(
+    up_service: UpService,
+    directory: Path,
+    expire: str = "15h",
+    content_type: str = "application/octet-stream",
+    workers: int = 4,
+    recursive: bool = True,
+    index: Optional[UploadIndex] = None,
+) -> dict:
+    ensure_volc_credentials()
+    if not directory.is_dir():
+        raise NotADirectoryError(str(directory))
+
+    candidates = directory.rglob("*") if recursive else directory.iterdir()
+    files = sorted(p for p in candidates if p.is_file())
+
+    results = []
+    failed = []
+    started = time.perf_counter()
+
+    def rel(file_path: Path) -> str:
+        return file_path.relative_to(directory).as_posix()
+
+    batch = index.batch() if index is not None else nullcontext()
+    with batch, ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # hash first, so files with the same content are uploaded once even
+        # when different workers would have picked them up at the same time
+        hashing = {executor.submit(file_sha256, p): p for p in files}
+        by_digest: Dict[str, List[Path]] = {}
+        for future in as_completed(hashing):
+            try:
+                by_digest.setdefault(future.result(), []).append(hashing[future])
+            except Exception as e:
+                failed.append({"file": rel(hashing[future]), "error": str(e)})
+
+        uploads = {}
+        for digest, paths in by_digest.items():
+            paths.sort()
+            future = executor.submit(
+                upload_raw_file,
+                up_service,
+                paths[0],
+                None,
+                expire,
+                content_type,
+                index,
+                digest,
+            )
+            uploads[future] = paths
+        for future in as_completed(uploads):
+            first, *duplicates = uploads[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed.extend(
+                    {"file": rel(p), "error": str(e)} for p in [first, *duplicates]
+                )
+                continue
+            results.append({"file": rel(first), **result})
+            results.extend(
+                {"file": rel(p), **result, "cached": True} for p in duplicates
+            )
+    elapsed = time.perf_counter() - started
+
+    results.sort(key=lambda r: r["file"])
+    failed.sort(key=lambda r: r["file"])
+    uploaded = [r for r in results if not r["cached"]]
+    bytes_uploaded = sum(r["size"] for r in uploaded)
+    return {
+        "directory": str(directory),
+        "files": results,
+        "failed": failed,
+        "uploaded": len(uploaded),
+        "cached": len(results) - len(uploaded),
+        "bytes_uploaded": bytes_uploaded,
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_second": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "mb_per_second": (
+            round(bytes_uploaded / elapsed / (1024 * 1024), 2) if elapsed else 0.0
+        ),
+    }
@@ -0,0 +1,77 @@
+# coding:utf-8
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import hashlib
+import os
+import uuid
+from dotenv import load_dotenv
+
+from hiagent_api.up import UpService
+from hiagent_api import up_types
+
+load_dotenv()
+
+
+async def main():
+    up_upload = UpService(
+        endpoint=os.getenv("HIAGENT_UP_UPLOAD_ENDPOINT"), region="cn-north-1"
+    )
+
+    up_download = UpService(
+        endpoint=os.getenv("HIAGENT_UP_DOWNLOAD_ENDPOINT"), region="cn-north-1"
+    )
+
+    # 1. 上传文件，文件内容按块流式发送
+    test_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "test_data/test.txt"
+    )
+    test_file_hash = hashlib.sha256(open(test_file, "rb").read()).hexdigest()
+    req_params = up_types.UploadRawRequest(
+        Id=uuid.uuid4().hex,
+        ContentType="plain/text",
+        Expire="15h",
+        Sha256=test_file_hash,
+    )
+    uploadraw_resp = await up_upload.aupload_raw(req_params, test_file)
+    assert uploadraw_resp.Sha256 == test_file_hash, "SHA256 mismatch"
+
+    # 2. 对文件持久化
+    id = uuid.uuid4().hex
+    longlive_resp = await up_upload.along_live(
+        up_types.LongLiveRequest(Path=uploadraw_resp.Path, Id=id)
+    )
+    assert longlive_resp.Path == uploadraw_resp.Path, "Path mismatch"
+
+    # 3. 获取下载密钥
+    downloadkey_resp = await up_upload.adownload_key(
+        up_types.DownloadKeyRequest(Path=uploadraw_resp.Path)
+    )
+
+    # 4. 下载文件，响应内容按块写入磁盘
+    save_to = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "test_data", "download.txt"
+    )
+    await up_download.adownload(
+        up_types.DownloadRequest(
+            Path=uploadraw_resp.Path, Key=downloadkey_resp.Key, SaveTo=save_to
+        )
+    )
+
+    # 5. 删除文件
+    await up_upload.adelete(up_types.DeleteRequest(Sha256=test_file_hash, Id=id))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
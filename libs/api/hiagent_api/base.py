@@ -43,8 +43,25 @@ from volcengine.Policy import ComplexEncoder, InnerToken, SecurityToken2
 from volcengine.ServiceInfo import ServiceInfo
 from volcengine.util.Util import *
 
+from hiagent_api.deadline import check_deadline, timeout_kwargs
+from hiagent_api.instrumentation import instrument_client
+
 VERSION = "0.0.1"
 
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+async def aiter_file(
+    file_path, chunk_size: int = FILE_CHUNK_SIZE
+) -> AsyncGenerator[bytes, None]:
+    """按块异步读取文件，上传时无需将整个文件读入内存"""
+    async with aiofiles.open(file_path, "rb") as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
 
 class VolcAuth(AuthBase):
     def __init__(self, client, request):
@@ -65,6 +82,35 @@ class VolcAuth(AuthBase):
         return r.headers
 
 
+class HttpxVolcAuth(httpx.Auth):
+    """httpx 版本的 VolcAuth，在请求体确定后对请求进行 SignerV4 签名。
+
+    签名需要对完整请求体计算哈希，因此流式请求体会在签名前被读取。
+    """
+
+    requires_request_body = True
+
+    def __init__(self, client, request):
+        self.client = client
+        self.request = request
+
+    def auth_flow(self, request: httpx.Request):
+        self.request.body = request.content
+        if "Content-Type" in request.headers:
+            self.request.headers["Content-Type"] = request.headers["Content-Type"]
+        SignerV4.sign(self.request, self.client.service_info.credentials)
+        for k in self.request.headers:
+            request.headers[k] = self.request.headers[k]
+        yield request
+
+
+def _body_kwargs(data) -> dict:
+    # httpx 中原始请求体（bytes、str、文件、迭代器）需通过 content 传递，表单通过 data 传递
+    if data is None or isinstance(data, dict):
+        return {"data": data}
+    return {"content": data}
+
+
 class Service(object):
     def __init__(
             self,
@@ -105,6 +151,10 @@ class Service(object):
                 )
             )
 
+        # 采集钩子仅在设置 sink 后生效，见 hiagent_api.instrumentation
+        instrument_client(self.http_client)
+        instrument_client(self.async_http_client)
+
     def init(self):
         if "VOLC_ACCESSKEY" in os.environ and "VOLC_SECRETKEY" in os.environ:
             self.service_info.credentials.set_ak(os.environ["VOLC_ACCESSKEY"])
@@ -195,15 +245,27 @@ class Service(object):
         SignerV4.sign(r, self.service_info.credentials)
 
         url = r.build(doseq)
-        with httpx.Client() as client:
-            resp = client.get(
-                url,
-                headers=r.headers,
-                timeout=(
-                    self.service_info.connection_timeout,
-                    self.service_info.socket_timeout,
-                ),
-            )
+        resp = self.http_client.get(
+            url, headers=r.headers, **timeout_kwargs(self.http_client)
+        )
+        if resp.status_code == 200:
+            return resp.text
+        else:
+            raise Exception(resp.text)
+
+    async def aget(self, api, params, doseq=0):
+        if api not in self.api_info:
+            raise Exception("no such api")
+        api_info = self.api_info[api]
+
+        r = self.prepare_request(api_info, params, doseq)
+
+        SignerV4.sign(r, self.service_info.credentials)
+
+        url = r.build(doseq)
+        resp = await self.async_http_client.get(
+            url, headers=r.headers, **timeout_kwargs(self.async_http_client)
+        )
         if resp.status_code == 200:
             return resp.text
         else:
@@ -224,7 +286,9 @@ class Service(object):
 
     def post(self, api, params, form) -> str:
         url, r = self._prepare_post_signed_request(api, params, form)
-        resp = self.http_client.post(url, headers=r.headers, data=r.form)
+        resp = self.http_client.post(
+            url, headers=r.headers, data=r.form, **timeout_kwargs(self.http_client)
+        )
         if resp.status_code == 200:
             return resp.text
         else:
@@ -232,7 +296,12 @@ class Service(object):
 
     async def apost(self, api, params, form) -> str:
         url, r = self._prepare_post_signed_request(api, params, form)
-        resp = await self.async_http_client.post(url, headers=r.headers, data=r.form)
+        resp = await self.async_http_client.post(
+            url,
+            headers=r.headers,
+            data=r.form,
+            **timeout_kwargs(self.async_http_client),
+        )
         if resp.status_code == 200:
             return resp.text
         else:
@@ -249,7 +318,12 @@ class Service(object):
         url = r.build()
 
         resp = self.http_client.request(
-            api_info.method, url, data=data, files=files, auth=VolcAuth(self, r)
+            api_info.method,
+            url,
+            files=files,
+            auth=HttpxVolcAuth(self, r),
+            **_body_kwargs(data),
+            **timeout_kwargs(self.http_client),
         )
         if resp.status_code == 200:
             return resp.text
@@ -266,15 +340,20 @@ class Service(object):
             reqConfig(r)
         url = r.build()
 
-        resp = self.async_http_client.request(
-            api_info.method, url, data=data, files=files, auth=VolcAuth(self, r)
+        resp = await self.async_http_client.request(
+            api_info.method,
+            url,
+            files=files,
+            auth=HttpxVolcAuth(self, r),
+            **_body_kwargs(data),
+            **timeout_kwargs(self.async_http_client),
         )
         if resp.status_code == 200:
             return resp.text
         else:
             raise Exception(resp.text)
 
-    def json(self, api, params, body):
+    def _prepare_json_signed_request(self, api, params, body) -> tuple[str, Request]:
         if api not in self.api_info:
             raise Exception("no such api")
         api_info = self.api_info[api]
@@ -285,32 +364,73 @@ class Service(object):
         SignerV4.sign(r, self.service_info.credentials)
 
         url = r.build()
-        resp = self.http_client.post(url, headers=r.headers, data=r.body)
+        return (url, r)
+
+    def json(self, api, params, body):
+        url, r = self._prepare_json_signed_request(api, params, body)
+        resp = self.http_client.post(
+            url,
+            headers=r.headers,
+            content=r.body,
+            **timeout_kwargs(self.http_client),
+        )
         if resp.status_code == 200:
             return json.dumps(resp.json())
         else:
             raise Exception(resp.text.encode("utf-8"))
 
     async def ajson(self, api, params, body):
-        if api not in self.api_info:
-            raise Exception("no such api")
-        api_info = self.api_info[api]
-        r = self.prepare_request(api_info, params)
-        r.headers["Content-Type"] = "application/json"
-        r.body = body
-
-        SignerV4.sign(r, self.service_info.credentials)
-
-        url = r.build()
-        resp = await self.async_http_client.post(url, headers=r.headers, data=r.body)
+        url, r = self._prepare_json_signed_request(api, params, body)
+        resp = await self.async_http_client.post(
+            url,
+            headers=r.headers,
+            content=r.body,
+            **timeout_kwargs(self.async_http_client),
+        )
         if resp.status_code == 200:
             return json.dumps(resp.json())
         else:
             raise Exception(resp.text.encode("utf-8"))
 
+    def json_sse(self, api, params, body) -> Generator[ServerSentEvent, None, None]:
+        url, r = self._prepare_json_signed_request(api, params, body)
+        with connect_sse(
+            self.http_client,
+            method="POST",
+            url=url,
+            headers=r.headers,
+            content=r.body,
+            **timeout_kwargs(self.http_client),
+        ) as event_source:
+            if event_source.response.status_code != 200:
+                event_source.response.read()
+                raise Exception(event_source.response.text.encode("utf-8"))
+            for sse in event_source.iter_sse():
+                check_deadline()
+                yield sse
+
+    async def ajson_sse(
+        self, api, params, body
+    ) -> AsyncGenerator[ServerSentEvent, None]:
+        url, r = self._prepare_json_signed_request(api, params, body)
+        async with aconnect_sse(
+            self.async_http_client,
+            method="POST",
+            url=url,
+            headers=r.headers,
+            content=r.body,
+            **timeout_kwargs(self.async_http_client),
+        ) as event_source:
+            if event_source.response.status_code != 200:
+                await event_source.response.aread()
+                raise Exception(event_source.response.text.encode("utf-8"))
+            async for sse in event_source.aiter_sse():
+                check_deadline()
+                yield sse
+
     def put(self, url, file_path, headers):
         with open(file_path, "rb") as f:
-            resp = self.http_client.put(url, headers=headers, data=f)
+            resp = self.http_client.put(url, headers=headers, content=f)
             headers["X-Tt-Logid"] = resp.headers.get("X-Tt-Logid", "")
             if resp.status_code == 200:
                 return True, resp.text.encode("utf-8")
@@ -318,22 +438,24 @@ class Service(object):
                 return False, resp.text.encode("utf-8")
 
     async def aput(self, url, file_path, headers):
-        async with aiofiles.open(file_path, "rb") as f:
-            content = await f.read()
-            resp = await self.async_http_client.put(
-                url, headers=headers, content=content
-            )
-            # It's generally not a good practice to modify the input `headers` dictionary directly.
-            # Consider returning the logid separately or as part of a structured response.
-            # For now, I will keep the existing behavior of modifying the headers dictionary.
-            headers["X-Tt-Logid"] = resp.headers.get("X-Tt-Logid", "")
-            if resp.status_code == 200:
-                return True, resp.text.encode("utf-8")
-            else:
-                return False, resp.text.encode("utf-8")
+        # stream the file in chunks; an explicit Content-Length avoids chunked
+        # transfer encoding, which some object storages reject.
+        req_headers = {"Content-Length": str(os.path.getsize(file_path))}
+        req_headers.update(headers)
+        resp = await self.async_http_client.put(
+            url, headers=req_headers, content=aiter_file(file_path)
+        )
+        # It's generally not a good practice to modify the input `headers` dictionary directly.
+        # Consider returning the logid separately or as part of a structured response.
+        # For now, I will keep the existing behavior of modifying the headers dictionary.
+        headers["X-Tt-Logid"] = resp.headers.get("X-Tt-Logid", "")
+        if resp.status_code == 200:
+            return True, resp.text.encode("utf-8")
+        else:
+            return False, resp.text.encode("utf-8")
 
     def put_data(self, url, data, headers):
-        resp = self.http_client.put(url, headers=headers, data=data)
+        resp = self.http_client.put(url, headers=headers, **_body_kwargs(data))
         headers["X-Tt-Logid"] = resp.headers.get("X-Tt-Logid", "")
         if resp.status_code == 200:
             return True, resp.text.encode("utf-8")
@@ -341,7 +463,9 @@ class Service(object):
             return False, resp.text.encode("utf-8")
 
     async def aput_data(self, url, data, headers):
-        resp = self.async_http_client.put(url, headers=headers, data=data)
+        resp = await self.async_http_client.put(
+            url, headers=headers, **_body_kwargs(data)
+        )
         headers["X-Tt-Logid"] = resp.headers.get("X-Tt-Logid", "")
         if resp.status_code == 200:
             return True, resp.text.encode("utf-8")
@@ -495,7 +619,10 @@ class AppAPIMixin:
         if _headers is not None:
             headers.update(_headers)
         response = await self.async_http_client.post(
-            app_url, json=params, headers=headers
+            app_url,
+            json=params,
+            headers=headers,
+            **timeout_kwargs(self.async_http_client),
         )
         try:
             response.raise_for_status()  # Raise an exception for bad status codes
@@ -517,7 +644,9 @@ class AppAPIMixin:
         if _headers is not None:
             headers.update(_headers)
 
-        response = self.http_client.post(app_url, json=params, headers=headers)
+        response = self.http_client.post(
+            app_url, json=params, headers=headers, **timeout_kwargs(self.http_client)
+        )
         try:
             response.raise_for_status()  # Raise an exception for bad status codes
         except Exception:
@@ -540,13 +669,15 @@ class AppAPIMixin:
         headers = {"Apikey": f"{app_key}", "Content-Type": "application/json"}
 
         with connect_sse(
-                self.http_client,
-                method="POST",
-                url=app_url,
-                json=params,
-                headers=headers,
+            self.http_client,
+            method="POST",
+            url=app_url,
+            json=params,
+            headers=headers,
+            **timeout_kwargs(self.http_client),
         ) as event_source:
             for sse in event_source.iter_sse():
+                check_deadline()
                 yield sse
 
     async def _asse_post(
@@ -562,13 +693,15 @@ class AppAPIMixin:
         headers = {"Apikey": f"{app_key}", "Content-Type": "application/json"}
 
         async with aconnect_sse(
-                self.async_http_client,
-                method="POST",
-                url=app_url,
-                json=params,
-                headers=headers,
+            self.async_http_client,
+            method="POST",
+            url=app_url,
+            json=params,
+            headers=headers,
+            **timeout_kwargs(self.async_http_client),
         ) as event_source:
             async for sse in event_source.aiter_sse():
+                check_deadline()
                 yield sse
 
 
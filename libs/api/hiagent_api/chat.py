@@ -289,6 +289,24 @@ class ChatService(Service, AppAPIMixin):
             if chat_event:
                 yield chat_event
 
+    def chat_streaming_raw(
+        self, app_key: str, chat: ChatRequest
+    ) -> Generator[dict, None, None]:
+        """流式对话，返回未经模型校验的事件字典，适用于只关心少数事件的调用方"""
+        chat.response_mode = "streaming"
+        params = chat.model_dump(by_alias=True)
+        for event in self._sse_post(app_key, "chat_query_v2", params):
+            yield json.loads(event.data)
+
+    async def achat_streaming_raw(
+        self, app_key: str, chat: ChatRequest
+    ) -> AsyncGenerator[dict, None]:
+        """流式对话，返回未经模型校验的事件字典，适用于只关心少数事件的调用方"""
+        chat.response_mode = "streaming"
+        params = chat.model_dump(by_alias=True)
+        async for event in self._asse_post(app_key, "chat_query_v2", params):
+            yield json.loads(event.data)
+
     def chat_again(
             self, app_key: str, chat_again: ChatAgainRequest
     ) -> Generator[ChatEvent, None, None]:
@@ -0,0 +1,116 @@
+# coding: utf-8
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""调用截止时间。
+
+deadline() 在当前上下文（线程或协程）中设置截止时间，嵌套时取更早者。
+Service 发起的每个 httpx 请求会将各阶段超时限制在剩余时间之内。
+cancel_scope() 可在结果不再需要时提前结束其中的工作。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Tuple, Union
+
+import httpx
+
+_deadline: ContextVar[Optional[float]] = ContextVar("hiagent_deadline", default=None)
+_cancel_events: ContextVar[Tuple[threading.Event, ...]] = ContextVar(
+    "hiagent_cancel_events", default=()
+)
+
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+
+@contextmanager
+def deadline(timeout: Optional[float]) -> Iterator[Optional[float]]:
+    """在 timeout 秒后截止，返回 time.monotonic() 时间轴上的截止时刻。timeout 为 None 时不做限制"""
+    current = _deadline.get()
+    if timeout is None:
+        yield current
+        return
+    at = time.monotonic() + timeout
+    if current is not None and current < at:
+        at = current
+    token = _deadline.set(at)
+    try:
+        yield at
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def cancel_scope() -> Iterator[threading.Event]:
+    """返回一个事件，事件被设置（可在其他线程中）后，本上下文及从中复制上下文的
+    线程和协程视为已到截止时间：remaining_time() 返回 0，check_deadline() 与之后
+    发起的 HTTP 请求抛出 DeadlineExceededError。
+
+    取消是协作式的，已经发出的请求和不检查截止时间的代码会运行到自然结束。
+    """
+    event = threading.Event()
+    token = _cancel_events.set(_cancel_events.get() + (event,))
+    try:
+        yield event
+    finally:
+        _cancel_events.reset(token)
+
+
+def cancelled() -> bool:
+    return any(event.is_set() for event in _cancel_events.get())
+
+
+def get_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining_time() -> Optional[float]:
+    """剩余秒数，未设置截止时间时返回 None，所在的 cancel_scope 被取消时返回 0"""
+    if cancelled():
+        return 0.0
+    at = _deadline.get()
+    if at is None:
+        return None
+    return at - time.monotonic()
+
+
+def check_deadline() -> None:
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceededError("cancelled" if cancelled() else "deadline exceeded")
+
+
+def _cap(value: Optional[float], remaining: float) -> float:
+    return remaining if value is None else min(value, remaining)
+
+
+def timeout_kwargs(client: Union[httpx.Client, httpx.AsyncClient]) -> dict:
+    """根据剩余时间收紧客户端超时，作为 httpx 请求参数传入；未设置截止时间时返回空字典"""
+    remaining = remaining_time()
+    if remaining is None:
+        return {}
+    if remaining <= 0:
+        raise DeadlineExceededError("deadline exceeded")
+    t = client.timeout
+    return {
+        "timeout": httpx.Timeout(
+            connect=_cap(t.connect, remaining),
+            read=_cap(t.read, remaining),
+            write=_cap(t.write, remaining),
+            pool=_cap(t.pool, remaining),
+        )
+    }
@@ -0,0 +1,489 @@
+# coding: utf-8
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""HTTP 调用耗时采集。
+
+通过 httpx 事件钩子与 httpcore trace 扩展记录每次请求的连接池等待、建连、TLS、
+首字节、总耗时以及收发字节数，并写入可替换的 sink。未设置 sink 时钩子直接返回。
+基于 requests 的同步调用（如 UpService）通过 instrument_session 记录首字节与总耗时。
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Union
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+_TIMER_KEY = "hiagent_timer"
+_INSTRUMENTED = "_hiagent_instrumented"
+
+TIMING_METRICS = ("pool_wait", "connect", "tls", "ttfb", "total")
+
+
+@dataclass
+class HttpTiming:
+    """单次 HTTP 调用的耗时记录，时间单位为秒，未观测到的阶段为 None"""
+
+    action: str
+    method: str
+    url: str
+    app_key: Optional[str] = None
+    status_code: Optional[int] = None
+    pool_wait: Optional[float] = None
+    connect: Optional[float] = None
+    tls: Optional[float] = None
+    ttfb: Optional[float] = None
+    total: Optional[float] = None
+    bytes_sent: Optional[int] = None
+    bytes_received: int = 0
+
+
+class HttpTimingSink(ABC):
+    """耗时记录的接收方"""
+
+    @abstractmethod
+    def record(self, timing: HttpTiming) -> None:
+        pass
+
+
+_default_sink: Optional[HttpTimingSink] = None
+
+
+def set_http_timing_sink(sink: Optional[HttpTimingSink]) -> None:
+    """设置全局 sink，传入 None 关闭采集"""
+    global _default_sink
+    _default_sink = sink
+
+
+def get_http_timing_sink() -> Optional[HttpTimingSink]:
+    return _default_sink
+
+
+def _action_of(url: httpx.URL) -> str:
+    # OpenAPI 请求通过 Action 参数区分，应用接口通过路径最后一段区分
+    action = url.params.get("Action")
+    if action:
+        return action
+    return url.path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _record(sink: HttpTimingSink, timing: HttpTiming) -> None:
+    try:
+        sink.record(timing)
+    except Exception:
+        logging.exception("http timing sink failed")
+
+
+def _bytes_sent(request: httpx.Request) -> Optional[int]:
+    length = request.headers.get("Content-Length")
+    if length is not None:
+        return int(length)
+    try:
+        return len(request.content)
+    except httpx.RequestNotRead:
+        return None
+
+
+class _CallTimer:
+    def __init__(self, request: httpx.Request, sink: HttpTimingSink):
+        self.sink = sink
+        self.start = time.perf_counter()
+        self.marks: Dict[str, float] = {}
+        self.finished = False
+        self.timing = HttpTiming(
+            action=_action_of(request.url),
+            method=request.method,
+            url=str(request.url.copy_with(query=None)),
+            app_key=request.headers.get("Apikey"),
+            bytes_sent=_bytes_sent(request),
+        )
+
+    def mark(self, name: str) -> None:
+        self.marks.setdefault(name, time.perf_counter())
+
+    def _span(self, started: str, complete: str) -> Optional[float]:
+        if started in self.marks and complete in self.marks:
+            return self.marks[complete] - self.marks[started]
+        return None
+
+    def on_response(self, response: httpx.Response) -> None:
+        self.timing.status_code = response.status_code
+        self.timing.ttfb = time.perf_counter() - self.start
+
+    def finish(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        timing = self.timing
+        timing.total = time.perf_counter() - self.start
+        first_io = [
+            v
+            for k, v in self.marks.items()
+            if k == "connection.connect_tcp.started"
+            or k.endswith("send_request_headers.started")
+        ]
+        if first_io:
+            timing.pool_wait = min(first_io) - self.start
+        timing.connect = self._span(
+            "connection.connect_tcp.started", "connection.connect_tcp.complete"
+        )
+        timing.tls = self._span(
+            "connection.start_tls.started", "connection.start_tls.complete"
+        )
+        _record(self.sink, timing)
+
+
+def _chain_trace(request: httpx.Request, timer: _CallTimer) -> None:
+    previous = request.extensions.get("trace")
+
+    def trace(name, info):
+        timer.mark(name)
+        if previous is not None:
+            previous(name, info)
+
+    request.extensions["trace"] = trace
+
+
+def _achain_trace(request: httpx.Request, timer: _CallTimer) -> None:
+    previous = request.extensions.get("trace")
+
+    async def trace(name, info):
+        timer.mark(name)
+        if previous is not None:
+            await previous(name, info)
+
+    request.extensions["trace"] = trace
+
+
+class _TimedStream(httpx.SyncByteStream):
+    def __init__(self, stream, timer: _CallTimer):
+        self._stream = stream
+        self._timer = timer
+
+    def __iter__(self):
+        for chunk in self._stream:
+            self._timer.timing.bytes_received += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._timer.finish()
+
+
+class _AsyncTimedStream(httpx.AsyncByteStream):
+    def __init__(self, stream, timer: _CallTimer):
+        self._stream = stream
+        self._timer = timer
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._timer.timing.bytes_received += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._timer.finish()
+
+
+def instrument_client(
+    client: Union[httpx.Client, httpx.AsyncClient],
+    sink: Optional[HttpTimingSink] = None,
+) -> Union[httpx.Client, httpx.AsyncClient]:
+    """为 httpx 客户端安装耗时采集钩子，重复安装无效。
+
+    sink 为 None 时使用 set_http_timing_sink 设置的全局 sink。
+    只有收到响应的请求会被记录，记录在响应关闭时写入 sink。
+    """
+    if getattr(client, _INSTRUMENTED, False):
+        return client
+
+    def current_sink() -> Optional[HttpTimingSink]:
+        return sink if sink is not None else _default_sink
+
+    if isinstance(client, httpx.AsyncClient):
+
+        async def on_request(request: httpx.Request):
+            s = current_sink()
+            if s is None:
+                return
+            timer = _CallTimer(request, s)
+            request.extensions[_TIMER_KEY] = timer
+            _achain_trace(request, timer)
+
+        async def on_response(response: httpx.Response):
+            timer = response.request.extensions.get(_TIMER_KEY)
+            if timer is None:
+                return
+            timer.on_response(response)
+            response.stream = _AsyncTimedStream(response.stream, timer)
+
+    else:
+
+        def on_request(request: httpx.Request):
+            s = current_sink()
+            if s is None:
+                return
+            timer = _CallTimer(request, s)
+            request.extensions[_TIMER_KEY] = timer
+            _chain_trace(request, timer)
+
+        def on_response(response: httpx.Response):
+            timer = response.request.extensions.get(_TIMER_KEY)
+            if timer is None:
+                return
+            timer.on_response(response)
+            response.stream = _TimedStream(response.stream, timer)
+
+    client.event_hooks["request"].append(on_request)
+    client.event_hooks["response"].append(on_response)
+    setattr(client, _INSTRUMENTED, True)
+    return client
+
+
+def _prepared_bytes_sent(request: requests.PreparedRequest) -> Optional[int]:
+    length = request.headers.get("Content-Length")
+    if length is not None:
+        return int(length)
+    if isinstance(request.body, (bytes, str)):
+        return len(request.body)
+    return None
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    def __init__(self, sink: Optional[HttpTimingSink] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.sink = sink
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, **kwargs):
+        sink = self.sink if self.sink is not None else _default_sink
+        if sink is None:
+            return super().send(request, stream=stream, **kwargs)
+        url = httpx.URL(request.url)
+        timing = HttpTiming(
+            action=_action_of(url),
+            method=request.method or "",
+            url=str(url.copy_with(query=None)),
+            app_key=request.headers.get("Apikey"),
+            bytes_sent=_prepared_bytes_sent(request),
+        )
+        start = time.perf_counter()
+        response = super().send(request, stream=stream, **kwargs)
+        timing.status_code = response.status_code
+        timing.ttfb = time.perf_counter() - start
+        if not stream:
+            # 提前读取响应体以计入总耗时，requests 随后直接使用已读取的内容
+            timing.bytes_received = len(response.content)
+            timing.total = time.perf_counter() - start
+        _record(sink, timing)
+        return response
+
+
+def instrument_session(
+    session: requests.Session, sink: Optional[HttpTimingSink] = None
+) -> requests.Session:
+    """为 requests 会话安装耗时采集适配器，重复安装无效。
+
+    仅记录状态码、首字节与总耗时（流式响应不记录总耗时），requests 不提供连接池
+    等待、建连与 TLS 阶段的观测点。sink 为 None 时使用全局 sink。
+    """
+    if getattr(session, _INSTRUMENTED, False):
+        return session
+    for prefix in ("http://", "https://"):
+        session.mount(prefix, _TimedHTTPAdapter(sink))
+    setattr(session, _INSTRUMENTED, True)
+    return session
+
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+@dataclass
+class Histogram:
+    """固定桶的延迟直方图，buckets 为升序的桶上界（秒），超出最后一个上界的值计入溢出桶。
+
+    observe() 记录一个值，quantile() 返回分位数所在桶的上界（不超过最大值），
+    summary() 返回次数、均值、p50/p90/p99 与最大值。本身不加锁，并发写入时由调用方加锁。
+    """
+
+    buckets: Sequence[float]
+    counts: list = field(default_factory=list)
+    count: int = 0
+    sum: float = 0.0
+    max: float = 0.0
+
+    def __post_init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        lo, hi = 0, len(self.buckets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if value <= self.buckets[mid]:
+                hi = mid
+            else:
+                lo = mid + 1
+        self.counts[lo] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        # 返回所在桶的上界，最后一个桶以最大值代替
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return (
+                    min(self.buckets[i], self.max)
+                    if i < len(self.buckets)
+                    else self.max
+                )
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class HistogramSink(HttpTimingSink):
+    """按 action 聚合的内存直方图，线程安全"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._stats: Dict[str, dict] = {}
+
+    def record(self, timing: HttpTiming) -> None:
+        with self._lock:
+            stats = self._stats.get(timing.action)
+            if stats is None:
+                stats = self._stats[timing.action] = {
+                    "histograms": {},
+                    "status": {},
+                    "bytes_sent": 0,
+                    "bytes_received": 0,
+                }
+            for metric in TIMING_METRICS:
+                value = getattr(timing, metric)
+                if value is None:
+                    continue
+                hist = stats["histograms"].get(metric)
+                if hist is None:
+                    hist = stats["histograms"][metric] = Histogram(self.buckets)
+                hist.observe(value)
+            stats["status"][timing.status_code] = (
+                stats["status"].get(timing.status_code, 0) + 1
+            )
+            stats["bytes_sent"] += timing.bytes_sent or 0
+            stats["bytes_received"] += timing.bytes_received
+
+    def snapshot(self) -> Dict[str, dict]:
+        """返回 {action: {metric: 统计, "status": {...}, "bytes_sent": n, "bytes_received": n}}"""
+        with self._lock:
+            result = {}
+            for action, stats in self._stats.items():
+                item = {m: h.summary() for m, h in stats["histograms"].items()}
+                item["status"] = dict(stats["status"])
+                item["bytes_sent"] = stats["bytes_sent"]
+                item["bytes_received"] = stats["bytes_received"]
+                result[action] = item
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+class OpenTelemetrySink(HttpTimingSink):
+    """将耗时写入 OpenTelemetry 指标，需要安装 opentelemetry-api。
+
+    app_key 属于凭证，默认不作为指标属性上报。
+    """
+
+    def __init__(
+        self,
+        meter=None,
+        prefix: str = "hiagent.http.client",
+        include_app_key: bool = False,
+    ):
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError:
+                raise ImportError(
+                    "OpenTelemetrySink requires opentelemetry-api, "
+                    "install it with `pip install opentelemetry-api`"
+                )
+            meter = metrics.get_meter("hiagent_api")
+        self.include_app_key = include_app_key
+        self._histograms = {
+            metric: meter.create_histogram(
+                f"{prefix}.{metric}", unit="s", description=f"HTTP {metric} time"
+            )
+            for metric in TIMING_METRICS
+        }
+        self._bytes_sent = meter.create_counter(f"{prefix}.bytes_sent", unit="By")
+        self._bytes_received = meter.create_counter(
+            f"{prefix}.bytes_received", unit="By"
+        )
+
+    def record(self, timing: HttpTiming) -> None:
+        attributes = {
+            "hiagent.action": timing.action,
+            "http.request.method": timing.method,
+            "server.address": urlparse(timing.url).hostname or "",
+        }
+        if timing.status_code is not None:
+            attributes["http.response.status_code"] = timing.status_code
+        if self.include_app_key and timing.app_key:
+            attributes["hiagent.app_key"] = timing.app_key
+        for metric, hist in self._histograms.items():
+            value = getattr(timing, metric)
+            if value is not None:
+                hist.record(value, attributes)
+        if timing.bytes_sent:
+            self._bytes_sent.add(timing.bytes_sent, attributes)
+        if timing.bytes_received:
+            self._bytes_received.add(timing.bytes_received, attributes)
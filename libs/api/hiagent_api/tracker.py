@@ -0,0 +1,350 @@
+# coding: utf-8
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""异步任务跟踪。
+
+TaskTracker 为已提交的工作流运行和技能异步任务返回 concurrent.futures.Future，
+由单个调度线程统一轮询：每个任务的轮询间隔从 min_interval 起按 backoff 递增至
+max_interval，所有任务的状态查询合计不超过 max_polls_per_second。
+同一会话下的技能任务合并为一次 query_skill_async_task 查询。
+协程中可使用 asyncio.wrap_future 等待返回的 Future。
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from hiagent_api.chat import ChatService
+from hiagent_api.chat_types import (
+    AppSkillAsyncTaskInfo,
+    BaseError,
+    QueryAppSkillAsyncTaskRequest,
+    QueryRunAppProcessRequest,
+    QueryRunAppProcessResponse,
+    RunAppWorkflowRequest,
+)
+from hiagent_api.workflow import WorkflowService
+from hiagent_api.workflow_types import (
+    QueryWorkflowStatusRequest,
+    RunWorkflowRequest,
+    RunWorkflowResponse,
+)
+
+WORKFLOW_TERMINAL_STATUSES = frozenset({"success", "failed", "interrupted", "stopped"})
+SKILL_TASK_TERMINAL_STATUSES = frozenset({"SUCCEED", "FAILED", "INVALID"})
+
+
+def _check_error(result, action: str):
+    if isinstance(result, BaseError):
+        raise Exception(f"{action} failed: {result.model_dump_json()}")
+    return result
+
+
+def _resolve(future: Future, result) -> None:
+    try:
+        future.set_result(result)
+    except InvalidStateError:
+        # 已被调用方取消
+        pass
+
+
+class _Tracked(ABC):
+    """一个被轮询的对象"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.errors = 0
+
+    @abstractmethod
+    def futures(self) -> List[Future]:
+        pass
+
+    @abstractmethod
+    def poll(self) -> None:
+        pass
+
+    def finished(self) -> bool:
+        return all(f.done() for f in self.futures())
+
+    def fail(self, error: BaseException) -> None:
+        for future in self.futures():
+            try:
+                future.set_exception(error)
+            except InvalidStateError:
+                pass
+
+    def cancel(self) -> None:
+        for future in self.futures():
+            future.cancel()
+
+
+class _Run(_Tracked):
+    def __init__(self, interval: float, query: Callable, future: Future):
+        super().__init__(interval)
+        self.query = query
+        self.future = future
+
+    def futures(self) -> List[Future]:
+        return [self.future]
+
+    def poll(self) -> None:
+        resp = self.query()
+        if resp.status in WORKFLOW_TERMINAL_STATUSES:
+            _resolve(self.future, resp)
+
+
+class _SkillTasks(_Tracked):
+    """同一会话下的技能任务，一次查询所有未结束的任务"""
+
+    def __init__(
+        self,
+        interval: float,
+        svc: ChatService,
+        app_key: str,
+        user_id: str,
+        app_conversation_id: str,
+    ):
+        super().__init__(interval)
+        self.svc = svc
+        self.app_key = app_key
+        self.user_id = user_id
+        self.app_conversation_id = app_conversation_id
+        self.by_task: Dict[str, Future] = {}
+
+    def add(self, task_ids: Sequence[str]) -> Dict[str, Future]:
+        for task_id in task_ids:
+            if task_id not in self.by_task:
+                self.by_task[task_id] = Future()
+        return {task_id: self.by_task[task_id] for task_id in task_ids}
+
+    def futures(self) -> List[Future]:
+        return list(self.by_task.values())
+
+    def poll(self) -> None:
+        pending = [k for k, f in list(self.by_task.items()) if not f.done()]
+        if not pending:
+            return
+        resp = _check_error(
+            self.svc.query_skill_async_task(
+                self.app_key,
+                QueryAppSkillAsyncTaskRequest(
+                    app_key=self.app_key,
+                    user_id=self.user_id,
+                    app_conversation_id=self.app_conversation_id,
+                    task_ids=pending,
+                ),
+            ),
+            "query_skill_async_task",
+        )
+        for info in resp.infos:
+            future = self.by_task.get(info.task_id)
+            if future is not None and info.status in SKILL_TASK_TERMINAL_STATUSES:
+                _resolve(future, info)
+
+
+class TaskTracker:
+    """统一轮询异步任务的调度器，线程安全。
+
+    Args:
+        max_polls_per_second: 所有任务合计的查询速率上限
+        min_interval: 每个任务首次查询前的等待秒数
+        max_interval: 每个任务的最大轮询间隔
+        backoff: 每次查询未结束后间隔的放大倍数
+        max_concurrent_polls: 同时进行的查询请求数
+        max_consecutive_errors: 查询连续失败该次数后，以最后一次异常结束对应 Future
+    """
+
+    def __init__(
+        self,
+        max_polls_per_second: float = 20.0,
+        min_interval: float = 0.2,
+        max_interval: float = 5.0,
+        backoff: float = 1.5,
+        max_concurrent_polls: int = 8,
+        max_consecutive_errors: int = 3,
+    ):
+        if max_polls_per_second <= 0:
+            raise ValueError("max_polls_per_second must be positive")
+        self.min_spacing = 1.0 / max_polls_per_second
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_consecutive_errors = max_consecutive_errors
+        self.polls = 0
+        self._executor = ThreadPoolExecutor(
+            max_concurrent_polls, thread_name_prefix="hiagent-tracker"
+        )
+        self._slots = threading.Semaphore(max_concurrent_polls)
+        self._heap: List[Tuple[float, int, _Tracked]] = []
+        self._seq = itertools.count()
+        self._skill_groups: Dict[Tuple[int, str, str, str], _SkillTasks] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="hiagent-tracker-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "TaskTracker":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _schedule(self, tracked: _Tracked, delay: float) -> None:
+        with self._cond:
+            if self._closed:
+                raise Exception("task tracker is closed")
+            heapq.heappush(
+                self._heap, (time.monotonic() + delay, next(self._seq), tracked)
+            )
+            self._cond.notify()
+
+    def _run(self) -> None:
+        last_poll = 0.0
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    if self._heap:
+                        due = max(self._heap[0][0], last_poll + self.min_spacing)
+                        if due <= now:
+                            _, _, tracked = heapq.heappop(self._heap)
+                            break
+                        self._cond.wait(due - now)
+                    else:
+                        self._cond.wait()
+                if tracked.finished():
+                    # 所有 Future 均已被取消
+                    self._forget(tracked)
+                    continue
+            self._slots.acquire()
+            last_poll = time.monotonic()
+            self.polls += 1
+            self._executor.submit(self._poll, tracked)
+
+    def _poll(self, tracked: _Tracked) -> None:
+        try:
+            tracked.poll()
+            tracked.errors = 0
+        except Exception as e:
+            tracked.errors += 1
+            if tracked.errors >= self.max_consecutive_errors:
+                tracked.fail(e)
+        finally:
+            self._slots.release()
+        with self._cond:
+            if self._closed:
+                tracked.cancel()
+            elif tracked.finished():
+                self._forget(tracked)
+            else:
+                tracked.interval = min(
+                    tracked.interval * self.backoff, self.max_interval
+                )
+                self._schedule(tracked, tracked.interval)
+
+    def _forget(self, tracked: _Tracked) -> None:
+        if isinstance(tracked, _SkillTasks):
+            key = (
+                id(tracked.svc),
+                tracked.app_key,
+                tracked.user_id,
+                tracked.app_conversation_id,
+            )
+            if self._skill_groups.get(key) is tracked:
+                del self._skill_groups[key]
+
+    def track(self, query: Callable[[], object]) -> Future:
+        """跟踪任意运行，query 返回带 status 字段的响应，status 为终态时 Future 以该响应完成"""
+        future: Future = Future()
+        self._schedule(_Run(self.min_interval, query, future), self.min_interval)
+        return future
+
+    def track_workflow_run(
+        self, svc: WorkflowService, app_key: str, user_id: str, run_id: str
+    ) -> "Future[RunWorkflowResponse]":
+        req = QueryWorkflowStatusRequest(
+            app_key=app_key, user_id=user_id, run_id=run_id
+        )
+        return self.track(lambda: svc.query_workflow_status(app_key, req))
+
+    def submit_workflow(
+        self, svc: WorkflowService, app_key: str, req: RunWorkflowRequest
+    ) -> "Future[RunWorkflowResponse]":
+        """调用 run_workflow_async 提交运行并跟踪其状态"""
+        resp = svc.run_workflow_async(app_key, req)
+        return self.track_workflow_run(svc, app_key, req.user_id, resp.run_id)
+
+    def track_app_workflow_run(
+        self, svc: ChatService, app_key: str, user_id: str, run_id: str
+    ) -> "Future[QueryRunAppProcessResponse]":
+        req = QueryRunAppProcessRequest(app_key=app_key, user_id=user_id, run_id=run_id)
+        return self.track(
+            lambda: _check_error(
+                svc.query_run_app_process(app_key, req), "query_run_app_process"
+            )
+        )
+
+    def submit_app_workflow(
+        self, svc: ChatService, app_key: str, req: RunAppWorkflowRequest
+    ) -> "Future[QueryRunAppProcessResponse]":
+        """调用 run_app_workflow 提交运行并跟踪其状态"""
+        resp = _check_error(svc.run_app_workflow(app_key, req), "run_app_workflow")
+        return self.track_app_workflow_run(svc, app_key, req.user_id, resp.run_id)
+
+    def track_skill_tasks(
+        self,
+        svc: ChatService,
+        app_key: str,
+        user_id: str,
+        app_conversation_id: str,
+        task_ids: Sequence[str],
+    ) -> "Dict[str, Future[AppSkillAsyncTaskInfo]]":
+        """跟踪技能异步任务，返回 {task_id: Future}，同一会话的任务合并查询"""
+        key = (id(svc), app_key, user_id, app_conversation_id)
+        with self._cond:
+            group = self._skill_groups.get(key)
+            if group is not None:
+                return group.add(task_ids)
+            group = _SkillTasks(
+                self.min_interval, svc, app_key, user_id, app_conversation_id
+            )
+            futures = group.add(task_ids)
+            self._schedule(group, self.min_interval)
+            self._skill_groups[key] = group
+        return futures
+
+    def close(self) -> None:
+        """停止调度线程并取消尚未完成的 Future"""
+        with self._cond:
+            self._closed = True
+            heap, self._heap = self._heap, []
+            self._skill_groups.clear()
+            self._cond.notify_all()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        for _, _, tracked in heap:
+            tracked.cancel()
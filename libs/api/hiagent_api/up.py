@@ -13,9 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import json
-from typing import BinaryIO
+import os
+from typing import AsyncIterable, BinaryIO, Optional, Union
 from urllib.parse import urlparse
 
+import aiofiles
+import httpx
 from volcengine.ApiInfo import ApiInfo
 from volcengine.auth.SignerV4 import SignerV4
 from volcengine.base.Service import Service
@@ -23,13 +26,32 @@ from volcengine.Credentials import Credentials
 from volcengine.ServiceInfo import ServiceInfo
 
 from hiagent_api import up_types
+from hiagent_api.base import FILE_CHUNK_SIZE, aiter_file
+from hiagent_api.instrumentation import instrument_client, instrument_session
 
 
 class UpService(Service):
-    def __init__(self, endpoint="https://open.volcengineapi.com", region="cn-north-1"):
+    def __init__(
+        self,
+        endpoint="https://open.volcengineapi.com",
+        region="cn-north-1",
+        async_http_client: Optional[httpx.AsyncClient] = None,
+    ):
         self.service_info = UpService.get_service_info(endpoint, region)
         self.api_info = UpService.get_api_info()
         super(UpService, self).__init__(self.service_info, self.api_info)
+        if async_http_client:
+            self.async_http_client = async_http_client
+        else:
+            self.async_http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    timeout=self.service_info.socket_timeout,
+                    connect=self.service_info.connection_timeout,
+                    read=self.service_info.socket_timeout,
+                )
+            )
+        instrument_client(self.async_http_client)
+        instrument_session(self.session)
 
     @staticmethod
     def get_service_info(endpoint, region):
@@ -101,23 +123,11 @@ class UpService(Service):
                     示例值: 1024
 
         """
-        api = "UploadRaw"
-        if api not in self.api_info:
-            raise Exception("no such api")
-        api_info = self.api_info[api]
-        r = self.prepare_request(api_info, params.model_dump())
-        if params.ContentType != "":
-            r.headers["Content-Type"] = params.ContentType
-        else:
-            r.headers["Content-Type"] = "application/octet-stream"
-        r.headers["X-Content-Sha256"] = params.Sha256
-        SignerV4.sign_url(r, self.service_info.credentials)
-
-        url = r.build()
+        url, headers = self._prepare_upload_raw(params)
 
         resp = self.session.post(
             url,
-            headers=r.headers,
+            headers=headers,
             data=file,
             timeout=(
                 self.service_info.connection_timeout,
@@ -132,6 +142,43 @@ class UpService(Service):
         else:
             raise Exception(resp.text)
 
+    async def aupload_raw(
+        self,
+        params: up_types.UploadRawRequest,
+        file: Union[str, os.PathLike, AsyncIterable[bytes]],
+        size: Optional[int] = None,
+        chunk_size: int = FILE_CHUNK_SIZE,
+    ) -> up_types.UploadRawResponse:
+        """不分片的上传接口，文件内容按块流式发送
+
+        Args:
+            params: UploadRawRequest
+            file: 文件路径，或按块产出文件内容的异步迭代器
+            size: 文件大小，单位为字节。传入文件路径时自动获取
+            chunk_size: 读取文件时每块的大小
+
+        Returns:
+            UploadRawResponse
+        """
+        url, headers = self._prepare_upload_raw(params)
+        if isinstance(file, (str, os.PathLike)):
+            if size is None:
+                size = os.path.getsize(file)
+            content = aiter_file(file, chunk_size)
+        else:
+            content = file
+        if size is not None:
+            headers["Content-Length"] = str(size)
+
+        resp = await self.async_http_client.post(url, headers=headers, content=content)
+        if resp.status_code == 200:
+            res_json = resp.json()
+            if "Result" not in res_json.keys():
+                raise Exception(f"no Result in response: {resp.text}")
+            return up_types.UploadRawResponse.model_validate(res_json["Result"])
+        else:
+            raise Exception(resp.text)
+
     def LongLive(self, params: up_types.LongLiveRequest) -> up_types.LongLiveResponse:
         """将某个文件转换成长效存储的文件。
 
@@ -157,6 +204,14 @@ class UpService(Service):
             self.__request("LongLive", params.model_dump())
         )
 
+    async def along_live(
+        self, params: up_types.LongLiveRequest
+    ) -> up_types.LongLiveResponse:
+        """将某个文件转换成长效存储的文件，参数同 LongLive"""
+        return up_types.LongLiveResponse.model_validate(
+            await self.__arequest("LongLive", params.model_dump())
+        )
+
     def DownloadKey(
         self, params: up_types.DownloadKeyRequest
     ) -> up_types.DownloadKeyResponse:
@@ -184,6 +239,28 @@ class UpService(Service):
             Exception(f"no Result in response: {res}")
         return up_types.DownloadKeyResponse.model_validate(res_json["Result"])
 
+    async def adownload_key(
+        self, params: up_types.DownloadKeyRequest
+    ) -> up_types.DownloadKeyResponse:
+        """获取文件下载时可用的 key，参数同 DownloadKey"""
+        api = "DownloadKey"
+        if api not in self.api_info:
+            raise Exception("no such api")
+        api_info = self.api_info[api]
+
+        r = self.prepare_request(api_info, params.model_dump())
+        SignerV4.sign(r, self.service_info.credentials)
+
+        resp = await self.async_http_client.get(r.build(), headers=r.headers)
+        if resp.status_code != 200:
+            raise Exception(resp.text)
+        if resp.text == "":
+            raise Exception("empty response")
+        res_json = resp.json()
+        if "Result" not in res_json.keys():
+            raise Exception(f"no Result in response: {resp.text}")
+        return up_types.DownloadKeyResponse.model_validate(res_json["Result"])
+
     def Download(self, params: up_types.DownloadRequest) -> up_types.DownloadResponse:
         """下载某个文件
 
@@ -227,6 +304,39 @@ class UpService(Service):
         else:
             raise Exception(resp.text)
 
+    async def adownload(
+        self,
+        params: up_types.DownloadRequest,
+        chunk_size: int = FILE_CHUNK_SIZE,
+    ) -> up_types.DownloadResponse:
+        """下载某个文件，响应内容按块写入 SaveTo，不会在内存中缓存整个文件
+
+        Args:
+            params: DownloadRequest
+            chunk_size: 写入文件时每块的大小
+
+        Returns:
+            DownloadResponse
+        """
+        api = "Download"
+        if api not in self.api_info:
+            raise Exception("no such api")
+        api_info = self.api_info[api]
+
+        r = self.prepare_request(api_info, params.model_dump(), 0)
+        SignerV4.sign(r, self.service_info.credentials)
+
+        async with self.async_http_client.stream(
+            "GET", r.build(0), headers=r.headers
+        ) as resp:
+            if resp.status_code != 200:
+                await resp.aread()
+                raise Exception(resp.text)
+            async with aiofiles.open(params.SaveTo, "wb") as f:
+                async for chunk in resp.aiter_bytes(chunk_size):
+                    await f.write(chunk)
+        return up_types.DownloadResponse()
+
     def Delete(self, params: up_types.DeleteRequest) -> up_types.DeleteResponse:
         """删除某个文件
 
@@ -243,6 +353,48 @@ class UpService(Service):
         """
         return self.__request("Delete", params.model_dump())
 
+    async def adelete(self, params: up_types.DeleteRequest) -> up_types.DeleteResponse:
+        """删除某个文件，参数同 Delete"""
+        return await self.__arequest("Delete", params.model_dump())
+
+    def _prepare_upload_raw(
+        self, params: up_types.UploadRawRequest
+    ) -> tuple[str, dict]:
+        api = "UploadRaw"
+        if api not in self.api_info:
+            raise Exception("no such api")
+        api_info = self.api_info[api]
+        r = self.prepare_request(api_info, params.model_dump())
+        if params.ContentType != "":
+            r.headers["Content-Type"] = params.ContentType
+        else:
+            r.headers["Content-Type"] = "application/octet-stream"
+        r.headers["X-Content-Sha256"] = params.Sha256
+        SignerV4.sign_url(r, self.service_info.credentials)
+
+        return r.build(), r.headers
+
+    async def __arequest(self, action, params):
+        if action not in self.api_info:
+            raise Exception("no such api")
+        api_info = self.api_info[action]
+        r = self.prepare_request(api_info, dict())
+        r.headers["Content-Type"] = "application/json"
+        r.body = json.dumps(params)
+        SignerV4.sign(r, self.service_info.credentials)
+
+        resp = await self.async_http_client.post(
+            r.build(), headers=r.headers, content=r.body
+        )
+        if resp.status_code != 200:
+            raise Exception(resp.text)
+        if resp.text == "":
+            raise Exception("empty response")
+        res_json = resp.json()
+        if "Result" not in res_json.keys():
+            return res_json
+        return res_json["Result"]
+
     def __request(self, action, params):
         res = self.json(action, dict(), json.dumps(params))
         if res == "":
@@ -11,6 +11,8 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
+from typing import AsyncGenerator, Generator
 from urllib.parse import urlparse
 
 from volcengine.ApiInfo import ApiInfo
@@ -19,6 +21,8 @@ from volcengine.ServiceInfo import ServiceInfo
 
 from hiagent_api import workflow_types
 from hiagent_api.base import AppAPIMixin, Service
+from hiagent_api.chat import parse_workflow_event
+from hiagent_api.chat_types import WorkflowEvent
 
 
 class WorkflowService(Service, AppAPIMixin):
@@ -122,6 +126,40 @@ class WorkflowService(Service, AppAPIMixin):
             res, by_alias=True
         )
 
+    def run_workflow_streaming(
+        self, app_key: str, params: workflow_types.RunWorkflowRequest
+    ) -> Generator[WorkflowEvent, None, None]:
+        """流式运行 workflow，节点产生输出时即返回事件
+        Args:
+            app_key: app key
+            params: RunWorkflowRequest
+        Returns:
+            WorkflowEvent 生成器
+        """
+        body = params.model_dump(by_alias=True)
+        body["IsStream"] = True
+        for event in self._sse_post(app_key, "sync_run_app_workflow", body):
+            workflow_event = parse_workflow_event(json.loads(event.data))
+            if workflow_event:
+                yield workflow_event
+
+    async def arun_workflow_streaming(
+        self, app_key: str, params: workflow_types.RunWorkflowRequest
+    ) -> AsyncGenerator[WorkflowEvent, None]:
+        """流式运行 workflow，节点产生输出时即返回事件
+        Args:
+            app_key: app key
+            params: RunWorkflowRequest
+        Returns:
+            WorkflowEvent 异步生成器
+        """
+        body = params.model_dump(by_alias=True)
+        body["IsStream"] = True
+        async for event in self._asse_post(app_key, "sync_run_app_workflow", body):
+            workflow_event = parse_workflow_event(json.loads(event.data))
+            if workflow_event:
+                yield workflow_event
+
     def run_workflow_async(
         self, app_key: str, params: workflow_types.RunWorkflowRequest
     ) -> workflow_types.AsyncRunWorkflowResponse:
@@ -0,0 +1,226 @@
+# coding: utf-8
+"""Native async request paths of hiagent_api.base.Service against a local server."""
+
+import asyncio
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from volcengine.ApiInfo import ApiInfo
+from volcengine.Credentials import Credentials
+from volcengine.ServiceInfo import ServiceInfo
+
+from hiagent_api.base import Service
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = b""
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return body
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _handle(self):
+        body = self._read_body()
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        self.server.seen.append(
+            {
+                "method": self.command,
+                "action": query.get("Action"),
+                "headers": dict(self.headers),
+                "body": body,
+            }
+        )
+        action = query.get("Action")
+        if action == "Fail":
+            self._reply(400, b"bad request")
+        elif action == "Stream":
+            payload = (
+                b'event: content\ndata: {"text":"a"}\n\n'
+                b'event: done\ndata: {"text":"b"}\n\n'
+            )
+            self._reply(200, payload, "text/event-stream")
+        elif action is None:
+            self._reply(200, b"stored", headers={"X-Tt-Logid": "log-1"})
+        else:
+            result = {"Result": {"method": self.command, "size": len(body)}}
+            self._reply(200, json.dumps(result).encode())
+
+    def _reply(self, status, payload, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = _handle
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.seen = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def svc(server, monkeypatch, tmp_path):
+    monkeypatch.delenv("VOLC_ACCESSKEY", raising=False)
+    monkeypatch.delenv("VOLC_SECRETKEY", raising=False)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    server.seen.clear()
+    host, port = server.server_address
+    service_info = ServiceInfo(
+        f"{host}:{port}",
+        {"Accept": "application/json"},
+        Credentials("ak", "sk", "app", "cn-north-1"),
+        connection_timeout=5,
+        socket_timeout=5,
+        scheme="http",
+    )
+
+    def api(method, action):
+        return ApiInfo(method, "/", {"Action": action, "Version": "2023-08-01"}, {}, {})
+
+    api_info = {
+        "Echo": api("POST", "Echo"),
+        "EchoGet": api("GET", "Echo"),
+        "Stream": api("POST", "Stream"),
+        "Fail": api("POST", "Fail"),
+    }
+    return Service(service_info, api_info)
+
+
+def _url(server, path="/upload"):
+    host, port = server.server_address
+    return f"http://{host}:{port}{path}"
+
+
+def test_arequest_is_awaited_and_signed(svc, server):
+    res = asyncio.run(svc.arequest("Echo", {}, b'{"a": 1}'))
+
+    assert json.loads(res)["Result"] == {"method": "POST", "size": 8}
+    seen = server.seen[0]
+    assert seen["headers"]["Authorization"].startswith("HMAC-SHA256")
+    assert (
+        seen["headers"]["X-Content-Sha256"] == hashlib.sha256(b'{"a": 1}').hexdigest()
+    )
+
+
+def test_request_sync_parity(svc, server):
+    res = svc.request("Echo", {}, b"abc")
+    assert json.loads(res)["Result"]["size"] == 3
+    assert (
+        server.seen[0]["headers"]["X-Content-Sha256"]
+        == hashlib.sha256(b"abc").hexdigest()
+    )
+
+
+def test_arequest_signs_streaming_body(svc, server):
+    async def body():
+        yield b"ab"
+        yield b"cd"
+
+    res = asyncio.run(svc.arequest("Echo", {}, body()))
+
+    assert json.loads(res)["Result"]["size"] == 4
+    assert (
+        server.seen[0]["headers"]["X-Content-Sha256"]
+        == hashlib.sha256(b"abcd").hexdigest()
+    )
+
+
+def test_arequest_raises_on_error(svc):
+    with pytest.raises(Exception, match="bad request"):
+        asyncio.run(svc.arequest("Fail", {}, b""))
+
+
+def test_aput_streams_file(svc, server, tmp_path):
+    src = tmp_path / "f.bin"
+    src.write_bytes(b"z" * 200_000)
+    headers = {"X-Custom": "1"}
+
+    ok, text = asyncio.run(svc.aput(_url(server), str(src), headers))
+
+    assert (ok, text) == (True, b"stored")
+    assert headers["X-Tt-Logid"] == "log-1"
+    seen = server.seen[0]
+    assert seen["method"] == "PUT"
+    assert seen["body"] == src.read_bytes()
+    assert seen["headers"]["Content-Length"] == "200000"
+    assert seen["headers"]["X-Custom"] == "1"
+
+
+def test_aput_data_bytes_and_async_iterator(svc, server):
+    async def body():
+        for _ in range(3):
+            yield b"xyz"
+
+    async def run():
+        first = await svc.aput_data(_url(server), b"raw", {})
+        second = await svc.aput_data(_url(server), body(), {})
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == (True, b"stored")
+    assert second == (True, b"stored")
+    assert server.seen[0]["body"] == b"raw"
+    assert server.seen[1]["body"] == b"xyzxyzxyz"
+
+
+def test_ajson_and_internal_arequest(svc, server):
+    async def run():
+        raw = await svc.ajson("Echo", {}, json.dumps({"k": "v"}))
+        result = await svc._arequest("Echo", {"k": "v"})
+        got = await svc.aget("EchoGet", {})
+        return raw, result, got
+
+    raw, result, got = asyncio.run(run())
+
+    assert json.loads(raw)["Result"]["method"] == "POST"
+    assert result == {"method": "POST", "size": len(json.dumps({"k": "v"}))}
+    assert json.loads(got)["Result"]["method"] == "GET"
+    assert server.seen[0]["headers"]["Content-Type"] == "application/json"
+    assert "Authorization" in server.seen[0]["headers"]
+
+
+def test_ajson_sse_streams_events(svc):
+    async def run():
+        return [
+            (e.event, e.json())
+            async for e in svc.ajson_sse("Stream", {}, json.dumps({}))
+        ]
+
+    events = asyncio.run(run())
+    assert events == [("content", {"text": "a"}), ("done", {"text": "b"})]
+    assert [e.event for e in svc.json_sse("Stream", {}, json.dumps({}))] == [
+        "content",
+        "done",
+    ]
+
+
+def test_ajson_sse_raises_on_error(svc):
+    async def run():
+        return [e async for e in svc.ajson_sse("Fail", {}, "{}")]
+
+    with pytest.raises(Exception, match="bad request"):
+        asyncio.run(run())
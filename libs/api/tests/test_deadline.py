@@ -0,0 +1,80 @@
+# coding: utf-8
+"""Call deadlines capping per-request httpx timeouts."""
+
+import contextvars
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from hiagent_api.chat import ChatService
+from hiagent_api.deadline import (
+    DeadlineExceededError,
+    cancel_scope,
+    check_deadline,
+    deadline,
+    remaining_time,
+    timeout_kwargs,
+)
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(2)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address
+    yield f"http://{host}:{port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_timeout_kwargs_caps_client_timeouts():
+    client = httpx.Client(timeout=httpx.Timeout(300, connect=5))
+    assert timeout_kwargs(client) == {}
+    with deadline(1):
+        t = timeout_kwargs(client)["timeout"]
+        assert t.connect <= 1 and t.read <= 1 and t.pool <= 1
+    with deadline(-1):
+        with pytest.raises(DeadlineExceededError):
+            timeout_kwargs(client)
+
+
+def test_cancel_scope_reaches_copied_contexts():
+    with cancel_scope() as cancel:
+        ctx = contextvars.copy_context()
+    assert remaining_time() is None
+    assert ctx.run(remaining_time) is None
+    cancel.set()
+    assert ctx.run(remaining_time) == 0
+    with pytest.raises(DeadlineExceededError):
+        ctx.run(check_deadline)
+    with pytest.raises(DeadlineExceededError):
+        ctx.run(timeout_kwargs, httpx.Client())
+    check_deadline()
+
+
+def test_app_call_does_not_outlive_deadline(base_url):
+    svc = ChatService(endpoint=base_url)
+    svc.set_app_base_url(base_url)
+
+    start = time.monotonic()
+    with deadline(0.3):
+        with pytest.raises(httpx.TimeoutException):
+            svc._post("k", "chat_query_v2", {})
+    assert time.monotonic() - start < 1.5
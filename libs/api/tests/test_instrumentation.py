@@ -0,0 +1,200 @@
+# coding: utf-8
+"""HTTP timing hooks of hiagent_api.instrumentation."""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+from volcengine.ApiInfo import ApiInfo
+from volcengine.Credentials import Credentials
+from volcengine.ServiceInfo import ServiceInfo
+
+from hiagent_api.base import Service
+from hiagent_api.chat import ChatService
+from hiagent_api.instrumentation import (
+    Histogram,
+    HistogramSink,
+    HttpTiming,
+    HttpTimingSink,
+    instrument_client,
+    instrument_session,
+    set_http_timing_sink,
+)
+from hiagent_api.up import UpService
+
+
+class _ListSink(HttpTimingSink):
+    def __init__(self):
+        self.timings = []
+
+    def record(self, timing: HttpTiming) -> None:
+        self.timings.append(timing)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.do_GET()
+
+    def do_GET(self):
+        payload = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    host, port = httpd.server_address
+    yield f"http://{host}:{port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _reset_sink():
+    yield
+    set_http_timing_sink(None)
+
+
+def test_disabled_by_default_records_nothing():
+    client = instrument_client(
+        httpx.Client(transport=httpx.MockTransport(lambda r: httpx.Response(200)))
+    )
+    resp = client.get("http://example.com/x")
+    assert resp.status_code == 200
+    assert "hiagent_timer" not in resp.request.extensions
+
+
+def test_app_api_call_records_phases(base_url):
+    sink = _ListSink()
+    set_http_timing_sink(sink)
+    svc = ChatService(endpoint=base_url)
+    svc.set_app_base_url(f"{base_url}/api/proxy/api/v1")
+
+    svc._post("app-key-1", "chat_query_v2", {"Query": "hi"})
+    svc._post("app-key-1", "chat_query_v2", {"Query": "again"})
+
+    first, second = sink.timings
+    assert first.action == "chat_query_v2"
+    assert first.app_key == "app-key-1"
+    assert first.method == "POST"
+    assert first.status_code == 200
+    assert first.bytes_sent == len(b'{"Query":"hi"}')
+    assert first.bytes_received == len(b'{"ok": true}')
+    assert first.connect is not None and first.tls is None
+    assert 0 <= first.pool_wait <= first.ttfb <= first.total
+    # the second call reuses the pooled connection
+    assert second.connect is None
+
+
+def test_async_client_and_histogram_sink(base_url):
+    sink = HistogramSink()
+    client = instrument_client(httpx.AsyncClient(), sink)
+    instrument_client(client, sink)
+
+    async def run():
+        async with client:
+            for _ in range(3):
+                await client.post(f"{base_url}/?Action=ListDatasets", content=b"{}")
+
+    asyncio.run(run())
+
+    stats = sink.snapshot()["ListDatasets"]
+    assert stats["total"]["count"] == 3
+    assert stats["ttfb"]["count"] == 3
+    assert stats["connect"]["count"] == 1
+    assert stats["status"] == {200: 3}
+    assert stats["bytes_sent"] == 6
+    assert stats["total"]["p50"] <= stats["total"]["max"]
+    sink.reset()
+    assert sink.snapshot() == {}
+
+
+def test_streamed_response_recorded_on_close():
+    sink = _ListSink()
+
+    def handler(request):
+        return httpx.Response(500, content=iter([b"ab", b"cde"]))
+
+    client = instrument_client(
+        httpx.Client(transport=httpx.MockTransport(handler)), sink
+    )
+    with client.stream("POST", "http://example.com/api/run_app_workflow") as resp:
+        assert sink.timings == []
+        assert b"".join(resp.iter_bytes()) == b"abcde"
+
+    (timing,) = sink.timings
+    assert timing.status_code == 500
+    assert timing.bytes_received == 5
+    assert timing.action == "run_app_workflow"
+
+
+def test_failing_sink_does_not_break_calls():
+    class _Broken(HttpTimingSink):
+        def record(self, timing):
+            raise RuntimeError("boom")
+
+    set_http_timing_sink(_Broken())
+    client = instrument_client(
+        httpx.Client(
+            transport=httpx.MockTransport(lambda r: httpx.Response(200, text="x"))
+        )
+    )
+    assert client.get("http://example.com/").text == "x"
+
+
+def test_histogram_quantiles():
+    hist = Histogram([0.1, 0.5, 1.0])
+    for value in (0.05, 0.2, 0.3, 0.7, 3.0):
+        hist.observe(value)
+    assert hist.counts == [1, 2, 1, 1]
+    assert hist.quantile(0.5) == 0.5
+    assert hist.quantile(0.99) == 3.0
+    assert hist.summary()["count"] == 5 and hist.summary()["max"] == 3.0
+
+
+def test_service_get_uses_instrumented_client(base_url):
+    sink = _ListSink()
+    set_http_timing_sink(sink)
+    host = base_url.split("://", 1)[1]
+    svc = Service(
+        ServiceInfo(host, {}, Credentials("ak", "sk", "svc", "region"), 5, 5, "http"),
+        {"Ping": ApiInfo("GET", "/", {"Action": "Ping", "Version": "1"}, {}, {})},
+    )
+    assert svc.get("Ping", {}) == '{"ok": true}'
+    (timing,) = sink.timings
+    assert timing.action == "Ping" and timing.method == "GET"
+    assert timing.connect is not None and timing.total is not None
+
+
+def test_requests_session_timing(base_url):
+    sink = _ListSink()
+    session = instrument_session(requests.Session(), sink)
+    instrument_session(session)
+    session.post(f"{base_url}/up?Action=UploadRaw", data=b"12345")
+    session.get(f"{base_url}/?Action=Download", stream=True).close()
+
+    upload, download = sink.timings
+    assert upload.action == "UploadRaw" and upload.status_code == 200
+    assert upload.bytes_sent == 5 and upload.bytes_received == len(b'{"ok": true}')
+    assert 0 <= upload.ttfb <= upload.total
+    assert download.ttfb is not None and download.total is None
+
+    up = UpService(endpoint=base_url)
+    assert isinstance(
+        up.session.get_adapter(base_url), type(session.get_adapter(base_url))
+    )
@@ -0,0 +1,122 @@
+# coding: utf-8
+"""TaskTracker multiplexed polling against in-memory services."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from hiagent_api.chat_types import (
+    AppSkillAsyncTaskInfo,
+    QueryAppSkillAsyncTaskResponse,
+    RunAppWorkflowResponse,
+)
+from hiagent_api.tracker import TaskTracker
+from hiagent_api.workflow_types import (
+    AsyncRunWorkflowResponse,
+    RunWorkflowRequest,
+    RunWorkflowResponse,
+)
+
+
+class _FakeWorkflowService:
+    """Each run reaches ``status`` after ``polls`` status queries."""
+
+    def __init__(self, polls=2, status="success"):
+        self.polls = polls
+        self.status = status
+        self.counts = {}
+        self.lock = threading.Lock()
+        self.next_id = 0
+
+    def run_workflow_async(self, app_key, req):
+        with self.lock:
+            self.next_id += 1
+            return AsyncRunWorkflowResponse(runId=f"run-{self.next_id}")
+
+    def query_workflow_status(self, app_key, req):
+        with self.lock:
+            n = self.counts[req.run_id] = self.counts.get(req.run_id, 0) + 1
+        status = self.status if n >= self.polls else "processing"
+        return RunWorkflowResponse(runId=req.run_id, status=status, output=req.run_id)
+
+
+class _FakeChatService:
+    def __init__(self):
+        self.queries = []
+        self.finished = set()
+
+    def run_app_workflow(self, app_key, req):
+        return RunAppWorkflowResponse(runId="app-run")
+
+    def query_skill_async_task(self, app_key, req):
+        self.queries.append(list(req.task_ids))
+        infos = [
+            AppSkillAsyncTaskInfo(
+                TaskID=t, Status="SUCCEED" if t in self.finished else "PROCESSING"
+            )
+            for t in req.task_ids
+        ]
+        return QueryAppSkillAsyncTaskResponse(Infos=infos)
+
+
+def _req():
+    return RunWorkflowRequest(app_key="app", input_data="{}", user_id="u")
+
+
+def test_workflow_runs_resolve_under_global_rate_cap():
+    svc = _FakeWorkflowService(polls=2)
+    with TaskTracker(
+        max_polls_per_second=100, min_interval=0.01, backoff=1.0
+    ) as tracker:
+        start = time.perf_counter()
+        futures = [tracker.submit_workflow(svc, "app", _req()) for _ in range(20)]
+        outputs = [f.result(timeout=5).output for f in futures]
+        elapsed = time.perf_counter() - start
+
+    assert outputs == [f"run-{i}" for i in range(1, 21)]
+    assert tracker.polls == 40
+    assert elapsed >= 39 / 100
+
+
+def test_terminal_failure_status_resolves_future():
+    svc = _FakeWorkflowService(polls=1, status="failed")
+    with TaskTracker(min_interval=0.01) as tracker:
+        future = tracker.submit_workflow(svc, "app", _req())
+        assert asyncio.run(_await(future)).status == "failed"
+
+
+async def _await(future):
+    return await asyncio.wrap_future(future)
+
+
+def test_skill_tasks_of_a_conversation_share_one_query():
+    chat = _FakeChatService()
+    with TaskTracker(min_interval=0.02, backoff=1.0) as tracker:
+        futures = tracker.track_skill_tasks(chat, "app", "u", "conv", ["a", "b"])
+        futures.update(tracker.track_skill_tasks(chat, "app", "u", "conv", ["c"]))
+        chat.finished.add("a")
+        assert futures["a"].result(timeout=5).task_id == "a"
+        chat.finished.update({"b", "c"})
+        assert futures["c"].result(timeout=5).status == "SUCCEED"
+        futures["b"].result(timeout=5)
+
+    assert sorted(chat.queries[0]) == ["a", "b", "c"]
+    assert all("a" not in q for q in chat.queries[1:])
+
+
+def test_repeated_errors_fail_the_future_and_close_cancels():
+    def broken():
+        raise ConnectionError("down")
+
+    tracker = TaskTracker(min_interval=0.01, backoff=1.0, max_consecutive_errors=2)
+    with pytest.raises(ConnectionError):
+        tracker.track(broken).result(timeout=5)
+
+    slow = _FakeWorkflowService(polls=10**6)
+    pending = tracker.submit_workflow(slow, "app", _req())
+    tracker.close()
+    with pytest.raises(CancelledError):
+        pending.result(timeout=5)
@@ -0,0 +1,134 @@
+# coding: utf-8
+"""Async UpService tests against an in-process httpx mock transport."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from hiagent_api import up_types
+from hiagent_api.base import aiter_file
+from hiagent_api.up import UpService
+
+
+def _svc(handler) -> UpService:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return UpService(
+        endpoint="http://up.example.com:80",
+        region="cn-north-1",
+        async_http_client=client,
+    )
+
+
+def test_aiter_file_yields_bounded_chunks(tmp_path):
+    src = tmp_path / "a.bin"
+    src.write_bytes(b"x" * 2500)
+
+    async def collect():
+        return [c async for c in aiter_file(src, chunk_size=1024)]
+
+    assert [len(c) for c in asyncio.run(collect())] == [1024, 1024, 452]
+
+
+def test_aupload_raw_streams_file(tmp_path):
+    payload = b"x" * (3 * 1024 + 7)
+    src = tmp_path / "a.bin"
+    src.write_bytes(payload)
+    seen = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen["body"] = await request.aread()
+        seen["headers"] = request.headers
+        seen["query"] = dict(request.url.params)
+        return httpx.Response(
+            200,
+            json={"Result": {"Path": "p/a.bin", "Sha256": "h", "Size": len(payload)}},
+        )
+
+    req = up_types.UploadRawRequest(Expire="15h", Id="id-1", ContentType="", Sha256="h")
+    resp = asyncio.run(_svc(handler).aupload_raw(req, src, chunk_size=1024))
+
+    assert resp.Path == "p/a.bin"
+    assert seen["body"] == payload
+    assert seen["headers"]["Content-Length"] == str(len(payload))
+    assert seen["headers"]["X-Content-Sha256"] == "h"
+    assert seen["query"]["Action"] == "UploadRaw"
+
+
+def test_aupload_raw_accepts_async_iterator():
+    async def body():
+        yield b"ab"
+        yield b"cd"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        content = await request.aread()
+        return httpx.Response(
+            200, json={"Result": {"Path": "p", "Sha256": "h", "Size": len(content)}}
+        )
+
+    req = up_types.UploadRawRequest(
+        Expire="15h", Id="id-1", ContentType="text/plain", Sha256="h"
+    )
+    resp = asyncio.run(_svc(handler).aupload_raw(req, body()))
+    assert resp.Size == 4
+
+
+def test_adownload_streams_to_disk(tmp_path):
+    chunks = [b"0123", b"4567", b"89"]
+
+    async def stream():
+        for c in chunks:
+            yield c
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        assert request.method == "GET"
+        assert request.url.params["Action"] == "Download"
+        return httpx.Response(200, content=stream())
+
+    out = tmp_path / "out.bin"
+    req = up_types.DownloadRequest(Key="k", Path="p", SaveTo=str(out))
+    asyncio.run(_svc(handler).adownload(req, chunk_size=4))
+    assert out.read_bytes() == b"".join(chunks)
+
+
+def test_adownload_raises_on_error(tmp_path):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(403, text="denied")
+
+    out = tmp_path / "out.bin"
+    req = up_types.DownloadRequest(Key="k", Path="p", SaveTo=str(out))
+    with pytest.raises(Exception, match="denied"):
+        asyncio.run(_svc(handler).adownload(req))
+    assert not out.exists()
+
+
+def test_along_live_adownload_key_adelete():
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        action = request.url.params["Action"]
+        calls.append((request.method, action, await request.aread()))
+        if action == "LongLive":
+            return httpx.Response(200, json={"Result": {"Path": "p2", "Size": 3}})
+        if action == "DownloadKey":
+            return httpx.Response(200, json={"Result": {"Key": "k"}})
+        return httpx.Response(200, json={"Result": {}})
+
+    svc = _svc(handler)
+
+    async def run():
+        live = await svc.along_live(up_types.LongLiveRequest(Path="p", Id="i"))
+        key = await svc.adownload_key(up_types.DownloadKeyRequest(Path="p2"))
+        await svc.adelete(up_types.DeleteRequest(Id="i", Sha256="h"))
+        return live, key
+
+    live, key = asyncio.run(run())
+    assert live.Path == "p2"
+    assert key.Key == "k"
+    assert [(m, a) for m, a, _ in calls] == [
+        ("POST", "LongLive"),
+        ("GET", "DownloadKey"),
+        ("POST", "Delete"),
+    ]
+    assert json.loads(calls[0][2]) == {"Path": "p", "Id": "i"}
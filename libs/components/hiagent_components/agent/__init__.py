@@ -11,6 +11,14 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from .base import Agent
+from .base import Agent, TextStreamResult
+from .conversation_pool import ConversationPool, ConversationPoolStats
+from .pool import AgentPool
 
-__all__ = ["Agent"]
+__all__ = [
+    "Agent",
+    "AgentPool",
+    "ConversationPool",
+    "ConversationPoolStats",
+    "TextStreamResult",
+]
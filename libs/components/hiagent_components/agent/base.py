@@ -11,9 +11,10 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import time
 from concurrent.futures import Executor
-from io import StringIO
-from typing import Any, AsyncIterator, Iterator, Optional
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, List, Optional, Union
 
 from hiagent_api.chat import ChatService
 from hiagent_api.chat_types import (
@@ -21,12 +22,90 @@ from hiagent_api.chat_types import (
     ChatRequest,
     CreateConversationRequest,
     GetAppConfigPreviewRequest,
-    MessageChatEvent,
     StreamingChatEventType,
-    ToolMessageChatEvent,
 )
 
+from hiagent_components.agent.conversation_pool import ConversationPool
 from hiagent_components.base.base import Executable
+from hiagent_components.base.callbacks import traced
+from hiagent_components.base.deadline import timeout_kwarg
+
+
+@dataclass
+class TextStreamResult:
+    text: str
+    # input_tokens, output_tokens and latency from the message_cost event
+    usage: Optional[dict] = None
+    time_to_first_token: Optional[float] = None
+    inter_chunk_latencies: List[float] = field(default_factory=list)
+
+    @property
+    def max_inter_chunk_latency(self) -> float:
+        return max(self.inter_chunk_latencies, default=0.0)
+
+    @property
+    def mean_inter_chunk_latency(self) -> float:
+        gaps = self.inter_chunk_latencies
+        return sum(gaps) / len(gaps) if gaps else 0.0
+
+
+_TEXT_EVENTS = (StreamingChatEventType.message, StreamingChatEventType.tool_message)
+_FAILED_EVENTS = {
+    StreamingChatEventType.message_failed: "error",
+    StreamingChatEventType.agent_error: "error_msg",
+}
+
+
+class _TextRecorder:
+    """Turns raw chat events into answer text; tool output ends with a blank line."""
+
+    def __init__(self, strict: bool = True):
+        self.strict = strict
+        self.start = time.perf_counter()
+        self.last: Optional[float] = None
+        self.first: Optional[float] = None
+        self.gaps: List[float] = []
+        self.parts: List[str] = []
+        self.usage: Optional[dict] = None
+
+    def feed(self, data: dict) -> Optional[str]:
+        event = data.get("event")
+        if event in _TEXT_EVENTS:
+            delta = data.get("answer") or ""
+        elif event == StreamingChatEventType.tool_message_output_end:
+            delta = "\n\n"
+        elif event == StreamingChatEventType.message_cost:
+            self.usage = {
+                k: data[k]
+                for k in ("input_tokens", "output_tokens", "latency")
+                if k in data
+            }
+            return None
+        elif self.strict and event in _FAILED_EVENTS:
+            raise Exception(f"agent {event}: {data.get(_FAILED_EVENTS[event], '')}")
+        else:
+            return None
+        if not delta:
+            return None
+        now = time.perf_counter()
+        if self.last is None:
+            self.first = now
+        else:
+            self.gaps.append(now - self.last)
+        self.last = now
+        self.parts.append(delta)
+        return delta
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def result(self) -> TextStreamResult:
+        return TextStreamResult(
+            text=self.text(),
+            usage=self.usage,
+            time_to_first_token=None if self.first is None else self.first - self.start,
+            inter_chunk_latencies=self.gaps,
+        )
 
 
 class Agent(Executable):
@@ -69,19 +148,27 @@ class Agent(Executable):
         conversation_id: Optional[str] = None,
         name: Optional[str] = None,
         description: Optional[str] = None,
+        conversation_pool: Optional[ConversationPool] = None,
     ) -> "Agent":
-        resp = svc.get_app(
-            app_key=app_key,
-            params=GetAppConfigPreviewRequest(
-                app_key=app_key,
-                user_id=user_id,
-            ),
-        )
+        """Create an agent on a new conversation.
+
+        The app is only fetched when ``name`` is not given, and with a
+        ``conversation_pool`` the conversation is checked out from the pool.
+        """
         if not name:
+            resp = svc.get_app(
+                app_key=app_key,
+                params=GetAppConfigPreviewRequest(
+                    app_key=app_key,
+                    user_id=user_id,
+                ),
+            )
             name = resp.name
         if not description:
             description = ""
 
+        if not conversation_id and conversation_pool is not None:
+            conversation_id = conversation_pool.checkout(app_key, user_id, variables)
         if not conversation_id:
             resp = svc.create_conversation(
                 app_key=app_key,
@@ -114,21 +201,31 @@ class Agent(Executable):
         conversation_id: Optional[str] = None,
         name: Optional[str] = None,
         description: Optional[str] = None,
+        conversation_pool: Optional[ConversationPool] = None,
     ) -> "Agent":
-        resp = await svc.aget_app(
-            app_key=app_key,
-            params=GetAppConfigPreviewRequest(
-                app_key=app_key,
-                user_id=user_id,
-            ),
-        )
+        """Create an agent on a new conversation.
+
+        The app is only fetched when ``name`` is not given, and with a
+        ``conversation_pool`` the conversation is checked out from the pool.
+        """
         if not name:
+            resp = await svc.aget_app(
+                app_key=app_key,
+                params=GetAppConfigPreviewRequest(
+                    app_key=app_key,
+                    user_id=user_id,
+                ),
+            )
             name = resp.name
         if not description:
             description = ""
 
+        if not conversation_id and conversation_pool is not None:
+            conversation_id = await conversation_pool.acheckout(
+                app_key, user_id, variables
+            )
         if not conversation_id:
-            resp = svc.create_conversation(
+            resp = await svc.acreate_conversation(
                 app_key=app_key,
                 conversation=CreateConversationRequest(
                     app_key=app_key,
@@ -149,112 +246,100 @@ class Agent(Executable):
 
         return agent
 
-    def invoke(
-        self,
-        input: dict,
-        **kwargs: Any,
-    ) -> str:
+    def _chat_request(self, input: dict) -> ChatRequest:
         query = input.get("query")
         if not query:
             raise ValueError("agent invoke input should contains 'query'")
-
-        resp_generator = self.svc.chat_streaming(
-            self.app_key,
-            ChatRequest(
-                app_key=self.app_key,
-                app_conversation_id=self.conversation_id,
-                query=query,
-                response_mode="streaming",
-                user_id=self.user_id,
-            ),
+        return ChatRequest(
+            app_key=self.app_key,
+            app_conversation_id=self.conversation_id,
+            query=query,
+            response_mode="streaming",
+            user_id=self.user_id,
         )
 
-        output = StringIO()
-        for event in resp_generator:
-            if event.event == StreamingChatEventType.tool_message:
-                assert isinstance(event, ToolMessageChatEvent)
-                output.write(event.answer)
-            elif event.event == StreamingChatEventType.message:
-                assert isinstance(event, MessageChatEvent)
-                output.write(event.answer)
-
-        return output.getvalue()
+    @traced
+    @timeout_kwarg
+    def invoke(
+        self,
+        input: dict,
+        **kwargs: Any,
+    ) -> str:
+        recorder = _TextRecorder(strict=False)
+        for data in self.svc.chat_streaming_raw(
+            self.app_key, self._chat_request(input)
+        ):
+            recorder.feed(data)
+        return recorder.text()
 
+    @traced
+    @timeout_kwarg
     async def ainvoke(
         self,
         input: dict,
         executor: Optional[Executor] = None,
         **kwargs: Any,
     ) -> str:
-        query = input.get("query")
-        if not query:
-            raise ValueError("agent invoke input should contains 'query'")
-
-        resp_generator = self.svc.achat_streaming(
-            self.app_key,
-            ChatRequest(
-                app_key=self.app_key,
-                app_conversation_id=self.conversation_id,
-                query=query,
-                response_mode="streaming",
-                user_id=self.user_id,
-            ),
-        )
-
-        output = StringIO()
-        async for event in resp_generator:
-            if event.event == StreamingChatEventType.tool_message:
-                assert isinstance(event, ToolMessageChatEvent)
-                output.write(event.answer)
-            elif event.event == StreamingChatEventType.tool_message_output_end:
-                output.write("\n\n")
-            elif event.event == StreamingChatEventType.message:
-                assert isinstance(event, MessageChatEvent)
-                output.write(event.answer)
-
-        return output.getvalue()
+        recorder = _TextRecorder(strict=False)
+        async for data in self.svc.achat_streaming_raw(
+            self.app_key, self._chat_request(input)
+        ):
+            recorder.feed(data)
+        return recorder.text()
 
+    @traced
     def stream(
         self,
         input: dict,
         **kwargs: Optional[Any],
     ) -> Iterator[ChatEvent]:
-        query = input.get("query")
-        if not query:
-            raise ValueError("agent invoke input should contains 'query'")
-
-        resp_generator = self.svc.chat_streaming(
-            self.app_key,
-            ChatRequest(
-                app_key=self.app_key,
-                app_conversation_id=self.conversation_id,
-                query=query,
-                response_mode="streaming",
-                user_id=self.user_id,
-            ),
-        )
-
-        return resp_generator
+        return self.svc.chat_streaming(self.app_key, self._chat_request(input))
 
+    @traced
     async def astream(
         self,
         input: dict,
         **kwargs: Optional[Any],
     ) -> AsyncIterator[ChatEvent]:
-        query = input.get("query")
-        if not query:
-            raise ValueError("agent invoke input should contains 'query'")
+        async for event in self.svc.achat_streaming(
+            self.app_key, self._chat_request(input)
+        ):
+            yield event
 
-        resp_generator = self.svc.achat_streaming(
-            self.app_key,
-            ChatRequest(
-                app_key=self.app_key,
-                app_conversation_id=self.conversation_id,
-                query=query,
-                response_mode="streaming",
-                user_id=self.user_id,
-            ),
-        )
+    @traced
+    def stream_text(
+        self,
+        input: dict,
+        include_result: bool = False,
+        **kwargs: Any,
+    ) -> Iterator[Union[str, TextStreamResult]]:
+        """Yield only the answer text as it arrives.
 
-        async for event in resp_generator:
-            yield event
+        Events are read as plain dicts without building ``ChatEvent`` models.
+        With ``include_result`` the last item is a ``TextStreamResult`` with
+        the full text, token usage and timings. Failed messages raise.
+        """
+        request = self._chat_request(input)
+        recorder = _TextRecorder()
+        for data in self.svc.chat_streaming_raw(self.app_key, request):
+            delta = recorder.feed(data)
+            if delta:
+                yield delta
+        if include_result:
+            yield recorder.result()
+
+    @traced
+    async def astream_text(
+        self,
+        input: dict,
+        include_result: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[Union[str, TextStreamResult]]:
+        request = self._chat_request(input)
+        recorder = _TextRecorder()
+        async for data in self.svc.achat_streaming_raw(self.app_key, request):
+            delta = recorder.feed(data)
+            if delta:
+                yield delta
+        if include_result:
+            yield recorder.result()
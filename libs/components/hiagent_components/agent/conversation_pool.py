@@ -0,0 +1,227 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+from hiagent_api.chat import ChatService
+from hiagent_api.chat_types import (
+    BaseError,
+    CreateConversationRequest,
+    CreateConversationResponse,
+)
+
+from hiagent_components.base.utils import get_shared_executor
+
+logger = logging.getLogger(__name__)
+
+# app key, user ID and the inputs serialized with sorted keys
+PoolKey = Tuple[str, str, str]
+
+
+def _conversation_id(resp: CreateConversationResponse | BaseError) -> str:
+    if isinstance(resp, BaseError):
+        raise Exception(f"create_conversation failed: {resp.model_dump_json()}")
+    return resp.conversation.app_conversation_id
+
+
+def _inputs_key(inputs: dict) -> str:
+    # unlike sorting the items, json copes with unhashable values
+    try:
+        return json.dumps(inputs, sort_keys=True, default=str)
+    except TypeError:
+        # keys of mixed types cannot be compared, order them by their repr
+        return json.dumps(sorted(inputs.items(), key=repr), default=str)
+
+
+def _request(app_key: str, user_id: str, inputs: dict) -> CreateConversationRequest:
+    return CreateConversationRequest(app_key=app_key, inputs=inputs, user_id=user_id)
+
+
+def create_conversation_id(
+    svc: ChatService, app_key: str, user_id: str, inputs: Optional[dict] = None
+) -> str:
+    return _conversation_id(
+        svc.create_conversation(app_key, _request(app_key, user_id, inputs or {}))
+    )
+
+
+async def acreate_conversation_id(
+    svc: ChatService, app_key: str, user_id: str, inputs: Optional[dict] = None
+) -> str:
+    return _conversation_id(
+        await svc.acreate_conversation(
+            app_key, _request(app_key, user_id, inputs or {})
+        )
+    )
+
+
+@dataclass
+class ConversationPoolStats:
+    # checkouts served from the pool and checkouts that had to create a conversation
+    hits: int = 0
+    misses: int = 0
+    created: int = 0
+    errors: int = 0
+
+
+@dataclass
+class _Slot:
+    ready: deque[str] = field(default_factory=deque)
+    creating: int = 0
+
+
+class ConversationPool:
+    """Keeps ``size`` ready conversation IDs per ``(app_key, user_id, inputs)``.
+
+    ``checkout``/``acheckout`` take a ready ID without any request and top the
+    pool back up on ``executor`` (the shared executor by default), so the
+    event loop is never blocked. Only an empty pool creates a conversation
+    inline. A key is only filled once it is checked out a second time or
+    ``prefill`` is called for it, so one-off users cost a single request. At
+    most ``max_keys`` keys are kept; the least recently used ones that are
+    not being filled are dropped together with their ready conversations.
+    """
+
+    def __init__(
+        self,
+        svc: ChatService,
+        size: int = 4,
+        executor: Optional[Executor] = None,
+        max_keys: int = 1024,
+    ):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        self.svc = svc
+        self.size = size
+        self.executor = executor
+        self.max_keys = max_keys
+        self.stats = ConversationPoolStats()
+        self._slots: OrderedDict[PoolKey, _Slot] = OrderedDict()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def _key(app_key: str, user_id: str, inputs: Optional[dict]) -> PoolKey:
+        return app_key, user_id, _inputs_key(inputs or {})
+
+    def __len__(self) -> int:
+        """Number of keys currently tracked."""
+        return len(self._slots)
+
+    def ready(self, app_key: str, user_id: str, inputs: Optional[dict] = None) -> int:
+        with self._lock:
+            slot = self._slots.get(self._key(app_key, user_id, inputs))
+            return len(slot.ready) if slot else 0
+
+    def _slot(self, key: PoolKey) -> Tuple[_Slot, bool]:
+        # the slot for key, marked most recently used, and whether it existed;
+        # call with the lock held
+        slot = self._slots.get(key)
+        existed = slot is not None
+        if slot is None:
+            slot = self._slots[key] = _Slot()
+        self._slots.move_to_end(key)
+        overflow = len(self._slots) - self.max_keys
+        if overflow > 0:
+            idle = [k for k, s in self._slots.items() if not s.creating and k != key]
+            for k in idle[:overflow]:
+                del self._slots[k]
+        return slot, existed
+
+    def _take(self, key: PoolKey) -> Tuple[Optional[str], bool]:
+        """Return a ready ID, or None, and whether the key should be refilled."""
+        with self._lock:
+            slot, existed = self._slot(key)
+            if slot.ready:
+                self.stats.hits += 1
+                return slot.ready.popleft(), True
+            self.stats.misses += 1
+            return None, existed
+
+    def _replenish(self, key: PoolKey, inputs: Optional[dict]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            slot, _ = self._slot(key)
+            missing = self.size - len(slot.ready) - slot.creating
+            if missing <= 0:
+                return
+            slot.creating += missing
+        executor = self.executor or get_shared_executor()
+        inputs = dict(inputs or {})
+        for _ in range(missing):
+            executor.submit(self._create_in_background, key, inputs)
+
+    def _create_in_background(self, key: PoolKey, inputs: dict) -> None:
+        app_key, user_id, _ = key
+        try:
+            conversation_id = create_conversation_id(self.svc, app_key, user_id, inputs)
+        except Exception:
+            logger.exception("failed to pre-create conversation for %s", app_key)
+            conversation_id = None
+        with self._lock:
+            # slots being filled are never evicted, but close() drops them all
+            slot = self._slots.get(key)
+            if slot is not None:
+                slot.creating -= 1
+            if conversation_id is None:
+                self.stats.errors += 1
+                return
+            self.stats.created += 1
+            if slot is not None and not self._closed:
+                slot.ready.append(conversation_id)
+
+    def checkout(
+        self, app_key: str, user_id: str, inputs: Optional[dict] = None
+    ) -> str:
+        """Return a conversation nobody else has been given."""
+        key = self._key(app_key, user_id, inputs)
+        conversation_id, refill = self._take(key)
+        if refill:
+            self._replenish(key, inputs)
+        if conversation_id is not None:
+            return conversation_id
+        return create_conversation_id(self.svc, app_key, user_id, inputs)
+
+    async def acheckout(
+        self, app_key: str, user_id: str, inputs: Optional[dict] = None
+    ) -> str:
+        key = self._key(app_key, user_id, inputs)
+        conversation_id, refill = self._take(key)
+        if refill:
+            self._replenish(key, inputs)
+        if conversation_id is not None:
+            return conversation_id
+        return await acreate_conversation_id(self.svc, app_key, user_id, inputs)
+
+    def prefill(
+        self, app_key: str, user_id: str, inputs: Optional[dict] = None
+    ) -> None:
+        """Start filling the pool for a key ahead of the first checkout."""
+        self._replenish(self._key(app_key, user_id, inputs), inputs)
+
+    def close(self) -> None:
+        """Drop ready conversations and stop replenishing."""
+        with self._lock:
+            self._closed = True
+            self._slots.clear()
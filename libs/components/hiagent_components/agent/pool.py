@@ -0,0 +1,256 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from hiagent_api.chat import ChatService
+from hiagent_api.chat_types import ChatEvent
+
+from hiagent_components.agent.base import Agent
+from hiagent_components.agent.conversation_pool import (
+    ConversationPool,
+    acreate_conversation_id,
+    create_conversation_id,
+)
+from hiagent_components.base.base import Executable
+from hiagent_components.base.concurrency import ConcurrencyLimiter
+from hiagent_components.base.deadline import timeout_kwarg
+
+
+class _Conversation:
+    """An agent on one conversation, used by one call at a time."""
+
+    def __init__(self, name: str):
+        self.agent: Optional[Agent] = None
+        self.turns = 0
+        self.lock = ConcurrencyLimiter(name, 1)
+        # calls that checked the session out, running or waiting for the lock
+        self.users = 0
+
+
+class AgentPool(Executable):
+    """Spreads invocations of one agent app over independent conversations.
+
+    Calls without a session run on whichever of the ``size`` shared
+    conversations is idle, so up to ``size`` of them run in parallel. Inputs
+    carrying ``session_field`` are routed to a conversation of their own that
+    keeps its context across calls; calls of one session run one at a time.
+    With ``max_turns`` a conversation is replaced by a fresh one after that
+    many turns. New conversations come from ``conversation_pool`` if given.
+    """
+
+    def __init__(
+        self,
+        svc: ChatService,
+        app_key: str,
+        user_id: str,
+        variables: Optional[dict] = None,
+        size: int = 4,
+        max_turns: Optional[int] = None,
+        session_field: str = "session_id",
+        max_sessions: int = 1024,
+        conversation_pool: Optional[ConversationPool] = None,
+        name: str = "",
+        description: str = "",
+    ) -> None:
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.svc = svc
+        self.app_key = app_key
+        self.user_id = user_id
+        self.variables = variables or {}
+        self.size = size
+        self.max_turns = max_turns
+        self.session_field = session_field
+        self.max_sessions = max_sessions
+        self.conversation_pool = conversation_pool
+        self.name = name
+        self.description = description
+        self.recycled = 0
+        self._shared = [_Conversation(f"{app_key}#{i}") for i in range(size)]
+        self._idle: deque[_Conversation] = deque(self._shared)
+        self._admission = ConcurrencyLimiter(f"{app_key}-pool", size)
+        self._sessions: OrderedDict[str, _Conversation] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def input_schema(self) -> dict:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "需要智能体解决的原始问题",
+                },
+                self.session_field: {
+                    "type": "string",
+                    "description": "会话标识，相同标识的提问共享上下文",
+                },
+            },
+            "required": ["query"],
+        }
+
+    @property
+    def _native_async(self) -> bool:
+        return True
+
+    def _needs_conversation(self, conversation: _Conversation) -> bool:
+        if conversation.agent is None:
+            return True
+        if self.max_turns is not None and conversation.turns >= self.max_turns:
+            with self._lock:
+                self.recycled += 1
+            return True
+        return False
+
+    def _attach(self, conversation: _Conversation, conversation_id: str) -> None:
+        conversation.agent = Agent(
+            svc=self.svc,
+            app_key=self.app_key,
+            user_id=self.user_id,
+            conversation_id=conversation_id,
+            name=self.name,
+            description=self.description,
+        )
+        conversation.turns = 0
+
+    def _prepare(self, conversation: _Conversation) -> Agent:
+        if self._needs_conversation(conversation):
+            if self.conversation_pool is not None:
+                conversation_id = self.conversation_pool.checkout(
+                    self.app_key, self.user_id, self.variables
+                )
+            else:
+                conversation_id = create_conversation_id(
+                    self.svc, self.app_key, self.user_id, self.variables
+                )
+            self._attach(conversation, conversation_id)
+        conversation.turns += 1
+        assert conversation.agent is not None
+        return conversation.agent
+
+    async def _aprepare(self, conversation: _Conversation) -> Agent:
+        if self._needs_conversation(conversation):
+            if self.conversation_pool is not None:
+                conversation_id = await self.conversation_pool.acheckout(
+                    self.app_key, self.user_id, self.variables
+                )
+            else:
+                conversation_id = await acreate_conversation_id(
+                    self.svc, self.app_key, self.user_id, self.variables
+                )
+            self._attach(conversation, conversation_id)
+        conversation.turns += 1
+        assert conversation.agent is not None
+        return conversation.agent
+
+    def _session(self, session: str) -> _Conversation:
+        # the count is taken under the same lock as the lookup, so a session
+        # somebody holds or waits for is never evicted and recreated
+        with self._lock:
+            conversation = self._sessions.get(session)
+            if conversation is None:
+                conversation = self._sessions[session] = _Conversation(session)
+            conversation.users += 1
+            self._sessions.move_to_end(session)
+            self._evict_idle()
+            return conversation
+
+    def _release(self, conversation: _Conversation) -> None:
+        with self._lock:
+            conversation.users -= 1
+            self._evict_idle()
+
+    def _evict_idle(self) -> None:
+        # forget the least recently used idle sessions; busy ones stay even
+        # above max_sessions until they are released
+        overflow = len(self._sessions) - self.max_sessions
+        if overflow <= 0:
+            return
+        idle = [key for key, c in self._sessions.items() if c.users == 0]
+        for key in idle[:overflow]:
+            del self._sessions[key]
+
+    def _take_idle(self) -> _Conversation:
+        with self._lock:
+            return self._idle.popleft()
+
+    def _give_back(self, conversation: _Conversation) -> None:
+        with self._lock:
+            self._idle.append(conversation)
+
+    @contextmanager
+    def _checkout(self, input: dict) -> Iterator[Agent]:
+        session = input.get(self.session_field)
+        if session:
+            conversation = self._session(str(session))
+            try:
+                with conversation.lock.slot():
+                    yield self._prepare(conversation)
+            finally:
+                self._release(conversation)
+            return
+        with self._admission.slot():
+            conversation = self._take_idle()
+            try:
+                yield self._prepare(conversation)
+            finally:
+                self._give_back(conversation)
+
+    @asynccontextmanager
+    async def _acheckout(self, input: dict) -> AsyncIterator[Agent]:
+        session = input.get(self.session_field)
+        if session:
+            conversation = self._session(str(session))
+            try:
+                async with conversation.lock.aslot():
+                    yield await self._aprepare(conversation)
+            finally:
+                self._release(conversation)
+            return
+        async with self._admission.aslot():
+            conversation = self._take_idle()
+            try:
+                yield await self._aprepare(conversation)
+            finally:
+                self._give_back(conversation)
+
+    @timeout_kwarg
+    def invoke(self, input: dict, **kwargs: Any) -> str:
+        with self._checkout(input) as agent:
+            return agent.invoke(input, **kwargs)
+
+    @timeout_kwarg
+    async def ainvoke(
+        self,
+        input: dict,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> str:
+        async with self._acheckout(input) as agent:
+            return await agent.ainvoke(input, executor=executor, **kwargs)
+
+    def stream(self, input: dict, **kwargs: Any) -> Iterator[ChatEvent]:
+        with self._checkout(input) as agent:
+            yield from agent.stream(input, **kwargs)
+
+    async def astream(self, input: dict, **kwargs: Any) -> AsyncIterator[ChatEvent]:
+        async with self._acheckout(input) as agent:
+            async for event in agent.astream(input, **kwargs):
+                yield event
@@ -14,5 +14,48 @@
 from __future__ import annotations
 
 from .base import Executable
+from .cache import CachedExecutable, CacheStats, InMemoryCache, SQLiteCache
+from .callbacks import (
+    CallbackHandler,
+    MetricsHandler,
+    OpenTelemetryHandler,
+    Run,
+    add_callback_handler,
+    remove_callback_handler,
+)
+from .composition import FunctionExecutable, ParallelExecutable, SequenceExecutable
+from .concurrency import (
+    ConcurrencyLimitedExecutable,
+    ConcurrencyLimiter,
+    LimiterStats,
+    concurrency_limiters,
+    get_concurrency_limiter,
+)
+from .fallbacks import FallbackExecutable, FallbackRecord
+from .utils import get_shared_executor, set_shared_executor
 
-__all__ = ["Executable"]
+__all__ = [
+    "CachedExecutable",
+    "CallbackHandler",
+    "CacheStats",
+    "ConcurrencyLimitedExecutable",
+    "ConcurrencyLimiter",
+    "Executable",
+    "FallbackExecutable",
+    "FallbackRecord",
+    "FunctionExecutable",
+    "InMemoryCache",
+    "LimiterStats",
+    "MetricsHandler",
+    "OpenTelemetryHandler",
+    "ParallelExecutable",
+    "Run",
+    "SequenceExecutable",
+    "SQLiteCache",
+    "add_callback_handler",
+    "concurrency_limiters",
+    "get_concurrency_limiter",
+    "get_shared_executor",
+    "remove_callback_handler",
+    "set_shared_executor",
+]
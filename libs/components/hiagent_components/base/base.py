@@ -19,32 +19,49 @@ from typing import (
     TYPE_CHECKING,
     Any,
     AsyncIterator,
+    Awaitable,
+    Callable,
     Dict,
     Generic,
     Iterator,
     Optional,
+    Sequence,
     Tuple,
     Type,
     TypeVar,
-    Union,
     cast,
 )
 
 from tenacity import (
     AsyncRetrying,
+    RetryCallState,
     Retrying,
     retry_if_exception_type,
+    retry_if_not_exception_type,
     stop_after_attempt,
     wait_exponential_jitter,
 )
 
+from hiagent_components.base.deadline import (
+    DeadlineExceededError,
+    deadline,
+    remaining_time,
+    timeout_kwarg,
+    wait_with_deadline,
+)
 from hiagent_components.base.utils import (
-    gather_with_concurrency,
-    get_executor,
+    amap_as_completed,
+    amap_ordered,
+    executor_for,
+    map_as_completed,
+    map_ordered,
     run_in_executor,
 )
 
 if TYPE_CHECKING:
+    from hiagent_components.base.cache import BaseCache, CachedExecutable
+    from hiagent_components.base.concurrency import ConcurrencyLimitedExecutable
+    from hiagent_components.base.fallbacks import FallbackExecutable
     from hiagent_components.tool.base import BaseTool
 
 
@@ -79,51 +96,140 @@ class Executable(Generic[Input, Output], ABC):
         inputs: list[Input],
         max_parallel: int,
         return_exceptions: bool = False,
+        item_timeout: Optional[float] = None,
+        timeout: Optional[float] = None,
         **kwargs: Optional[Any],
     ) -> list[Output]:
+        """Invoke every input on the shared executor, results keep input order.
+
+        ``item_timeout`` bounds each item once it starts, ``timeout`` is a
+        deadline for the whole batch. When an item fails and
+        ``return_exceptions`` is not set, items not yet started are cancelled
+        and the error is raised.
+        """
         if not inputs:
             return []
 
-        def invoke(input: Input) -> Union[Output, Exception]:
-            if return_exceptions:
-                try:
-                    return self.invoke(input, **kwargs)
-                except Exception as e:
-                    return e
-            else:
-                return self.invoke(input, **kwargs)
+        if timeout is not None:
+            with deadline(timeout):
+                return self.batch(
+                    inputs, max_parallel, return_exceptions, item_timeout, **kwargs
+                )
+
+        def invoke(input: Input) -> Output:
+            return self.invoke(input, **kwargs)
+
+        if len(inputs) == 1 and item_timeout is None:
+            try:
+                return [invoke(inputs[0])]
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return cast("list[Output]", [e])
+
+        return map_ordered(
+            invoke,
+            inputs,
+            max_parallel,
+            return_exceptions=return_exceptions,
+            timeout=item_timeout,
+        )
+
+    def batch_as_completed(
+        self,
+        inputs: list[Input],
+        max_parallel: int,
+        return_exceptions: bool = False,
+        item_timeout: Optional[float] = None,
+        **kwargs: Optional[Any],
+    ) -> Iterator[Tuple[int, Output]]:
+        """Like :meth:`batch` but yields ``(index, result)`` as each item finishes."""
 
-        if len(inputs) == 1:
-            return cast("list[Output]", [invoke(inputs[0])])
+        def invoke(input: Input) -> Output:
+            return self.invoke(input, **kwargs)
 
-        with get_executor(max_parallel) as executor:
-            return cast("list[Output]", list[executor.map(invoke, inputs)])
+        yield from map_as_completed(
+            invoke,
+            inputs,
+            max_parallel,
+            return_exceptions=return_exceptions,
+            timeout=item_timeout,
+        )
+
+    @property
+    def _native_async(self) -> bool:
+        """Whether ``ainvoke`` awaits I/O itself instead of running ``invoke`` in a thread."""
+        return type(self).ainvoke is not Executable.ainvoke
+
+    def _abatch_executor(
+        self, inputs: list[Input], max_parallel: int
+    ) -> Tuple[Optional[Executor], Optional[Executor]]:
+        # natively async executables only need the semaphore, others borrow
+        # threads from the shared executor, or from a pool of their own when
+        # it is smaller than max_parallel
+        if self._native_async:
+            return None, None
+        return executor_for(min(len(inputs), max_parallel or len(inputs)))
+
+    def _abatch_invoker(
+        self, executor: Optional[Executor], **kwargs: Any
+    ) -> Callable[[Input], Awaitable[Output]]:
+        async def ainvoke(input: Input) -> Output:
+            return await self.ainvoke(input, executor=executor, **kwargs)
+
+        return ainvoke
 
     async def abatch(
         self,
         inputs: list[Input],
         max_parallel: int,
         return_exceptions: bool = False,
+        item_timeout: Optional[float] = None,
+        timeout: Optional[float] = None,
         **kwargs: Optional[Any],
     ) -> list[Output]:
+        """Async counterpart of :meth:`batch`, remaining items are cancelled on failure."""
         if not inputs:
             return []
 
-        with get_executor(max_parallel) as executor:
-
-            async def ainvoke(
-                input: Input,
-            ) -> Union[Output, Exception]:
-                if return_exceptions:
-                    try:
-                        return await self.ainvoke(input, executor, **kwargs)
-                    except Exception as e:
-                        return e
-                else:
-                    return await self.ainvoke(input, executor, **kwargs)
+        executor, owned = self._abatch_executor(inputs, max_parallel)
+        try:
+            with deadline(timeout):
+                return await wait_with_deadline(
+                    amap_ordered(
+                        self._abatch_invoker(executor, **kwargs),
+                        inputs,
+                        max_parallel,
+                        return_exceptions=return_exceptions,
+                        timeout=item_timeout,
+                    )
+                )
+        finally:
+            if owned is not None:
+                owned.shutdown(wait=False)
 
-            coros = map(ainvoke, inputs)
-            return await gather_with_concurrency(max_parallel, *coros)
+    async def abatch_as_completed(
+        self,
+        inputs: list[Input],
+        max_parallel: int,
+        return_exceptions: bool = False,
+        item_timeout: Optional[float] = None,
+        **kwargs: Optional[Any],
+    ) -> AsyncIterator[Tuple[int, Output]]:
+        """Like :meth:`abatch` but yields ``(index, result)`` as each item finishes."""
+        executor, owned = self._abatch_executor(inputs, max_parallel)
+        try:
+            async for item in amap_as_completed(
+                self._abatch_invoker(executor, **kwargs),
+                inputs,
+                max_parallel,
+                return_exceptions=return_exceptions,
+                timeout=item_timeout,
+            ):
+                yield item
+        finally:
+            if owned is not None:
+                owned.shutdown(wait=False)
 
     def with_retry(
         self,
@@ -133,6 +239,65 @@ class Executable(Generic[Input, Output], ABC):
     ) -> Executable[Input, Output]:
         return RetryableExecutable(self, retry_exception_types, wait_exponential_jitter, max_attempts)
 
+    def with_cache(
+        self,
+        cache: Optional[BaseCache] = None,
+        ttl: Optional[float] = None,
+        max_size: int = 1024,
+        key_kwargs: Sequence[str] = (),
+        namespace: Optional[str] = None,
+    ) -> CachedExecutable[Input, Output]:
+        """Cache results by input and the kwargs named in ``key_kwargs``.
+
+        Defaults to an in-memory LRU of ``max_size`` entries expiring after
+        ``ttl`` seconds; pass ``cache`` (e.g. ``SQLiteCache``) to use another backend.
+        """
+        from hiagent_components.base.cache import CachedExecutable, InMemoryCache
+
+        if cache is None:
+            cache = InMemoryCache(max_size=max_size, ttl=ttl)
+        return CachedExecutable(self, cache, key_kwargs, namespace)
+
+    def with_fallbacks(
+        self,
+        fallbacks: Sequence[Executable[Input, Output]],
+        timeout: Optional[float] = None,
+        on: Tuple[Type[BaseException], ...] = (Exception,),
+        race: bool = False,
+    ) -> FallbackExecutable[Input, Output]:
+        """Fall back to ``fallbacks`` in order when a candidate raises ``on``
+        or runs longer than ``timeout`` seconds; ``race`` starts them all at once."""
+        from hiagent_components.base.fallbacks import FallbackExecutable
+
+        return FallbackExecutable(self, fallbacks, timeout, on, race)
+
+    def with_concurrency_limit(
+        self, name: str, limit: Optional[int] = None
+    ) -> ConcurrencyLimitedExecutable[Input, Output]:
+        """Cap concurrent calls across everything limited under ``name``.
+
+        The limiter is process wide, so e.g. all tools of one plugin can share
+        ``with_concurrency_limit(plugin_id, 4)`` regardless of which instance,
+        thread or event loop they are called from.
+        """
+        from hiagent_components.base.concurrency import (
+            ConcurrencyLimitedExecutable,
+            get_concurrency_limiter,
+        )
+
+        return ConcurrencyLimitedExecutable(self, get_concurrency_limiter(name, limit))
+
+    def __or__(self, other: Any) -> Executable:
+        """``a | b`` feeds the output of ``a`` into ``b``; dicts become parallel maps."""
+        from hiagent_components.base.composition import SequenceExecutable
+
+        return SequenceExecutable(self, other)
+
+    def __ror__(self, other: Any) -> Executable:
+        from hiagent_components.base.composition import SequenceExecutable
+
+        return SequenceExecutable(other, self)
+
     def as_tool(
         self,
         name: Optional[str] = None,
@@ -145,6 +310,7 @@ class Executable(Generic[Input, Output], ABC):
     @abstractmethod
     def invoke(self, input: Input, **kwargs: Any) -> Output: ...
 
+    @timeout_kwarg
     async def ainvoke(
         self,
         input: Input,
@@ -153,6 +319,23 @@ class Executable(Generic[Input, Output], ABC):
     ) -> Output:
         return await run_in_executor(executor, self.invoke, input, **kwargs)
 
+
+def _deadline_passed(retry_state: RetryCallState) -> bool:
+    remaining = remaining_time()
+    return remaining is not None and remaining <= 0
+
+
+def _capped_by_deadline(
+    wait: Callable[[RetryCallState], float],
+) -> Callable[[RetryCallState], float]:
+    def capped(retry_state: RetryCallState) -> float:
+        remaining = remaining_time()
+        seconds = wait(retry_state)
+        return seconds if remaining is None else max(0.0, min(seconds, remaining))
+
+    return capped
+
+
 class RetryableExecutable(Executable[Input, Output]):
     def __init__(
         self,
@@ -166,18 +349,26 @@ class RetryableExecutable(Executable[Input, Output]):
         self.wait_exponential_jitter = wait_exponential_jitter
         self.executable = executable
 
+    @property
+    def _native_async(self) -> bool:
+        return self.executable._native_async
+
     @property
     def _retrying_kwargs(self) -> Dict[str, Any]:
         kwargs: Dict[str, Any] = dict()
 
+        # never retry past the caller's deadline, nor sleep beyond it
+        kwargs["stop"] = _deadline_passed
         if self.max_attempts:
-            kwargs["stop"] = stop_after_attempt(self.max_attempts)
+            kwargs["stop"] = stop_after_attempt(self.max_attempts) | _deadline_passed
 
         if self.wait_exponential_jitter:
-            kwargs["wait"] = wait_exponential_jitter()
+            kwargs["wait"] = _capped_by_deadline(wait_exponential_jitter())
 
         if self.retry_exception_types:
-            kwargs["retry"] = retry_if_exception_type(self.retry_exception_types)
+            kwargs["retry"] = retry_if_exception_type(
+                self.retry_exception_types
+            ) & retry_if_not_exception_type(DeadlineExceededError)
 
         return kwargs
 
@@ -187,6 +378,7 @@ class RetryableExecutable(Executable[Input, Output]):
     def _async_retrying(self, **kwargs: Any) -> AsyncRetrying:
         return AsyncRetrying(**self._retrying_kwargs, **kwargs)
 
+    @timeout_kwarg
     def invoke(self, input: Input, **kwargs: Any) -> Output:
         result = None
         for attempt in self._sync_retrying(reraise=True):
@@ -199,6 +391,7 @@ class RetryableExecutable(Executable[Input, Output]):
                 attempt.retry_state.set_result(result)
         return result
 
+    @timeout_kwarg
     async def ainvoke(
         self,
         input: Input,
@@ -210,7 +403,7 @@ class RetryableExecutable(Executable[Input, Output]):
             with attempt:
                 result = await self.executable.ainvoke(
                     input,
-                    executor,
+                    executor=executor,
                     **kwargs,
                 )
             if attempt.retry_state.outcome and not attempt.retry_state.outcome.failed:
@@ -0,0 +1,368 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from hiagent_components.base.base import Executable, Input, Output
+from hiagent_components.base.deadline import (
+    DeadlineExceededError,
+    remaining_time,
+    timeout_kwarg,
+)
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return sorted(map(repr, value))
+    return repr(value)
+
+
+def make_cache_key(namespace: str, input: Any, kwargs: Dict[str, Any]) -> str:
+    """Deterministic key over the input and kwargs, independent of dict ordering."""
+    payload = json.dumps(
+        [namespace, input, kwargs],
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=_jsonable,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _config(executable: Any) -> Dict[str, Any]:
+    # constructor arguments kept as plain-data attributes, including those of
+    # wrapped executables, tell two instances of the same class apart across
+    # processes without picking up runtime state
+    config: Dict[str, Any] = {}
+    try:
+        params = inspect.signature(type(executable).__init__).parameters
+    except (TypeError, ValueError):
+        return config
+    for name in params:
+        if name == "self" or name.startswith("_"):
+            continue
+        value = getattr(executable, name, None)
+        if isinstance(value, _SCALARS):
+            config[name] = value
+        elif isinstance(value, (list, tuple)) and all(
+            isinstance(v, _SCALARS) for v in value
+        ):
+            config[name] = list(value)
+        elif isinstance(value, dict):
+            config[name] = value
+        elif isinstance(value, Executable):
+            config[name] = [type(value).__qualname__, _config(value)]
+    return config
+
+
+def default_namespace(executable: Any) -> str:
+    """Namespace unique to the executable's class, name and configuration."""
+    cls = type(executable)
+    digest = make_cache_key("", None, _config(executable))[:16]
+    return f"{cls.__module__}.{cls.__qualname__}:{getattr(executable, 'name', '')}:{digest}"
+
+
+class _Abandoned(Exception):
+    """Set on an in-flight call whose owner was cancelled or ran out of time."""
+
+
+class BaseCache(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Return the cached value, or :data:`MISSING` when absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+class InMemoryCache(BaseCache):
+    """Thread-safe LRU cache with an optional time to live in seconds."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[str, Tuple[Optional[float], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            expires_at, value = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(BaseCache):
+    """On-disk cache backed by SQLite, values are pickled.
+
+    Only use it with trusted cache files, unpickling runs arbitrary code.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = None,
+        table: str = "hiagent_cache",
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"invalid table name: {table}")
+        self.path = path
+        self.ttl = ttl
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISSING
+            value, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                with self._conn:
+                    self._conn.execute(
+                        f"DELETE FROM {self.table} WHERE key = ?", (key,)
+                    )
+                return MISSING
+        return pickle.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        blob = pickle.dumps(value)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, blob, expires_at),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    # misses served by waiting on an identical call already in flight
+    deduplicated: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses + self.deduplicated
+
+    @property
+    def hit_rate(self) -> float:
+        if not self.requests:
+            return 0.0
+        return (self.hits + self.deduplicated) / self.requests
+
+
+class CachedExecutable(Executable[Input, Output]):
+    """Caches ``invoke``/``ainvoke`` results keyed by input and selected kwargs.
+
+    Identical calls that arrive while one is already running wait for its
+    result instead of calling the executable again; if that call is cancelled
+    or hits its own deadline, one of the waiters runs the executable instead.
+    Failures are not cached. Streaming calls are passed through uncached.
+
+    The default ``namespace`` covers the executable's class, name and public
+    configuration, so two tools of the same class do not share entries.
+    """
+
+    def __init__(
+        self,
+        executable: Executable[Input, Output],
+        cache: BaseCache,
+        key_kwargs: Sequence[str] = (),
+        namespace: Optional[str] = None,
+    ):
+        self.executable = executable
+        self.cache = cache
+        self.key_kwargs = tuple(key_kwargs)
+        self.namespace = namespace or default_namespace(executable)
+        self.name = getattr(executable, "name", "")
+        self.description = getattr(executable, "description", "")
+        self.stats = CacheStats()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        return self.executable.input_schema
+
+    @property
+    def _native_async(self) -> bool:
+        return self.executable._native_async
+
+    def cache_key(self, input: Input, **kwargs: Any) -> str:
+        selected = {k: kwargs[k] for k in self.key_kwargs if k in kwargs}
+        return make_cache_key(self.namespace, input, selected)
+
+    def _lookup(self, key: str) -> Tuple[Any, Optional[Future], bool]:
+        """Return ``(value, future, owner)``; the owner must compute and resolve the future."""
+        with self._lock:
+            value = self.cache.get(key)
+            if value is not MISSING:
+                self.stats.hits += 1
+                return value, None, False
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats.deduplicated += 1
+                return MISSING, future, False
+            self.stats.misses += 1
+            future = self._inflight[key] = Future()
+            # a running future cannot be cancelled by a waiter going away
+            future.set_running_or_notify_cancel()
+            return MISSING, future, True
+
+    def _resolve(
+        self, key: str, future: Future, value: Any, error: Optional[BaseException]
+    ) -> None:
+        if error is None:
+            try:
+                self.cache.set(key, value)
+            except Exception:
+                # the value is still returned, just not cached
+                logger.warning(
+                    "failed to cache result for %s", self.namespace, exc_info=True
+                )
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is None:
+            future.set_result(value)
+        elif isinstance(error, Exception) and not isinstance(
+            error, DeadlineExceededError
+        ):
+            future.set_exception(error)
+        else:
+            # cancellation and deadlines belong to the owner, waiters retry
+            future.set_exception(_Abandoned())
+
+    @timeout_kwarg
+    def invoke(self, input: Input, **kwargs: Any) -> Output:
+        key = self.cache_key(input, **kwargs)
+        while True:
+            value, future, owner = self._lookup(key)
+            if future is None:
+                return value
+            if owner:
+                break
+            try:
+                return future.result(timeout=remaining_time())
+            except FutureTimeoutError:
+                raise DeadlineExceededError("deadline exceeded")
+            except _Abandoned:
+                continue
+        try:
+            value = self.executable.invoke(input, **kwargs)
+        except BaseException as e:
+            self._resolve(key, future, None, e)
+            raise
+        self._resolve(key, future, value, None)
+        return value
+
+    @timeout_kwarg
+    async def ainvoke(
+        self,
+        input: Input,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> Output:
+        key = self.cache_key(input, **kwargs)
+        while True:
+            value, future, owner = self._lookup(key)
+            if future is None:
+                return value
+            if owner:
+                break
+            try:
+                return await asyncio.wrap_future(future)
+            except _Abandoned:
+                continue
+        try:
+            value = await self.executable.ainvoke(input, executor=executor, **kwargs)
+        except BaseException as e:
+            self._resolve(key, future, None, e)
+            raise
+        self._resolve(key, future, value, None)
+        return value
+
+    def stream(self, input: Input, **kwargs: Any) -> Iterator[Output]:
+        return self.executable.stream(input, **kwargs)
+
+    async def astream(self, input: Input, **kwargs: Any) -> AsyncIterator[Output]:
+        async for chunk in self.executable.astream(input, **kwargs):
+            yield chunk
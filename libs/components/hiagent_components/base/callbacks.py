@@ -0,0 +1,375 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import inspect
+import itertools
+import json
+import logging
+import threading
+import time
+from abc import ABC
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+from hiagent_api.instrumentation import DEFAULT_BUCKETS, Histogram
+from pydantic import BaseModel
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+logger = logging.getLogger(__name__)
+
+_run_ids = itertools.count(1)
+
+
+def approximate_size(value: Any) -> int:
+    """Length of ``value`` serialized as text, used for input/output sizes."""
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json())
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+@dataclass
+class Run:
+    """One call of ``invoke``, ``ainvoke``, ``stream`` or ``astream``.
+
+    Sizes are computed on demand so handlers that do not need them cost nothing.
+    """
+
+    run_id: int
+    component: str
+    name: str
+    method: str
+    input: Any
+    start: float
+    end: Optional[float] = None
+    first_chunk: Optional[float] = None
+    chunks: int = 0
+    output_size: Optional[int] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def time_to_first_chunk(self) -> Optional[float]:
+        return None if self.first_chunk is None else self.first_chunk - self.start
+
+    @property
+    def input_size(self) -> int:
+        return approximate_size(self.input)
+
+
+class CallbackHandler(ABC):
+    """Receives events for every traced call; override the events you need.
+
+    Handlers run inline on the calling thread or event loop and must be fast.
+    Exceptions raised by a handler are logged and never affect the call.
+    """
+
+    def on_start(self, run: Run) -> None:
+        pass
+
+    def on_end(self, run: Run, output: Any) -> None:
+        pass
+
+    def on_error(self, run: Run, error: BaseException) -> None:
+        pass
+
+    def on_stream_chunk(self, run: Run, chunk: Any) -> None:
+        pass
+
+
+_handlers: Tuple[CallbackHandler, ...] = ()
+_handlers_lock = threading.Lock()
+
+
+def add_callback_handler(handler: CallbackHandler) -> None:
+    global _handlers
+    with _handlers_lock:
+        if handler not in _handlers:
+            _handlers = _handlers + (handler,)
+
+
+def remove_callback_handler(handler: CallbackHandler) -> None:
+    global _handlers
+    with _handlers_lock:
+        _handlers = tuple(h for h in _handlers if h is not handler)
+
+
+def get_callback_handlers() -> Tuple[CallbackHandler, ...]:
+    return _handlers
+
+
+def _emit(handlers: Sequence[CallbackHandler], event: str, *args: Any) -> None:
+    for handler in handlers:
+        try:
+            getattr(handler, event)(*args)
+        except Exception:
+            logger.exception("callback handler %r failed on %s", handler, event)
+
+
+def _start(handlers, self: Any, method: str, input: Any) -> Run:
+    run = Run(
+        run_id=next(_run_ids),
+        component=type(self).__name__,
+        name=getattr(self, "name", "") or "",
+        method=method,
+        input=input,
+        start=time.perf_counter(),
+    )
+    _emit(handlers, "on_start", run)
+    return run
+
+
+def _chunk(handlers, run: Run, chunk: Any) -> None:
+    if run.first_chunk is None:
+        run.first_chunk = time.perf_counter()
+    run.chunks += 1
+    _emit(handlers, "on_stream_chunk", run, chunk)
+
+
+def _finish(handlers, run: Run, output: Any = None) -> None:
+    run.end = time.perf_counter()
+    _emit(handlers, "on_end", run, output)
+
+
+def _fail(handlers, run: Run, error: BaseException) -> None:
+    run.end = time.perf_counter()
+    _emit(handlers, "on_error", run, error)
+
+
+def traced(func: F) -> F:
+    """Emit callback events around ``invoke``, ``ainvoke`` or a streaming method.
+
+    Without registered handlers the wrapper only checks an empty tuple.
+    """
+    method = func.__name__
+
+    if inspect.isasyncgenfunction(func):
+
+        @wraps(func)
+        async def agen_wrapper(self: Any, input: Any, *args: Any, **kwargs: Any) -> Any:
+            handlers = _handlers
+            if not handlers:
+                async for chunk in func(self, input, *args, **kwargs):
+                    yield chunk
+                return
+            run = _start(handlers, self, method, input)
+            try:
+                async for chunk in func(self, input, *args, **kwargs):
+                    _chunk(handlers, run, chunk)
+                    yield chunk
+            except GeneratorExit:
+                # the consumer stopped early
+                _finish(handlers, run)
+                raise
+            except BaseException as e:
+                _fail(handlers, run, e)
+                raise
+            _finish(handlers, run)
+
+        return agen_wrapper  # type: ignore[return-value]
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def awrapper(self: Any, input: Any, *args: Any, **kwargs: Any) -> Any:
+            handlers = _handlers
+            if not handlers:
+                return await func(self, input, *args, **kwargs)
+            run = _start(handlers, self, method, input)
+            try:
+                output = await func(self, input, *args, **kwargs)
+            except BaseException as e:
+                _fail(handlers, run, e)
+                raise
+            _finish(handlers, run, output)
+            return output
+
+        return awrapper  # type: ignore[return-value]
+
+    streaming = method == "stream" or inspect.isgeneratorfunction(func)
+
+    def iterate(handlers, run: Run, iterator: Any) -> Any:
+        try:
+            for chunk in iterator:
+                _chunk(handlers, run, chunk)
+                yield chunk
+        except GeneratorExit:
+            _finish(handlers, run)
+            raise
+        except BaseException as e:
+            _fail(handlers, run, e)
+            raise
+        _finish(handlers, run)
+
+    @wraps(func)
+    def wrapper(self: Any, input: Any, *args: Any, **kwargs: Any) -> Any:
+        handlers = _handlers
+        if not handlers:
+            return func(self, input, *args, **kwargs)
+        run = _start(handlers, self, method, input)
+        try:
+            output = func(self, input, *args, **kwargs)
+        except BaseException as e:
+            _fail(handlers, run, e)
+            raise
+        if streaming:
+            # stream() may return a plain iterator; errors raised before
+            # iteration starts stay eager
+            return iterate(handlers, run, output)
+        _finish(handlers, run, output)
+        return output
+
+    return wrapper  # type: ignore[return-value]
+
+
+class MetricsHandler(CallbackHandler):
+    """In-memory latency histograms, call and error counts and in-flight gauges
+    per ``(component, name)``; thread safe.
+
+    With ``track_sizes`` the input and output sizes are also summed, which
+    serializes every input and output.
+    """
+
+    def __init__(
+        self, buckets: Sequence[float] = DEFAULT_BUCKETS, track_sizes: bool = False
+    ):
+        self.buckets = tuple(sorted(buckets))
+        self.track_sizes = track_sizes
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], dict] = {}
+
+    def _get(self, run: Run) -> dict:
+        key = (run.component, run.name)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = {
+                "latency": Histogram(self.buckets),
+                "first_chunk": Histogram(self.buckets),
+                "calls": 0,
+                "errors": {},
+                "in_flight": 0,
+                "chunks": 0,
+                "input_bytes": 0,
+                "output_bytes": 0,
+            }
+        return stats
+
+    def on_start(self, run: Run) -> None:
+        input_size = run.input_size if self.track_sizes else 0
+        with self._lock:
+            stats = self._get(run)
+            stats["calls"] += 1
+            stats["in_flight"] += 1
+            stats["input_bytes"] += input_size
+
+    def on_stream_chunk(self, run: Run, chunk: Any) -> None:
+        if self.track_sizes:
+            run.output_size = (run.output_size or 0) + approximate_size(chunk)
+
+    def on_end(self, run: Run, output: Any) -> None:
+        output_size = 0
+        if self.track_sizes:
+            output_size = run.output_size or approximate_size(output)
+        with self._lock:
+            stats = self._get(run)
+            stats["in_flight"] -= 1
+            stats["latency"].observe(run.elapsed)
+            if run.time_to_first_chunk is not None:
+                stats["first_chunk"].observe(run.time_to_first_chunk)
+            stats["chunks"] += run.chunks
+            stats["output_bytes"] += output_size
+
+    def on_error(self, run: Run, error: BaseException) -> None:
+        name = type(error).__name__
+        with self._lock:
+            stats = self._get(run)
+            stats["in_flight"] -= 1
+            stats["latency"].observe(run.elapsed)
+            stats["errors"][name] = stats["errors"].get(name, 0) + 1
+
+    def snapshot(self) -> Dict[Tuple[str, str], dict]:
+        """Return ``{(component, name): {"latency": {...}, "calls": n, "errors": {...}, ...}}``."""
+        with self._lock:
+            result = {}
+            for key, stats in self._stats.items():
+                item = dict(stats)
+                item["latency"] = stats["latency"].summary()
+                item["first_chunk"] = stats["first_chunk"].summary()
+                item["errors"] = dict(stats["errors"])
+                result[key] = item
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+class OpenTelemetryHandler(CallbackHandler):
+    """Records calls as OpenTelemetry metrics; requires ``opentelemetry-api``."""
+
+    def __init__(self, meter: Any = None, prefix: str = "hiagent.component"):
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError:
+                raise ImportError(
+                    "OpenTelemetryHandler requires opentelemetry-api, "
+                    "install it with `pip install opentelemetry-api`"
+                )
+            meter = metrics.get_meter("hiagent_components")
+        self._duration = meter.create_histogram(
+            f"{prefix}.duration", unit="s", description="Call duration"
+        )
+        self._first_chunk = meter.create_histogram(
+            f"{prefix}.time_to_first_chunk",
+            unit="s",
+            description="Time to first streamed chunk",
+        )
+        self._errors = meter.create_counter(f"{prefix}.errors")
+        self._in_flight = meter.create_up_down_counter(f"{prefix}.in_flight")
+
+    @staticmethod
+    def _attributes(run: Run) -> Dict[str, str]:
+        return {
+            "hiagent.component": run.component,
+            "hiagent.name": run.name,
+            "hiagent.method": run.method,
+        }
+
+    def on_start(self, run: Run) -> None:
+        self._in_flight.add(1, self._attributes(run))
+
+    def on_end(self, run: Run, output: Any) -> None:
+        attributes = self._attributes(run)
+        self._in_flight.add(-1, attributes)
+        self._duration.record(run.elapsed, attributes)
+        if run.time_to_first_chunk is not None:
+            self._first_chunk.record(run.time_to_first_chunk, attributes)
+
+    def on_error(self, run: Run, error: BaseException) -> None:
+        attributes = self._attributes(run)
+        self._in_flight.add(-1, attributes)
+        self._duration.record(run.elapsed, attributes)
+        self._errors.add(1, {**attributes, "error.type": type(error).__name__})
@@ -0,0 +1,190 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import inspect
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Union
+
+from hiagent_components.base.base import Executable
+from hiagent_components.base.deadline import timeout_kwarg
+from hiagent_components.base.utils import map_ordered, run_in_executor
+
+ExecutableLike = Union[Executable, Dict[str, Any], Callable[[Any], Any]]
+
+
+def coerce_to_executable(thing: ExecutableLike) -> Executable:
+    """Turn a dict of branches or a plain function into an Executable."""
+    if isinstance(thing, Executable):
+        return thing
+    if isinstance(thing, dict):
+        return ParallelExecutable(thing)
+    if callable(thing):
+        return FunctionExecutable(thing)
+    raise TypeError(f"cannot compose object of type {type(thing).__name__}")
+
+
+class FunctionExecutable(Executable[Any, Any]):
+    """Wraps a sync or async function, typically to reshape data between steps."""
+
+    def __init__(
+        self,
+        func: Callable[[Any], Any],
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+    ):
+        self.func = func
+        self.name = name or getattr(func, "__name__", "function")
+        self.description = description or (inspect.getdoc(func) or "")
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        return {"type": "object"}
+
+    @property
+    def _native_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.func)
+
+    @timeout_kwarg
+    def invoke(self, input: Any, **kwargs: Any) -> Any:
+        if inspect.iscoroutinefunction(self.func):
+            return asyncio.run(self.func(input))
+        return self.func(input)
+
+    @timeout_kwarg
+    async def ainvoke(
+        self,
+        input: Any,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> Any:
+        if inspect.iscoroutinefunction(self.func):
+            return await self.func(input)
+        return await run_in_executor(executor, self.func, input)
+
+
+class SequenceExecutable(Executable[Any, Any]):
+    """Runs steps one after another, feeding each output into the next step.
+
+    Keyword arguments are passed to every step. Streaming runs all but the
+    last step to completion and then streams the last one.
+    """
+
+    def __init__(self, *steps: ExecutableLike):
+        if len(steps) < 2:
+            raise ValueError("a sequence needs at least two steps")
+        self.steps: list[Executable] = []
+        for step in map(coerce_to_executable, steps):
+            if isinstance(step, SequenceExecutable):
+                self.steps.extend(step.steps)
+            else:
+                self.steps.append(step)
+        self.name = " | ".join(step.name for step in self.steps)
+        self.description = self.steps[0].description
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        return self.steps[0].input_schema
+
+    @property
+    def _native_async(self) -> bool:
+        return all(step._native_async for step in self.steps)
+
+    @timeout_kwarg
+    def invoke(self, input: Any, **kwargs: Any) -> Any:
+        for step in self.steps:
+            input = step.invoke(input, **kwargs)
+        return input
+
+    @timeout_kwarg
+    async def ainvoke(
+        self,
+        input: Any,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> Any:
+        for step in self.steps:
+            input = await step.ainvoke(input, executor=executor, **kwargs)
+        return input
+
+    def stream(self, input: Any, **kwargs: Any) -> Iterator[Any]:
+        for step in self.steps[:-1]:
+            input = step.invoke(input, **kwargs)
+        yield from self.steps[-1].stream(input, **kwargs)
+
+    async def astream(self, input: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        for step in self.steps[:-1]:
+            input = await step.ainvoke(input, **kwargs)
+        async for chunk in self.steps[-1].astream(input, **kwargs):
+            yield chunk
+
+
+class ParallelExecutable(Executable[Any, Dict[str, Any]]):
+    """Runs every branch on the same input concurrently and returns ``{key: output}``.
+
+    ``invoke`` runs branches on the shared executor, ``ainvoke`` gathers their
+    ``ainvoke`` coroutines. The first failing branch cancels the others.
+    """
+
+    def __init__(self, branches: Dict[str, ExecutableLike]):
+        if not branches:
+            raise ValueError("a parallel map needs at least one branch")
+        self.branches: Dict[str, Executable] = {
+            key: coerce_to_executable(branch) for key, branch in branches.items()
+        }
+        self.name = "parallel(" + ", ".join(self.branches) + ")"
+        self.description = "; ".join(
+            b.description for b in self.branches.values() if b.description
+        )
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        properties: Dict[str, Any] = {}
+        required: list[str] = []
+        for branch in self.branches.values():
+            schema = branch.input_schema or {}
+            properties.update(schema.get("properties", {}))
+            required.extend(r for r in schema.get("required", []) if r not in required)
+        return {"type": "object", "properties": properties, "required": required}
+
+    @property
+    def _native_async(self) -> bool:
+        return all(branch._native_async for branch in self.branches.values())
+
+    @timeout_kwarg
+    def invoke(self, input: Any, **kwargs: Any) -> Dict[str, Any]:
+        branches = list(self.branches.values())
+        outputs = map_ordered(lambda branch: branch.invoke(input, **kwargs), branches)
+        return dict(zip(self.branches, outputs))
+
+    @timeout_kwarg
+    async def ainvoke(
+        self,
+        input: Any,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        tasks = [
+            asyncio.ensure_future(branch.ainvoke(input, executor=executor, **kwargs))
+            for branch in self.branches.values()
+        ]
+        try:
+            outputs = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return dict(zip(self.branches, outputs))
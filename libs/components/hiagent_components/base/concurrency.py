@@ -0,0 +1,262 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Union
+
+from hiagent_components.base.base import Executable, Input, Output
+from hiagent_components.base.deadline import (
+    DeadlineExceededError,
+    remaining_time,
+    timeout_kwarg,
+)
+
+
+@dataclass
+class LimiterStats:
+    acquired: int = 0
+    # calls that had to queue for a slot
+    queued: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+
+class _SyncWaiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+    def grant(self) -> None:
+        self.granted = True
+        self.event.set()
+
+
+class _AsyncWaiter:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+        self.granted = False
+
+    def grant(self) -> None:
+        self.granted = True
+        self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """A counting semaphore usable from threads and event loops at the same time.
+
+    Slots are handed to waiters in FIFO order regardless of whether they wait
+    synchronously or asynchronously. Waiting honours the current deadline.
+    """
+
+    def __init__(self, name: str, limit: int):
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.name = name
+        self.limit = limit
+        self.in_use = 0
+        self.stats = LimiterStats()
+        self._waiters: deque[Union[_SyncWaiter, _AsyncWaiter]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def set_limit(self, limit: int) -> None:
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        with self._lock:
+            self.limit = limit
+            self._grant_locked()
+
+    def _grant_locked(self) -> None:
+        while self._waiters and self.in_use < self.limit:
+            self.in_use += 1
+            self._waiters.popleft().grant()
+
+    def _try_acquire_locked(self) -> bool:
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            return True
+        return False
+
+    def _observe(self, waited: float, queued: bool) -> None:
+        with self._lock:
+            self.stats.acquired += 1
+            self.stats.total_wait += waited
+            self.stats.max_wait = max(self.stats.max_wait, waited)
+            if queued:
+                self.stats.queued += 1
+
+    def acquire(self) -> float:
+        """Block until a slot is free and return the seconds spent waiting."""
+        start = time.perf_counter()
+        with self._lock:
+            if self._try_acquire_locked():
+                waiter = None
+            else:
+                waiter = _SyncWaiter()
+                self._waiters.append(waiter)
+        if waiter is not None and not waiter.event.wait(remaining_time()):
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    raise DeadlineExceededError(
+                        f"deadline exceeded waiting for concurrency limit {self.name}"
+                    )
+        waited = time.perf_counter() - start
+        self._observe(waited, waiter is not None)
+        return waited
+
+    async def aacquire(self) -> float:
+        """Wait for a slot without blocking the event loop."""
+        start = time.perf_counter()
+        with self._lock:
+            if self._try_acquire_locked():
+                waiter = None
+            else:
+                waiter = _AsyncWaiter(asyncio.get_running_loop())
+                self._waiters.append(waiter)
+        if waiter is not None:
+            remaining = remaining_time()
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(waiter.future),
+                    None if remaining is None else max(remaining, 0),
+                )
+            except BaseException as e:
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._waiters.remove(waiter)
+                if granted:
+                    self.release()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise DeadlineExceededError(
+                        f"deadline exceeded waiting for concurrency limit {self.name}"
+                    )
+                raise
+        waited = time.perf_counter() - start
+        self._observe(waited, waiter is not None)
+        return waited
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_use -= 1
+            self._grant_locked()
+
+    @contextmanager
+    def slot(self) -> Iterator[float]:
+        waited = self.acquire()
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[float]:
+        waited = await self.aacquire()
+        try:
+            yield waited
+        finally:
+            self.release()
+
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(
+    name: str, limit: Optional[int] = None
+) -> ConcurrencyLimiter:
+    """Return the process wide limiter registered under ``name``.
+
+    ``limit`` is required when the limiter does not exist yet; passing a
+    different limit for an existing limiter changes it.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            if limit is None:
+                raise KeyError(f"no concurrency limiter named {name}")
+            limiter = _limiters[name] = ConcurrencyLimiter(name, limit)
+            return limiter
+    if limit is not None and limit != limiter.limit:
+        limiter.set_limit(limit)
+    return limiter
+
+
+def concurrency_limiters() -> Dict[str, ConcurrencyLimiter]:
+    with _limiters_lock:
+        return dict(_limiters)
+
+
+class ConcurrencyLimitedExecutable(Executable[Input, Output]):
+    """Runs the executable only while holding a slot of a shared limiter."""
+
+    def __init__(
+        self, executable: Executable[Input, Output], limiter: ConcurrencyLimiter
+    ):
+        self.executable = executable
+        self.limiter = limiter
+        self.name = getattr(executable, "name", "")
+        self.description = getattr(executable, "description", "")
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        return self.executable.input_schema
+
+    @property
+    def _native_async(self) -> bool:
+        return self.executable._native_async
+
+    @timeout_kwarg
+    def invoke(self, input: Input, **kwargs: Any) -> Output:
+        with self.limiter.slot():
+            return self.executable.invoke(input, **kwargs)
+
+    @timeout_kwarg
+    async def ainvoke(
+        self,
+        input: Input,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> Output:
+        async with self.limiter.aslot():
+            return await self.executable.ainvoke(input, executor=executor, **kwargs)
+
+    def stream(self, input: Input, **kwargs: Any) -> Iterator[Output]:
+        with self.limiter.slot():
+            yield from self.executable.stream(input, **kwargs)
+
+    async def astream(self, input: Input, **kwargs: Any) -> AsyncIterator[Output]:
+        async with self.limiter.aslot():
+            async for chunk in self.executable.astream(input, **kwargs):
+                yield chunk
@@ -0,0 +1,103 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import inspect
+from functools import wraps
+from typing import Any, Callable, Iterator, TypeVar
+
+from hiagent_api.deadline import (
+    DeadlineExceededError,
+    cancel_scope,
+    check_deadline,
+    deadline,
+    remaining_time,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+__all__ = [
+    "DeadlineExceededError",
+    "cancel_scope",
+    "check_deadline",
+    "deadline",
+    "remaining_time",
+    "poll_interval",
+    "poll_intervals",
+    "timeout_kwarg",
+    "wait_with_deadline",
+]
+
+
+def poll_interval(interval: float) -> float:
+    """Seconds to sleep before the next poll, shortened to the remaining deadline."""
+    check_deadline()
+    remaining = remaining_time()
+    return interval if remaining is None else min(interval, remaining)
+
+
+def poll_intervals(
+    initial: float = 0.1, maximum: float = 2.0, factor: float = 2.0
+) -> Iterator[float]:
+    """Exponentially growing poll intervals, capped at ``maximum`` and the deadline.
+
+    Short jobs are noticed quickly while long ones are polled at most every
+    ``maximum`` seconds.
+    """
+    interval = initial
+    while True:
+        yield poll_interval(interval)
+        interval = min(interval * factor, maximum)
+
+
+async def wait_with_deadline(awaitable: Any) -> Any:
+    """Await under the current deadline, raising ``DeadlineExceededError`` when it passes."""
+    remaining = remaining_time()
+    if remaining is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, max(remaining, 0))
+    except asyncio.TimeoutError:
+        raise DeadlineExceededError("deadline exceeded")
+
+
+def timeout_kwarg(func: F) -> F:
+    """Let ``invoke``/``ainvoke`` accept ``timeout=<seconds>``.
+
+    The timeout becomes a deadline for everything the call does, including
+    nested executables, retries, polling and the HTTP requests underneath,
+    and is not passed on to ``func``.
+    """
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def awrapper(*args: Any, **kwargs: Any) -> Any:
+            timeout = kwargs.pop("timeout", None)
+            if timeout is None:
+                return await func(*args, **kwargs)
+            with deadline(timeout):
+                return await wait_with_deadline(func(*args, **kwargs))
+
+        return awrapper  # type: ignore[return-value]
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        timeout = kwargs.pop("timeout", None)
+        if timeout is None:
+            return func(*args, **kwargs)
+        with deadline(timeout):
+            return func(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
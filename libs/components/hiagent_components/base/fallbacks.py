@@ -0,0 +1,285 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple, Type
+
+from hiagent_components.base.base import Executable, Input, Output
+from hiagent_components.base.deadline import cancel_scope, timeout_kwarg
+from hiagent_components.base.utils import (
+    get_shared_executor,
+    in_worker_thread,
+    submit_in_context,
+)
+
+
+@dataclass
+class FallbackRecord:
+    """Which candidate served a request; ``index`` 0 is the primary."""
+
+    index: int
+    name: str
+    elapsed: float
+    # candidates that raised, and candidates that were still running when
+    # the next one was started because of the latency budget
+    failed: int = 0
+    timed_out: int = 0
+
+
+class FallbackExecutable(Executable[Input, Output]):
+    """Serves a request from the primary or, failing that, from the fallbacks in order.
+
+    A fallback starts as soon as the previous candidate raises one of ``on``,
+    or once it has been running for ``timeout`` seconds. Slow candidates keep
+    running and the first successful result wins. With ``race`` every
+    candidate starts at once. Exceptions outside ``on`` are raised as is.
+
+    Candidates run under the caller's deadline. Once a result is returned the
+    others are cancelled: async candidates at their next ``await``, thread
+    candidates cooperatively, at their next deadline check, poll or request
+    (see ``cancel_scope``). A thread candidate blocked inside a request that
+    was already sent, or in code that never checks the deadline, keeps its
+    executor thread until that returns; bound such candidates with a
+    deadline (``timeout=`` on the call) to bound the threads they hold.
+    """
+
+    def __init__(
+        self,
+        executable: Executable[Input, Output],
+        fallbacks: Sequence[Executable[Input, Output]],
+        timeout: Optional[float] = None,
+        on: Tuple[Type[BaseException], ...] = (Exception,),
+        race: bool = False,
+        history_size: int = 1000,
+    ):
+        if not fallbacks:
+            raise ValueError("at least one fallback is required")
+        self.executable = executable
+        self.fallbacks = list(fallbacks)
+        self.timeout = timeout
+        self.on = on
+        self.race = race
+        self.name = getattr(executable, "name", "")
+        self.description = getattr(executable, "description", "")
+        self.served: Counter[str] = Counter()
+        self.records: deque[FallbackRecord] = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    @property
+    def candidates(self) -> list[Executable[Input, Output]]:
+        return [self.executable, *self.fallbacks]
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        return self.executable.input_schema
+
+    @property
+    def _native_async(self) -> bool:
+        return all(c._native_async for c in self.candidates)
+
+    def _record(self, index: int, start: float, failed: int, timed_out: int) -> None:
+        candidate = self.candidates[index]
+        name = getattr(candidate, "name", "") or f"#{index}"
+        record = FallbackRecord(
+            index, name, time.perf_counter() - start, failed, timed_out
+        )
+        with self._lock:
+            self.served[name] += 1
+            self.records.append(record)
+
+    def _next_launch_wait(self, launched_at: float) -> Optional[float]:
+        if self.timeout is None:
+            return None
+        return max(0.0, launched_at + self.timeout - time.perf_counter())
+
+    @timeout_kwarg
+    def invoke(self, input: Input, **kwargs: Any) -> Output:
+        candidates = self.candidates
+        owned_executor = None
+        executor = get_shared_executor()
+        if in_worker_thread():
+            owned_executor = executor = ThreadPoolExecutor(len(candidates))
+        start = time.perf_counter()
+        running: Dict[Future, int] = {}
+        launched = 0
+        launched_at = start
+        failed = timed_out = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal launched, launched_at
+            future = submit_in_context(
+                executor, candidates[launched].invoke, input, **kwargs
+            )
+            running[future] = launched
+            launched += 1
+            launched_at = time.perf_counter()
+
+        with cancel_scope() as cancel:
+            launch()
+            while self.race and launched < len(candidates):
+                launch()
+            try:
+                while running:
+                    wait_timeout = (
+                        self._next_launch_wait(launched_at)
+                        if launched < len(candidates)
+                        else None
+                    )
+                    done, _ = wait(
+                        running, timeout=wait_timeout, return_when=FIRST_COMPLETED
+                    )
+                    if not done:
+                        timed_out += 1
+                        launch()
+                        continue
+                    for future in sorted(done, key=running.__getitem__):
+                        index = running.pop(future)
+                        error = future.exception()
+                        if error is None:
+                            self._record(index, start, failed, timed_out)
+                            return future.result()
+                        if not isinstance(error, self.on):
+                            raise error
+                        failed += 1
+                        last_error = error
+                        if launched < len(candidates):
+                            launch()
+            finally:
+                # stops candidates that already started at their next
+                # deadline check, the ones still queued never start
+                cancel.set()
+                for future in running:
+                    future.cancel()
+                if owned_executor is not None:
+                    owned_executor.shutdown(wait=False)
+        assert last_error is not None
+        raise last_error
+
+    @timeout_kwarg
+    async def ainvoke(
+        self,
+        input: Input,
+        executor: Optional[Executor] = None,
+        **kwargs: Any,
+    ) -> Output:
+        candidates = self.candidates
+        start = time.perf_counter()
+        running: Dict[asyncio.Future, int] = {}
+        launched = 0
+        launched_at = start
+        failed = timed_out = 0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal launched, launched_at
+            task = asyncio.ensure_future(
+                candidates[launched].ainvoke(input, executor=executor, **kwargs)
+            )
+            running[task] = launched
+            launched += 1
+            launched_at = time.perf_counter()
+
+        with cancel_scope() as cancel:
+            launch()
+            while self.race and launched < len(candidates):
+                launch()
+            try:
+                while running:
+                    wait_timeout = (
+                        self._next_launch_wait(launched_at)
+                        if launched < len(candidates)
+                        else None
+                    )
+                    done, _ = await asyncio.wait(
+                        running,
+                        timeout=wait_timeout,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if not done:
+                        timed_out += 1
+                        launch()
+                        continue
+                    for task in sorted(done, key=running.__getitem__):
+                        index = running.pop(task)
+                        error = task.exception()
+                        if error is None:
+                            self._record(index, start, failed, timed_out)
+                            return task.result()
+                        if not isinstance(error, self.on):
+                            raise error
+                        failed += 1
+                        last_error = error
+                        if launched < len(candidates):
+                            launch()
+            finally:
+                # cancelling a task does not stop a candidate running in an
+                # executor thread, the event does at its next deadline check
+                cancel.set()
+                for task in running:
+                    task.cancel()
+                if running:
+                    await asyncio.gather(*running, return_exceptions=True)
+        assert last_error is not None
+        raise last_error
+
+    def stream(self, input: Input, **kwargs: Any) -> Iterator[Output]:
+        # streams can only fall back before the first chunk has been emitted
+        start = time.perf_counter()
+        for index, candidate in enumerate(self.candidates):
+            iterator = iter(candidate.stream(input, **kwargs))
+            try:
+                first = next(iterator)
+            except StopIteration:
+                self._record(index, start, index, 0)
+                return
+            except self.on:
+                if index == len(self.candidates) - 1:
+                    raise
+                continue
+            self._record(index, start, index, 0)
+            yield first
+            yield from iterator
+            return
+
+    async def astream(self, input: Input, **kwargs: Any) -> AsyncIterator[Output]:
+        start = time.perf_counter()
+        for index, candidate in enumerate(self.candidates):
+            iterator = candidate.astream(input, **kwargs).__aiter__()
+            try:
+                first = await iterator.__anext__()
+            except StopAsyncIteration:
+                self._record(index, start, index, 0)
+                return
+            except self.on:
+                if index == len(self.candidates) - 1:
+                    raise
+                continue
+            self._record(index, start, index, 0)
+            yield first
+            async for chunk in iterator:
+                yield chunk
+            return
@@ -12,12 +12,47 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import asyncio
-from concurrent.futures import Executor, ThreadPoolExecutor
+import contextvars
+import sys
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
 from contextlib import contextmanager
-from typing import Any, Callable, Coroutine, Optional, ParamSpec, TypeVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    ParamSpec,
+    Tuple,
+    TypeVar,
+)
+
+from hiagent_api.deadline import deadline
 
 P = ParamSpec("P")
 T = TypeVar("T")
+R = TypeVar("R")
+
+# batch items mostly wait on HTTP, so the pool is sized for I/O rather than
+# for the number of CPUs
+SHARED_EXECUTOR_WORKERS = 64
+
+_shared_executor: Optional[Executor] = None
+_shared_executor_lock = threading.Lock()
+_worker_state = threading.local()
 
 
 async def run_in_executor(
@@ -27,12 +62,83 @@ async def run_in_executor(
     **kwargs: P.kwargs,
 ) -> T:
     def wrapper() -> T:
+        _worker_state.active = True
         try:
             return func(*args, **kwargs)
         except StopIteration as exc:
             raise RuntimeError from exc
+        finally:
+            _worker_state.active = False
+
+    # executor threads do not inherit context variables such as the call deadline
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, ctx.run, wrapper)
+
+
+def get_shared_executor() -> Executor:
+    """Return the process wide executor used by batch calls, creating it lazily."""
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_executor_lock:
+            if _shared_executor is None:
+                _shared_executor = ThreadPoolExecutor(
+                    max_workers=SHARED_EXECUTOR_WORKERS,
+                    thread_name_prefix="hiagent-batch",
+                )
+    return _shared_executor
+
+
+def executor_for(workers: int) -> Tuple[Executor, Optional[Executor]]:
+    """Return ``(executor, owned)`` for running ``workers`` items at once.
+
+    That is the shared executor, unless it has fewer threads than ``workers``
+    or the caller already runs on it; then ``owned`` is a new pool of
+    ``workers`` threads that the caller must shut down.
+    """
+    executor = get_shared_executor()
+    capacity = getattr(executor, "_max_workers", None)
+    if in_worker_thread() or (capacity is not None and workers > capacity):
+        owned = ThreadPoolExecutor(max_workers=max(1, workers))
+        return owned, owned
+    return executor, None
+
+
+def set_shared_executor(executor: Optional[Executor]) -> Optional[Executor]:
+    """Replace the shared executor and return the previous one.
 
-    return await asyncio.get_running_loop().run_in_executor(executor, wrapper)
+    Passing None makes the next batch call create a default executor. The
+    previous executor is not shut down, that is left to the caller.
+    """
+    global _shared_executor
+    with _shared_executor_lock:
+        previous, _shared_executor = _shared_executor, executor
+    return previous
+
+
+def in_worker_thread() -> bool:
+    """Whether the current thread is running an item submitted by these helpers.
+
+    Work nested inside such an item (e.g. a parallel step inside a batched
+    item) must not wait on the shared executor, which the outer batch may
+    already occupy entirely.
+    """
+    return getattr(_worker_state, "active", False)
+
+
+def submit_in_context(
+    executor: Executor, func: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+) -> Future:
+    """Submit ``func`` with the caller's context variables, marked as worker work."""
+    ctx = contextvars.copy_context()
+
+    def run() -> T:
+        _worker_state.active = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _worker_state.active = False
+
+    return executor.submit(ctx.run, run)
 
 
 @contextmanager
@@ -59,3 +165,184 @@ async def gather_with_concurrency(
     semaphore = asyncio.Semaphore(max_parallel)
 
     return await asyncio.gather(*(gated_coro(semaphore, c) for c in coros))
+
+
+def map_as_completed(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_parallel: Optional[int] = None,
+    return_exceptions: bool = False,
+    timeout: Optional[float] = None,
+    executor: Optional[Executor] = None,
+) -> Iterator[Tuple[int, Any]]:
+    """Run ``func`` over ``items`` on an executor, yielding ``(index, result)`` as items finish.
+
+    At most ``max_parallel`` items are in flight at once. ``timeout`` applies to
+    each item from the moment it starts running and raises ``TimeoutError``.
+    Unless ``return_exceptions`` is set, the first failure cancels the items
+    that have not started yet and is re-raised; closing the generator early
+    cancels them as well. Threads that are already running cannot be
+    interrupted and finish in the background.
+    """
+    owned_executor = None
+    if executor is None:
+        items = list(items)
+        executor, owned_executor = executor_for(
+            min(len(items), max_parallel or len(items))
+        )
+    started: Dict[int, float] = {}
+    cancelled = threading.Event()
+
+    def run(index: int, item: T) -> R:
+        if cancelled.is_set():
+            raise CancelledError()
+        started[index] = time.monotonic()
+        _worker_state.active = True
+        try:
+            with deadline(timeout):
+                return func(item)
+        finally:
+            _worker_state.active = False
+
+    pending: Dict[Future, int] = {}
+    queue = iter(enumerate(items))
+
+    def submit_next() -> bool:
+        for index, item in queue:
+            ctx = contextvars.copy_context()
+            pending[executor.submit(ctx.run, run, index, item)] = index
+            return True
+        return False
+
+    def failed(index: int, error: Exception) -> Tuple[int, Exception]:
+        if not return_exceptions:
+            raise error
+        return index, error
+
+    try:
+        for _ in range(max_parallel or sys.maxsize):
+            if not submit_next():
+                break
+        while pending:
+            wait_timeout = None
+            if timeout is not None:
+                deadlines = [
+                    started[i] + timeout for i in pending.values() if i in started
+                ]
+                wait_timeout = (
+                    max(0.0, min(deadlines) - time.monotonic())
+                    if deadlines
+                    else timeout
+                )
+            done, _ = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                submit_next()
+                try:
+                    result = index, future.result()
+                except Exception as e:
+                    result = failed(index, e)
+                yield result
+            if timeout is not None:
+                now = time.monotonic()
+                for future, index in list(pending.items()):
+                    if index in started and now - started[index] >= timeout:
+                        pending.pop(future)
+                        submit_next()
+                        yield failed(
+                            index,
+                            TimeoutError(f"item {index} timed out after {timeout}s"),
+                        )
+    finally:
+        if pending:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+        if owned_executor is not None:
+            owned_executor.shutdown(wait=False)
+
+
+def map_ordered(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_parallel: Optional[int] = None,
+    return_exceptions: bool = False,
+    timeout: Optional[float] = None,
+    executor: Optional[Executor] = None,
+) -> list[Any]:
+    """Like :func:`map_as_completed` but returns the results in input order."""
+    items = list(items)
+    results: list[Any] = [None] * len(items)
+    for index, result in map_as_completed(
+        func, items, max_parallel, return_exceptions, timeout, executor
+    ):
+        results[index] = result
+    return results
+
+
+async def amap_as_completed(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    max_parallel: Optional[int] = None,
+    return_exceptions: bool = False,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Async counterpart of :func:`map_as_completed`, concurrency is bounded by a semaphore.
+
+    Each item's coroutine is created only once it holds a concurrency slot, so
+    ``timeout`` covers its own run time. On failure, or when the generator is
+    closed early, the remaining tasks are cancelled.
+    """
+    semaphore = asyncio.Semaphore(max_parallel) if max_parallel else None
+
+    async def run(index: int, item: T) -> Any:
+        try:
+            if timeout is None:
+                return await func(item)
+            try:
+                with deadline(timeout):
+                    return await asyncio.wait_for(func(item), timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"item {index} timed out after {timeout}s")
+        except Exception as e:
+            if return_exceptions:
+                return e
+            raise
+
+    async def gated(index: int, item: T) -> Any:
+        if semaphore is None:
+            return await run(index, item)
+        async with semaphore:
+            return await run(index, item)
+
+    tasks = {asyncio.ensure_future(gated(i, item)): i for i, item in enumerate(items)}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in sorted(done, key=tasks.__getitem__):
+                yield tasks[task], task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        # retrieve outstanding results so failures are not reported as unhandled
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def amap_ordered(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    max_parallel: Optional[int] = None,
+    return_exceptions: bool = False,
+    timeout: Optional[float] = None,
+) -> list[Any]:
+    """Like :func:`amap_as_completed` but returns the results in input order."""
+    items = list(items)
+    results: list[Any] = [None] * len(items)
+    async for index, result in amap_as_completed(
+        func, items, max_parallel, return_exceptions, timeout
+    ):
+        results[index] = result
+    return results
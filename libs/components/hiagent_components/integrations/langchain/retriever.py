@@ -11,7 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import List
+from typing import List, Optional
 
 from langchain_core.callbacks import (
     AsyncCallbackManagerForRetrieverRun,
@@ -21,15 +21,22 @@ from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever as LangChainBaseRetriever
 
 from hiagent_components.retriever.base import BaseRetriever
+from hiagent_components.retriever.dedup import NearDuplicateFilter
 
 
 class LangChainRetriever(LangChainBaseRetriever):
     retriever: BaseRetriever
+    near_duplicate_filter: Optional[NearDuplicateFilter] = None
 
     @classmethod
-    def from_retriever(cls, retriever: BaseRetriever) -> "LangChainRetriever":
+    def from_retriever(
+        cls,
+        retriever: BaseRetriever,
+        near_duplicate_filter: Optional[NearDuplicateFilter] = None,
+    ) -> "LangChainRetriever":
         return cls(
             retriever=retriever,
+            near_duplicate_filter=near_duplicate_filter,
         )
 
     def _get_relevant_documents(
@@ -42,6 +49,8 @@ class LangChainRetriever(LangChainBaseRetriever):
         )
 
         docs = resp.results
+        if self.near_duplicate_filter is not None:
+            docs = self.near_duplicate_filter.filter(docs)
         res = []
         for doc in docs:
             res.append(
@@ -61,6 +70,8 @@ class LangChainRetriever(LangChainBaseRetriever):
         )
 
         docs = resp.results
+        if self.near_duplicate_filter is not None:
+            docs = self.near_duplicate_filter.filter(docs)
         res = []
         for doc in docs:
             res.append(
@@ -0,0 +1,217 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from hiagent_api.chat import ChatService
+from hiagent_api.tool import ToolService
+from hiagent_api.workflow import WorkflowService
+from typing_extensions import Self
+
+from hiagent_components.agent import Agent
+from hiagent_components.base.utils import amap_ordered, map_ordered
+from hiagent_components.tool import Tool
+from hiagent_components.workflow import Workflow
+
+logger = logging.getLogger(__name__)
+
+Kind = Literal["tool", "workflow", "agent"]
+
+
+@dataclass
+class _Item:
+    kind: Kind
+    key: Hashable
+    init: Callable[[], Any]
+    ainit: Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class LoadFailure:
+    kind: Kind
+    key: Hashable
+    error: BaseException
+
+
+@dataclass
+class LoadResult:
+    """Components by tool ID, workflow ID and ``(app_key, user_id)``, plus what
+    failed."""
+
+    tools: Dict[str, Tool] = field(default_factory=dict)
+    workflows: Dict[str, Workflow] = field(default_factory=dict)
+    agents: Dict[Tuple[str, str], Agent] = field(default_factory=dict)
+    failures: List[LoadFailure] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def components(self) -> List[Any]:
+        return [*self.tools.values(), *self.workflows.values(), *self.agents.values()]
+
+
+class ComponentLoader:
+    """Builds many tools, workflows and agents concurrently.
+
+    Register components with ``add_*`` and build them all with ``load`` or
+    ``aload``; at most ``max_parallel`` metadata requests are in flight and
+    each component gets ``timeout`` seconds, which also bounds the requests
+    it makes. A component that fails to load is reported in
+    ``LoadResult.failures`` without affecting the others. Agents are keyed by
+    ``(app_key, user_id)``; registering the same tool ID, workflow ID or agent
+    key twice raises ``ValueError``. Loading also fills the validator cache,
+    so later ``init`` calls for the same input schemas skip compiling them.
+    """
+
+    def __init__(self, max_parallel: int = 16, timeout: Optional[float] = None):
+        if max_parallel < 1:
+            raise ValueError("max_parallel must be at least 1")
+        self.max_parallel = max_parallel
+        self.timeout = timeout
+        self._items: Dict[tuple, _Item] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _add(self, kind: Kind, key: Hashable, cls: Any, kwargs: Dict[str, Any]) -> Self:
+        if (kind, key) in self._items:
+            raise ValueError(f"{kind} {key} is already registered")
+        self._items[(kind, key)] = _Item(
+            kind=kind,
+            key=key,
+            init=lambda: cls.init(**kwargs),
+            ainit=lambda: cls.ainit(**kwargs),
+        )
+        return self
+
+    def add_tool(
+        self, svc: ToolService, workspace_id: str, tool_id: str, **kwargs: Any
+    ) -> Self:
+        """Register a tool; ``kwargs`` are passed on to ``Tool.init``."""
+        kwargs.update(svc=svc, workspace_id=workspace_id, tool_id=tool_id)
+        return self._add("tool", tool_id, Tool, kwargs)
+
+    def add_tools(
+        self,
+        svc: ToolService,
+        workspace_id: str,
+        tool_ids: Sequence[str],
+        **kwargs: Any,
+    ) -> Self:
+        for tool_id in tool_ids:
+            self.add_tool(svc, workspace_id, tool_id, **kwargs)
+        return self
+
+    def add_workflow(
+        self,
+        svc: WorkflowService,
+        app_key: str,
+        workspace_id: str,
+        workflow_id: str,
+        user_id: str,
+        workflow_cls: type[Workflow] = Workflow,
+        **kwargs: Any,
+    ) -> Self:
+        """Register a workflow; ``kwargs`` are passed on to ``Workflow.init``."""
+        kwargs.update(
+            svc=svc,
+            app_key=app_key,
+            workspace_id=workspace_id,
+            workflow_id=workflow_id,
+            user_id=user_id,
+        )
+        return self._add("workflow", workflow_id, workflow_cls, kwargs)
+
+    def add_agent(
+        self,
+        svc: ChatService,
+        app_key: str,
+        user_id: str,
+        variables: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> Self:
+        """Register an agent; ``kwargs`` are passed on to ``Agent.init``."""
+        kwargs.update(
+            svc=svc, app_key=app_key, user_id=user_id, variables=variables or {}
+        )
+        return self._add("agent", (app_key, user_id), Agent, kwargs)
+
+    def _collect(
+        self, items: List[_Item], outcomes: List[Any], elapsed: float
+    ) -> LoadResult:
+        result = LoadResult(elapsed=elapsed)
+        targets = {
+            "tool": result.tools,
+            "workflow": result.workflows,
+            "agent": result.agents,
+        }
+        for item, outcome in zip(items, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("failed to load %s %s: %r", item.kind, item.key, outcome)
+                result.failures.append(LoadFailure(item.kind, item.key, outcome))
+            else:
+                targets[item.kind][item.key] = outcome
+        return result
+
+    def load(self) -> LoadResult:
+        """Build every registered component on ``max_parallel`` threads of its own,
+        since the requests mostly wait on the network."""
+        items = list(self._items.values())
+        if not items:
+            return LoadResult()
+        start = time.perf_counter()
+        executor = ThreadPoolExecutor(min(self.max_parallel, len(items)))
+        try:
+            outcomes = map_ordered(
+                lambda item: item.init(),
+                items,
+                max_parallel=self.max_parallel,
+                return_exceptions=True,
+                timeout=self.timeout,
+                executor=executor,
+            )
+        finally:
+            # components that timed out finish in the background
+            executor.shutdown(wait=False)
+        return self._collect(items, outcomes, time.perf_counter() - start)
+
+    async def aload(self) -> LoadResult:
+        items = list(self._items.values())
+        start = time.perf_counter()
+        outcomes = await amap_ordered(
+            lambda item: item.ainit(),
+            items,
+            max_parallel=self.max_parallel,
+            return_exceptions=True,
+            timeout=self.timeout,
+        )
+        return self._collect(items, outcomes, time.perf_counter() - start)
@@ -17,5 +17,28 @@ from hiagent_components.retriever.base import (
     QARetriever,
     TerminologyRetriever,
 )
+from hiagent_components.retriever.dedup import NearDuplicateFilter
+from hiagent_components.retriever.fusion import (
+    FusedQueryResponse,
+    FusionRetriever,
+    fuse_results,
+)
+from hiagent_components.retriever.packing import (
+    PackedContext,
+    approximate_tokens,
+    pack_context,
+)
 
-__all__ = ["BaseRetriever", "KnowledgeRetriever", "QARetriever", "TerminologyRetriever"]
+__all__ = [
+    "BaseRetriever",
+    "FusedQueryResponse",
+    "FusionRetriever",
+    "KnowledgeRetriever",
+    "NearDuplicateFilter",
+    "PackedContext",
+    "QARetriever",
+    "TerminologyRetriever",
+    "approximate_tokens",
+    "fuse_results",
+    "pack_context",
+]
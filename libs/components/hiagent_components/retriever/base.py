@@ -11,13 +11,75 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from concurrent.futures import Executor
-from typing import Any, Optional
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from heapq import nlargest
+from typing import Any, Dict, Iterable, List, Optional
 
+from hiagent_api.instrumentation import DEFAULT_BUCKETS, Histogram
 from hiagent_api.knowledgebase import KnowledgebaseService
-from hiagent_api.knowledgebase_types import QueryRequest, QueryResponse
+from hiagent_api.knowledgebase_types import QueryRequest, QueryResponse, Result
 
 from hiagent_components.base import Executable
+from hiagent_components.base.callbacks import traced
+from hiagent_components.base.deadline import (
+    DeadlineExceededError,
+    deadline,
+    remaining_time,
+    timeout_kwarg,
+    wait_with_deadline,
+)
+from hiagent_components.base.utils import (
+    get_shared_executor,
+    in_worker_thread,
+    submit_in_context,
+)
+from hiagent_components.retriever.fusion import FusedQueryResponse
+
+logger = logging.getLogger(__name__)
+
+
+class _ShardMetrics:
+    """每个知识库分片的耗时直方图与失败、超时次数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, dict] = {}
+
+    def _get(self, dataset_id: str) -> dict:
+        stats = self._stats.get(dataset_id)
+        if stats is None:
+            stats = self._stats[dataset_id] = {
+                "latency": Histogram(DEFAULT_BUCKETS),
+                "calls": 0,
+                "errors": 0,
+                "timeouts": 0,
+            }
+        return stats
+
+    def record(self, dataset_id: str, elapsed: Optional[float], outcome: str) -> None:
+        with self._lock:
+            stats = self._get(dataset_id)
+            stats["calls"] += 1
+            if elapsed is not None:
+                stats["latency"].observe(elapsed)
+            if outcome != "ok":
+                stats[outcome] += 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                dataset_id: {**stats, "latency": stats["latency"].summary()}
+                for dataset_id, stats in self._stats.items()
+            }
+
+
+def _merge(best: List[Result], results: Iterable[Result], top_k: int) -> List[Result]:
+    return nlargest(top_k, [*best, *results], key=lambda r: r.score)
 
 
 class BaseRetriever(Executable):
@@ -35,6 +97,7 @@ class BaseRetriever(Executable):
         expand_num: int = 1,
         type: int = 1,
         retrieval_search_method: int = 0,
+        shard_by_dataset: bool = False,
     ):
         """
         初始化
@@ -51,6 +114,8 @@ class BaseRetriever(Executable):
             expand_num: 膨胀系数，1~3
             type: 检索类型, 1-知识库，2-问答库, 3-术语库
             retrieval_search_method: 检索方法 0-语义检索，1-全文检索，2-混合检索
+            shard_by_dataset: 每个知识库单独并发检索并按得分合并；截止时间到达时
+                返回已到达的结果，并在 FusedQueryResponse 中标记 partial 和未返回的知识库
         """
         self.svc = svc
         self.dataset_ids = dataset_ids
@@ -61,9 +126,11 @@ class BaseRetriever(Executable):
         self.expand_num = expand_num
         self.type = type
         self.retrieval_search_method = retrieval_search_method
+        self.shard_by_dataset = shard_by_dataset
         self.name = name
         self.description = description
         self.workspace_id = workspace_id
+        self._shard_metrics = _ShardMetrics()
 
     @property
     def input_schema(self):
@@ -78,49 +145,168 @@ class BaseRetriever(Executable):
             "required": ["query"],
         }
 
-    def invoke(self, input: dict, **kwargs: Any) -> QueryResponse:
+    @property
+    def _sharded(self) -> bool:
+        return self.shard_by_dataset and len(self.dataset_ids) > 1
+
+    def shard_metrics(self) -> Dict[str, dict]:
+        """分片检索时每个知识库的耗时统计 {dataset_id: {"latency": {...}, "calls": n, ...}}"""
+        return self._shard_metrics.snapshot()
+
+    def _request(self, query: str, dataset_ids: list[str]) -> QueryRequest:
+        return QueryRequest(
+            workspace_id=self.workspace_id,
+            dataset_ids=dataset_ids,
+            keywords=[query],
+            top_k=self.top_k,
+            score_threshold=self.score_threshold,
+            rerank_id=self.rerank_id,
+            expand=self.expand,
+            expand_num=self.expand_num,
+            type=self.type,
+            retrieval_search_method=self.retrieval_search_method,
+        )
+
+    @staticmethod
+    def _query(input: dict) -> str:
         query = input.get("query")
         if not query:
             raise ValueError("retriever invoke input should contains 'query'")
+        return query
 
-        resp = self.svc.query(
-            QueryRequest(
-                workspace_id=self.workspace_id,
-                dataset_ids=self.dataset_ids,
-                keywords=[query],
-                top_k=self.top_k,
-                score_threshold=self.score_threshold,
-                rerank_id=self.rerank_id,
-                expand=self.expand,
-                expand_num=self.expand_num,
-                type=self.type,
-                retrieval_search_method=self.retrieval_search_method,
+    def _query_shard(self, query: str, dataset_id: str) -> QueryResponse:
+        start = time.perf_counter()
+        try:
+            resp = self.svc.query(self._request(query, [dataset_id]))
+        except DeadlineExceededError:
+            self._shard_metrics.record(dataset_id, None, "timeouts")
+            raise
+        except Exception:
+            self._shard_metrics.record(
+                dataset_id, time.perf_counter() - start, "errors"
             )
-        )
+            raise
+        self._shard_metrics.record(dataset_id, time.perf_counter() - start, "ok")
+        return resp
+
+    async def _aquery_shard(self, query: str, dataset_id: str) -> QueryResponse:
+        start = time.perf_counter()
+        try:
+            resp = await self.svc.aquery(self._request(query, [dataset_id]))
+        except (DeadlineExceededError, asyncio.CancelledError):
+            self._shard_metrics.record(dataset_id, None, "timeouts")
+            raise
+        except Exception:
+            self._shard_metrics.record(
+                dataset_id, time.perf_counter() - start, "errors"
+            )
+            raise
+        self._shard_metrics.record(dataset_id, time.perf_counter() - start, "ok")
+        return resp
+
+    def _partial(
+        self, best: List[Result], answered: set, error: Optional[BaseException]
+    ) -> FusedQueryResponse:
+        missing = [d for d in self.dataset_ids if d not in answered]
+        if error is not None and not answered:
+            raise error
+        return FusedQueryResponse(results=best, partial=bool(missing), missing=missing)
+
+    def _invoke_sharded(self, query: str) -> FusedQueryResponse:
+        owned_executor = None
+        executor = get_shared_executor()
+        if in_worker_thread():
+            owned_executor = executor = ThreadPoolExecutor(len(self.dataset_ids))
+        futures = {
+            submit_in_context(
+                executor, self._query_shard, query, dataset_id
+            ): dataset_id
+            for dataset_id in self.dataset_ids
+        }
+        best: List[Result] = []
+        answered: set = set()
+        error: Optional[BaseException] = None
+        try:
+            for future in as_completed(futures, timeout=remaining_time()):
+                try:
+                    resp = future.result()
+                except DeadlineExceededError:
+                    continue
+                except Exception as e:
+                    logger.warning("dataset %s query failed: %r", futures[future], e)
+                    error = error or e
+                    continue
+                answered.add(futures[future])
+                best = _merge(best, resp.results, self.top_k)
+        except FutureTimeoutError:
+            # 截止时间已到，返回已到达的部分结果
+            pass
+        finally:
+            for future in futures:
+                future.cancel()
+            if owned_executor is not None:
+                owned_executor.shutdown(wait=False)
+        return self._partial(best, answered, error)
+
+    async def _ainvoke_sharded(self, query: str) -> FusedQueryResponse:
+        tasks = {
+            asyncio.ensure_future(self._aquery_shard(query, dataset_id)): dataset_id
+            for dataset_id in self.dataset_ids
+        }
+        best: List[Result] = []
+        answered: set = set()
+        error: Optional[BaseException] = None
+        pending = set(tasks)
+        remaining = remaining_time()
+        end = None if remaining is None else time.monotonic() + remaining
+        try:
+            while pending:
+                timeout = None if end is None else max(end - time.monotonic(), 0)
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    e = task.exception()
+                    if isinstance(e, DeadlineExceededError):
+                        continue
+                    if e is not None:
+                        logger.warning("dataset %s query failed: %r", tasks[task], e)
+                        error = error or e
+                        continue
+                    answered.add(tasks[task])
+                    best = _merge(best, task.result().results, self.top_k)
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return self._partial(best, answered, error)
+
+    @traced
+    @timeout_kwarg
+    def invoke(self, input: dict, **kwargs: Any) -> QueryResponse:
+        query = self._query(input)
+        if self._sharded:
+            return self._invoke_sharded(query)
+
+        resp = self.svc.query(self._request(query, self.dataset_ids))
 
         return resp
 
+    @traced
     async def ainvoke(
         self, input: dict, executor: Optional[Executor] = None, **kwargs: Any
     ) -> QueryResponse:
-        query = input.get("query")
-        if not query:
-            raise ValueError("retriever invoke input should contains 'query'")
+        query = self._query(input)
+        # 不使用 timeout_kwarg：分片检索需在截止时间到达时返回部分结果而不是被取消
+        with deadline(kwargs.pop("timeout", None)):
+            if self._sharded:
+                return await self._ainvoke_sharded(query)
 
-        resp = await self.svc.aquery(
-            QueryRequest(
-                workspace_id=self.workspace_id,
-                dataset_ids=self.dataset_ids,
-                keywords=[query],
-                top_k=self.top_k,
-                score_threshold=self.score_threshold,
-                rerank_id=self.rerank_id,
-                expand=self.expand,
-                expand_num=self.expand_num,
-                type=self.type,
-                retrieval_search_method=self.retrieval_search_method,
+            resp = await wait_with_deadline(
+                self.svc.aquery(self._request(query, self.dataset_ids))
             )
-        )
 
         return resp
 
@@ -139,6 +325,7 @@ class KnowledgeRetriever(BaseRetriever):
         expand: bool = False,
         expand_num: int = 1,
         retrieval_search_method: int = 0,
+        shard_by_dataset: bool = False,
     ):
         super().__init__(
             svc=svc,
@@ -152,6 +339,7 @@ class KnowledgeRetriever(BaseRetriever):
             expand=expand,
             expand_num=expand_num,
             retrieval_search_method=retrieval_search_method,
+            shard_by_dataset=shard_by_dataset,
             type=1,
         )
 
@@ -170,6 +358,7 @@ class QARetriever(BaseRetriever):
         expand: bool = False,
         expand_num: int = 1,
         retrieval_search_method: int = 0,
+        shard_by_dataset: bool = False,
     ):
         super().__init__(
             svc=svc,
@@ -183,6 +372,7 @@ class QARetriever(BaseRetriever):
             expand=expand,
             expand_num=expand_num,
             retrieval_search_method=retrieval_search_method,
+            shard_by_dataset=shard_by_dataset,
             type=2,
         )
 
@@ -201,6 +391,7 @@ class TerminologyRetriever(BaseRetriever):
         expand: bool = False,
         expand_num: int = 1,
         retrieval_search_method: int = 0,
+        shard_by_dataset: bool = False,
     ):
         super().__init__(
             svc=svc,
@@ -214,5 +405,6 @@ class TerminologyRetriever(BaseRetriever):
             expand=expand,
             expand_num=expand_num,
             retrieval_search_method=retrieval_search_method,
+            shard_by_dataset=shard_by_dataset,
             type=3,
         )
@@ -0,0 +1,179 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import zlib
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from hiagent_api.knowledgebase_types import QueryResponse
+
+T = TypeVar("T")
+
+_EMPTY = (1 << 32) - 1
+
+
+def _content(item: Any) -> str:
+    # Result.content or a LangChain Document's page_content
+    content = getattr(item, "content", None)
+    if content is None:
+        content = item.page_content
+    return content
+
+
+def _shingle_hashes(text: str, size: int) -> List[int]:
+    text = " ".join(text.lower().split())
+    if len(text) <= size:
+        return [zlib.crc32(text.encode())]
+    return list(
+        {zlib.crc32(text[i : i + size].encode()) for i in range(len(text) - size + 1)}
+    )
+
+
+def minhash(hashes: Sequence[int], num_perm: int) -> Tuple[int, ...]:
+    """One-permutation MinHash: the smallest hash per bin, empty bins densified.
+
+    Two signatures agree in a position with probability close to the
+    Jaccard similarity of the hashed sets.
+    """
+    bins = [_EMPTY] * num_perm
+    for h in hashes:
+        j = h % num_perm
+        v = h // num_perm
+        if v < bins[j]:
+            bins[j] = v
+    if _EMPTY in bins and any(v != _EMPTY for v in bins):
+        # rotation densification: borrow from the next non-empty bin
+        for j in range(num_perm):
+            if bins[j] == _EMPTY:
+                k = (j + 1) % num_perm
+                while bins[k] == _EMPTY:
+                    k = (k + 1) % num_perm
+                bins[j] = bins[k] + (k - j) % num_perm * _EMPTY
+    return tuple(bins)
+
+
+def simhash(hashes: Sequence[int]) -> int:
+    """64-bit SimHash; near-identical texts differ in few bits."""
+    if not hashes:
+        return 0
+    half = len(hashes) / 2
+    # transpose the bits through strings so the counting happens in C
+    bits = [
+        format(h | zlib.crc32(h.to_bytes(4, "little")) << 32, "064b") for h in hashes
+    ]
+    value = 0
+    for column in zip(*bits):
+        value = value << 1 | (column.count("1") > half)
+    return value
+
+
+class NearDuplicateFilter:
+    """Drops retrieval results whose content nearly repeats an earlier result.
+
+    Content is split into character ``shingle_size``-grams, which works for
+    Chinese as well as space separated text. With ``minhash`` two results
+    are duplicates when their estimated Jaccard similarity is at least
+    ``threshold``; with ``simhash`` when their 64-bit signatures differ in at
+    most ``max_distance`` bits. Candidates are found through LSH buckets,
+    so the cost grows about linearly with the number of results.
+
+    Earlier results win, so pass them best first. Accepts a ``QueryResponse``
+    or a list of ``Result`` or LangChain ``Document`` objects.
+    """
+
+    def __init__(
+        self,
+        method: Literal["minhash", "simhash"] = "minhash",
+        threshold: float = 0.8,
+        max_distance: int = 3,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+    ):
+        if method == "minhash" and num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        if method == "simhash" and not 0 <= max_distance < 64:
+            raise ValueError("max_distance must be between 0 and 63")
+        self.method = method
+        self.threshold = threshold
+        self.max_distance = max_distance
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+    def _bands(self, signature: Any) -> List[Any]:
+        if self.method == "minhash":
+            rows = self.num_perm // self.bands
+            return [signature[i : i + rows] for i in range(0, self.num_perm, rows)]
+        # pigeonhole: within max_distance bits, one of max_distance + 1
+        # slices must be identical
+        count = self.max_distance + 1
+        width = 64 // count
+        return [
+            (signature >> (i * width)) & ((1 << width) - 1)
+            if i < count - 1
+            else signature >> (i * width)
+            for i in range(count)
+        ]
+
+    def _similar(self, a: Any, b: Any) -> bool:
+        if self.method == "minhash":
+            same = sum(x == y for x, y in zip(a, b))
+            return same >= self.threshold * self.num_perm
+        return bin(a ^ b).count("1") <= self.max_distance
+
+    def signature(self, text: str) -> Any:
+        hashes = _shingle_hashes(text, self.shingle_size)
+        if self.method == "minhash":
+            return minhash(hashes, self.num_perm)
+        return simhash(hashes)
+
+    def filter(
+        self, items: Sequence[T], key: Optional[Callable[[T], str]] = None
+    ) -> List[T]:
+        """Return ``items`` without near duplicates, in their original order."""
+        key = key or _content
+        kept: List[T] = []
+        signatures: List[Any] = []
+        buckets: Dict[Tuple[int, Any], List[int]] = {}
+        for item in items:
+            signature = self.signature(key(item))
+            bands = self._bands(signature)
+            candidates = set()
+            for i, band in enumerate(bands):
+                candidates.update(buckets.get((i, band), ()))
+            if any(self._similar(signature, signatures[c]) for c in candidates):
+                continue
+            index = len(kept)
+            kept.append(item)
+            signatures.append(signature)
+            for i, band in enumerate(bands):
+                buckets.setdefault((i, band), []).append(index)
+        return kept
+
+    def __call__(
+        self, results: Union[QueryResponse, Sequence[T]]
+    ) -> Union[QueryResponse, List[T]]:
+        if isinstance(results, QueryResponse):
+            return results.model_copy(update={"results": self.filter(results.results)})
+        return self.filter(results)
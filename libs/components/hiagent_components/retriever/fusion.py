@@ -0,0 +1,245 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+
+from hiagent_api.knowledgebase_types import QueryResponse, Result
+from pydantic import Field
+
+from hiagent_components.base import Executable
+from hiagent_components.base.callbacks import traced
+from hiagent_components.base.deadline import (
+    cancel_scope,
+    deadline,
+    remaining_time,
+    timeout_kwarg,
+)
+from hiagent_components.base.utils import (
+    get_shared_executor,
+    in_worker_thread,
+    submit_in_context,
+)
+
+logger = logging.getLogger(__name__)
+
+_DEADLINE_GRACE = 0.05
+
+
+class FusedQueryResponse(QueryResponse):
+    partial: bool = Field(
+        default=False,
+        description="是否因超时或失败缺少部分检索结果",
+    )
+    missing: list[str] = Field(
+        default_factory=list,
+        description="未返回结果的检索器或知识库",
+    )
+
+
+def result_key(result: Result) -> Tuple[str, str]:
+    """Results with the same document and segment are the same chunk."""
+    return result.document_id, result.segment_id
+
+
+def fuse_results(
+    rankings: Sequence[Sequence[Result]],
+    weights: Optional[Sequence[float]] = None,
+    method: Literal["rrf", "weighted"] = "rrf",
+    rrf_k: int = 60,
+    top_k: Optional[int] = None,
+) -> List[Result]:
+    """Merge several rankings into one, keeping each chunk once.
+
+    ``rrf`` sums ``weight / (rrf_k + rank)`` over the rankings a chunk
+    appears in, ``weighted`` sums ``weight * score``. The returned results
+    carry the fused score.
+    """
+    if weights is None:
+        weights = [1.0] * len(rankings)
+    fused: Dict[Tuple[str, str], float] = {}
+    first: Dict[Tuple[str, str], Result] = {}
+    for ranking, weight in zip(rankings, weights):
+        seen = set()
+        for rank, result in enumerate(ranking, 1):
+            key = result_key(result)
+            if key in seen:
+                continue
+            seen.add(key)
+            if method == "rrf":
+                score = weight / (rrf_k + rank)
+            else:
+                score = weight * result.score
+            fused[key] = fused.get(key, 0.0) + score
+            first.setdefault(key, result)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    if top_k is not None:
+        ordered = ordered[:top_k]
+    return [first[key].model_copy(update={"score": score}) for key, score in ordered]
+
+
+class FusionRetriever(Executable):
+    """Queries several retrievers concurrently and fuses their rankings.
+
+    Retrievers that fail or are still running once ``timeout`` seconds (or
+    the call deadline) have passed are left out and named in
+    ``FusedQueryResponse.missing``. The call only fails if no retriever
+    answers.
+    """
+
+    def __init__(
+        self,
+        retrievers: Sequence[Executable],
+        top_k: int = 5,
+        method: Literal["rrf", "weighted"] = "rrf",
+        weights: Optional[Sequence[float]] = None,
+        rrf_k: int = 60,
+        timeout: Optional[float] = None,
+        name: str = "",
+        description: str = "",
+    ):
+        if not retrievers:
+            raise ValueError("at least one retriever is required")
+        if weights is not None and len(weights) != len(retrievers):
+            raise ValueError("weights must match retrievers")
+        self.retrievers = list(retrievers)
+        self.top_k = top_k
+        self.method = method
+        self.weights = weights
+        self.rrf_k = rrf_k
+        self.timeout = timeout
+        self.name = name or "fusion(" + ", ".join(r.name for r in self.retrievers) + ")"
+        self.description = description or "; ".join(
+            r.description for r in self.retrievers if r.description
+        )
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        return self.retrievers[0].input_schema
+
+    @property
+    def _native_async(self) -> bool:
+        return all(r._native_async for r in self.retrievers)
+
+    def _budget(self) -> Optional[float]:
+        remaining = remaining_time()
+        if remaining is None:
+            return self.timeout
+        remaining = max(remaining, 0.0)
+        if self.timeout is not None and self.timeout < remaining:
+            return self.timeout
+        # the retrievers run under the same deadline and return partial
+        # results or fail when it passes; the grace lets those answers in
+        return remaining + _DEADLINE_GRACE
+
+    def _fuse(
+        self,
+        responses: List[Optional[QueryResponse]],
+        errors: List[Optional[BaseException]],
+    ) -> FusedQueryResponse:
+        missing = [
+            r.name for r, resp in zip(self.retrievers, responses) if resp is None
+        ]
+        if len(missing) == len(self.retrievers):
+            error = next((e for e in errors if e is not None), None)
+            if error is not None:
+                raise error
+            raise TimeoutError("no retriever answered within the latency budget")
+        weights = self.weights or [1.0] * len(self.retrievers)
+        rankings, used = [], []
+        for resp, weight in zip(responses, weights):
+            if resp is not None:
+                rankings.append(resp.results)
+                used.append(weight)
+        return FusedQueryResponse(
+            results=fuse_results(rankings, used, self.method, self.rrf_k, self.top_k),
+            partial=bool(missing),
+            missing=missing,
+        )
+
+    @traced
+    @timeout_kwarg
+    def invoke(self, input: dict, **kwargs: Any) -> FusedQueryResponse:
+        owned_executor = None
+        executor = get_shared_executor()
+        if in_worker_thread():
+            owned_executor = executor = ThreadPoolExecutor(len(self.retrievers))
+        # the branches run under the latency budget and are cancelled once
+        # it is spent, so slow ones give their threads back
+        with cancel_scope() as cancel, deadline(self.timeout):
+            futures = [
+                submit_in_context(executor, r.invoke, input, **kwargs)
+                for r in self.retrievers
+            ]
+            try:
+                wait(futures, timeout=self._budget())
+            finally:
+                cancel.set()
+                for future in futures:
+                    future.cancel()
+                if owned_executor is not None:
+                    owned_executor.shutdown(wait=False)
+        responses: List[Optional[QueryResponse]] = []
+        errors: List[Optional[BaseException]] = []
+        for retriever, future in zip(self.retrievers, futures):
+            error = None
+            if future.done() and not future.cancelled():
+                error = future.exception()
+                if error is None:
+                    responses.append(future.result())
+                    errors.append(None)
+                    continue
+                logger.warning("retriever %s failed: %r", retriever.name, error)
+            responses.append(None)
+            errors.append(error)
+        return self._fuse(responses, errors)
+
+    @traced
+    async def ainvoke(
+        self, input: dict, executor: Optional[Executor] = None, **kwargs: Any
+    ) -> FusedQueryResponse:
+        # not timeout_kwarg: the fused answers that arrived before the
+        # deadline are returned instead of the call being cancelled
+        with (
+            deadline(kwargs.pop("timeout", None)),
+            cancel_scope() as cancel,
+            deadline(self.timeout),
+        ):
+            tasks = [
+                asyncio.ensure_future(r.ainvoke(input, executor=executor, **kwargs))
+                for r in self.retrievers
+            ]
+            try:
+                await asyncio.wait(tasks, timeout=self._budget())
+            finally:
+                # stops branches running in executor threads as well
+                cancel.set()
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        responses: List[Optional[QueryResponse]] = []
+        errors: List[Optional[BaseException]] = []
+        for retriever, task in zip(self.retrievers, tasks):
+            error = None
+            if not task.cancelled():
+                error = task.exception()
+                if error is None:
+                    responses.append(task.result())
+                    errors.append(None)
+                    continue
+                logger.warning("retriever %s failed: %r", retriever.name, error)
+            responses.append(None)
+            errors.append(error)
+        return self._fuse(responses, errors)
@@ -0,0 +1,132 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Literal, Sequence, Union
+
+from hiagent_api.knowledgebase_types import QueryResponse, Result
+
+# CJK ideographs, kana and hangul, roughly one token per character
+_WIDE = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]"
+)
+
+
+def approximate_tokens(text: str) -> int:
+    """Cheap token estimate: one per CJK character, one per four other characters."""
+    wide = len(_WIDE.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+@dataclass
+class PackedContext:
+    text: str
+    results: List[Result]
+    tokens: int
+    # segment IDs of results that did not fit
+    dropped: List[str] = field(default_factory=list)
+
+
+def _greedy(values: Sequence[float], costs: Sequence[int], budget: int) -> List[int]:
+    # by value per token, skipping items that no longer fit; a single item
+    # worth more than the whole greedy pick wins instead
+    order = sorted(
+        range(len(values)), key=lambda i: values[i] / max(costs[i], 1), reverse=True
+    )
+    chosen, used, total = [], 0, 0.0
+    for i in order:
+        if used + costs[i] <= budget:
+            chosen.append(i)
+            used += costs[i]
+            total += values[i]
+    fitting = [i for i in range(len(values)) if costs[i] <= budget]
+    if fitting:
+        best = max(fitting, key=lambda i: values[i])
+        if values[best] > total:
+            return [best]
+    return chosen
+
+
+def _knapsack(
+    values: Sequence[float], costs: Sequence[int], budget: int, resolution: int
+) -> List[int]:
+    # 0/1 knapsack over the budget split into at most ``resolution`` units;
+    # costs are rounded up so the pick never exceeds the budget
+    unit = max(1, math.ceil(budget / resolution))
+    capacity = budget // unit
+    weights = [math.ceil(c / unit) for c in costs]
+    best = [0.0] * (capacity + 1)
+    taken: List[List[bool]] = []
+    for value, weight in zip(values, weights):
+        if weight > capacity:
+            taken.append([False] * (capacity + 1))
+            continue
+        with_item = [-math.inf] * weight
+        with_item += [v + value for v in best[: capacity + 1 - weight]]
+        take = [w > b for w, b in zip(with_item, best)]
+        best = [w if t else b for w, b, t in zip(with_item, best, take)]
+        taken.append(take)
+    chosen, c = [], capacity
+    for i in range(len(values) - 1, -1, -1):
+        if taken[i][c]:
+            chosen.append(i)
+            c -= weights[i]
+    return chosen
+
+
+def pack_context(
+    results: Union[QueryResponse, Sequence[Result]],
+    max_tokens: int,
+    method: Literal["greedy", "knapsack"] = "greedy",
+    order: Literal["score", "input"] = "score",
+    separator: str = "\n\n",
+    tokenizer: Callable[[str], int] = approximate_tokens,
+    format: Callable[[Result], str] = lambda r: r.content,
+    resolution: int = 512,
+) -> PackedContext:
+    """Choose the results with the highest total score that fit in ``max_tokens``.
+
+    ``greedy`` picks by score per token and handles thousands of results in
+    a few milliseconds. ``knapsack`` also solves the selection exactly with
+    token counts rounded up to ``max_tokens / resolution``, which is much
+    slower, and keeps the better of the two. The chosen results are joined
+    with ``separator`` by descending score or in their input order.
+    """
+    if isinstance(results, QueryResponse):
+        results = results.results
+    texts = [format(r) for r in results]
+    separator_tokens = tokenizer(separator) if separator else 0
+    # every result but the first is preceded by a separator; charging each
+    # one for it keeps the sum within budget
+    costs = [tokenizer(text) + separator_tokens for text in texts]
+    values = [r.score for r in results]
+    budget = max_tokens + separator_tokens
+    chosen = _greedy(values, costs, budget)
+    if method == "knapsack":
+        # rounding can cost the knapsack more than it gains on easy inputs
+        exact = _knapsack(values, costs, budget, resolution)
+        if sum(values[i] for i in exact) > sum(values[i] for i in chosen):
+            chosen = exact
+
+    chosen.sort()
+    if order == "score":
+        chosen.sort(key=lambda i: values[i], reverse=True)
+    picked = set(chosen)
+    return PackedContext(
+        text=separator.join(texts[i] for i in chosen),
+        results=[results[i] for i in chosen],
+        tokens=sum(costs[i] for i in chosen) - (separator_tokens if chosen else 0),
+        dropped=[r.segment_id for i, r in enumerate(results) if i not in picked],
+    )
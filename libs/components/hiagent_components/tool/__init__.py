@@ -14,6 +14,7 @@
 from __future__ import annotations
 
 from hiagent_components.tool.base import BaseTool
+from hiagent_components.tool.executor import ToolCallResult, ToolExecutor
 from hiagent_components.tool.tool import ExecutableTool, Tool
 
-__all__ = ["BaseTool", "ExecutableTool", "Tool"]
+__all__ = ["BaseTool", "ExecutableTool", "Tool", "ToolCallResult", "ToolExecutor"]
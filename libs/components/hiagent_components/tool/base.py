@@ -23,6 +23,8 @@ from typing import (
 )
 
 from hiagent_components.base import Executable
+from hiagent_components.base.callbacks import traced
+from hiagent_components.base.deadline import timeout_kwarg
 from hiagent_components.base.utils import (
     run_in_executor,
 )
@@ -35,6 +37,8 @@ class BaseTool(Executable):
     name: str
     description: str
 
+    @traced
+    @timeout_kwarg
     def invoke(
         self,
         input: Dict[str, Any],
@@ -43,6 +47,8 @@ class BaseTool(Executable):
     ) -> Any:
         return self._invoke(input, **kwargs)
 
+    @traced
+    @timeout_kwarg
     async def ainvoke(
         self,
         input: Dict[str, Any],
@@ -50,7 +56,11 @@ class BaseTool(Executable):
         executor: Optional[Executor] = None,
         **kwargs: Any,
     ) -> Any:
-        return await self._ainvoke(input, executor, **kwargs)
+        return await self._ainvoke(input, executor=executor, **kwargs)
+
+    @property
+    def _native_async(self) -> bool:
+        return type(self)._ainvoke is not BaseTool._ainvoke
 
     @abstractmethod
     def _invoke(
@@ -0,0 +1,206 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from hiagent_components.base.concurrency import ConcurrencyLimiter
+from hiagent_components.base.utils import map_ordered
+from hiagent_components.tool.base import BaseTool
+
+ToolCall = Tuple[BaseTool, Dict[str, Any]]
+
+
+@dataclass
+class ToolCallResult:
+    """Outcome of one tool call; ``wait`` is time spent queued for a slot."""
+
+    name: str
+    input: Dict[str, Any]
+    output: Any = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+    wait: float = 0.0
+    # served by an identical earlier call of the same turn
+    deduplicated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _call_key(tool: BaseTool, input: Dict[str, Any]) -> Tuple[int, str]:
+    return id(tool), json.dumps(input, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ToolExecutor:
+    """Runs the tool calls of one turn concurrently.
+
+    At most ``max_parallel`` calls run at once, and at most
+    ``limits.get(tool.name, per_tool_limit)`` of them for any one tool; the
+    per-tool limits hold across turns run by the same executor. Each call
+    gets ``timeouts.get(tool.name, timeout)`` seconds. Calls with the same
+    tool and input run once per turn. Results come back in call order and
+    failures are returned in ``ToolCallResult.error`` rather than raised.
+    """
+
+    def __init__(
+        self,
+        max_parallel: int = 8,
+        per_tool_limit: Optional[int] = None,
+        limits: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        if max_parallel < 1:
+            raise ValueError("max_parallel must be at least 1")
+        self.max_parallel = max_parallel
+        self.per_tool_limit = per_tool_limit
+        self.limits = limits or {}
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self._limiters: Dict[str, Optional[ConcurrencyLimiter]] = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, tool: BaseTool) -> Optional[ConcurrencyLimiter]:
+        with self._lock:
+            if tool.name not in self._limiters:
+                limit = self.limits.get(tool.name, self.per_tool_limit)
+                self._limiters[tool.name] = (
+                    None
+                    if limit is None
+                    else ConcurrencyLimiter(f"tool:{tool.name}", limit)
+                )
+            return self._limiters[tool.name]
+
+    def _plan(
+        self, calls: Sequence[ToolCall]
+    ) -> Tuple[List[ToolCall], List[int], List[bool]]:
+        # distinct calls, plus for every call the index of its distinct call
+        # and whether an earlier call already covers it
+        unique: List[ToolCall] = []
+        index: Dict[Tuple[int, str], int] = {}
+        slots, repeats = [], []
+        for tool, input in calls:
+            key = _call_key(tool, input)
+            repeats.append(key in index)
+            if key not in index:
+                index[key] = len(unique)
+                unique.append((tool, input))
+            slots.append(index[key])
+        return unique, slots, repeats
+
+    @staticmethod
+    def _assemble(
+        calls: Sequence[ToolCall],
+        done: List[ToolCallResult],
+        slots: List[int],
+        repeats: List[bool],
+    ) -> List[ToolCallResult]:
+        results = []
+        for (tool, input), slot, repeat in zip(calls, slots, repeats):
+            result = done[slot]
+            if repeat:
+                result = ToolCallResult(
+                    name=tool.name,
+                    input=input,
+                    output=result.output,
+                    error=result.error,
+                    elapsed=result.elapsed,
+                    wait=result.wait,
+                    deduplicated=True,
+                )
+            results.append(result)
+        return results
+
+    @contextmanager
+    def _slot(self, tool: BaseTool) -> Iterator[float]:
+        limiter = self._limiter(tool)
+        if limiter is None:
+            yield 0.0
+            return
+        with limiter.slot() as waited:
+            yield waited
+
+    @asynccontextmanager
+    async def _aslot(self, tool: BaseTool) -> AsyncIterator[float]:
+        limiter = self._limiter(tool)
+        if limiter is None:
+            yield 0.0
+            return
+        async with limiter.aslot() as waited:
+            yield waited
+
+    def _run_one(self, call: ToolCall, turn: threading.Semaphore) -> ToolCallResult:
+        tool, input = call
+        result = ToolCallResult(name=tool.name, input=input)
+        queued = time.perf_counter()
+        try:
+            # the tool's own slot first, so calls queued behind a saturated
+            # tool do not hold turn slots that other tools could use
+            with self._slot(tool), turn:
+                start = time.perf_counter()
+                result.wait = start - queued
+                try:
+                    result.output = tool.invoke(
+                        input, timeout=self.timeouts.get(tool.name, self.timeout)
+                    )
+                finally:
+                    result.elapsed = time.perf_counter() - start
+        except Exception as e:
+            result.error = e
+        return result
+
+    async def _arun_one(
+        self, call: ToolCall, turn: asyncio.Semaphore
+    ) -> ToolCallResult:
+        tool, input = call
+        result = ToolCallResult(name=tool.name, input=input)
+        queued = time.perf_counter()
+        try:
+            async with self._aslot(tool), turn:
+                start = time.perf_counter()
+                result.wait = start - queued
+                try:
+                    result.output = await tool.ainvoke(
+                        input, timeout=self.timeouts.get(tool.name, self.timeout)
+                    )
+                finally:
+                    result.elapsed = time.perf_counter() - start
+        except Exception as e:
+            result.error = e
+        return result
+
+    def run(self, calls: Sequence[ToolCall]) -> List[ToolCallResult]:
+        """Run ``(tool, input)`` calls on the shared executor, or on a pool of
+        their own when there are more distinct calls than it has threads."""
+        unique, slots, repeats = self._plan(calls)
+        turn = threading.Semaphore(self.max_parallel)
+        # a thread per distinct call, at most max_parallel of them run tools
+        done = map_ordered(
+            lambda call: self._run_one(call, turn), unique, max_parallel=len(unique)
+        )
+        return self._assemble(calls, done, slots, repeats)
+
+    async def arun(self, calls: Sequence[ToolCall]) -> List[ToolCallResult]:
+        unique, slots, repeats = self._plan(calls)
+        turn = asyncio.Semaphore(self.max_parallel)
+        done = await asyncio.gather(*(self._arun_one(call, turn) for call in unique))
+        return self._assemble(calls, done, slots, repeats)
@@ -25,7 +25,10 @@ from typing_extensions import Self
 
 from hiagent_components.base import Executable
 from hiagent_components.tool.base import BaseTool
-from hiagent_components.utils.schema import convert_hiagent_schema_to_json_schema
+from hiagent_components.utils.schema import (
+    compile_validator,
+    convert_hiagent_schema_to_json_schema,
+)
 
 
 class ExecutableTool(BaseTool):
@@ -38,6 +41,10 @@ class ExecutableTool(BaseTool):
     def input_schema(self) -> dict[str, Any]:
         return self.executable.input_schema
 
+    @property
+    def _native_async(self) -> bool:
+        return self.executable._native_async
+
     @classmethod
     def from_executable(
         cls,
@@ -68,12 +75,14 @@ class ExecutableTool(BaseTool):
         executor: Optional[Executor] = None,
         **kwargs: Any,
     ) -> Any:
-        return await self.executable.ainvoke(input, executor, **kwargs)
+        return await self.executable.ainvoke(input, executor=executor, **kwargs)
 
 
 class Tool(BaseTool):
     """
     Tool is a unified encapsulation of tools on the HiAgent platform. You can call a tool by providing the tool ID.
+    Object inputs are checked against ``input_schema`` before the request is sent
+    unless ``validate_input`` is False.
     """
 
     def __init__(
@@ -86,6 +95,7 @@ class Tool(BaseTool):
         name:  str,
         description: str,
         credentials: Optional[dict] = None,
+        validate_input: bool = True,
     ):
         self.svc = svc
         self.workspace_id = workspace_id
@@ -95,11 +105,36 @@ class Tool(BaseTool):
         self.name = name
         self.description = description
         self.credentials = credentials
+        self._validate = None
+        if validate_input and input_schema.get("type") == "object":
+            self._validate = compile_validator(input_schema)
 
     @property
     def input_schema(self) -> dict[str, Any]:
         return self._input_schema
 
+    @property
+    def credentials(self) -> Optional[dict]:
+        return self._credentials
+
+    @credentials.setter
+    def credentials(self, credentials: Optional[dict]) -> None:
+        self._credentials = credentials
+        self._config = (
+            json.dumps(credentials, ensure_ascii=False) if credentials else ""
+        )
+
+    def _request(self, input: dict) -> ExecArchivedToolRequest:
+        if self._validate is not None:
+            self._validate(input)
+        return ExecArchivedToolRequest(
+            workspace_id=self.workspace_id,
+            plugin_id=self.plugin_id,
+            tool_id=self.tool_id,
+            config=self._config,
+            input_data=json.dumps(input, ensure_ascii=False),
+        )
+
     @classmethod
     def init(
         cls,
@@ -206,19 +241,7 @@ class Tool(BaseTool):
         raise_exception: bool = True,
         **kwargs: Any,
     ) -> str:
-        config = ""
-        if self.credentials:
-            config = json.dumps(self.credentials, ensure_ascii=False)
-
-        resp = self.svc.exec_archived_tool(
-            ExecArchivedToolRequest(
-                workspace_id=self.workspace_id,
-                plugin_id=self.plugin_id,
-                tool_id=self.tool_id,
-                config=config,
-                input_data=json.dumps(input, ensure_ascii=False),
-            )
-        )
+        resp = self.svc.exec_archived_tool(self._request(input))
 
         if not resp.success:
             if raise_exception:
@@ -235,19 +258,7 @@ class Tool(BaseTool):
         executor: Optional[Executor] = None,
         **kwargs: Any,
     ) -> str:
-        config = ""
-        if self.credentials:
-            config = json.dumps(self.credentials, ensure_ascii=False)
-
-        resp = await self.svc.aexec_archived_tool(
-            ExecArchivedToolRequest(
-                workspace_id=self.workspace_id,
-                plugin_id=self.plugin_id,
-                tool_id=self.tool_id,
-                config=config,
-                input_data=json.dumps(input, ensure_ascii=False),
-            )
-        )
+        resp = await self.svc.aexec_archived_tool(self._request(input))
 
         if not resp.success:
             if raise_exception:
@@ -11,7 +11,9 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Any
+import json
+from functools import lru_cache
+from typing import Any, Callable, Optional
 
 from hiagent_api.workflow_types import FieldDefinition
 
@@ -175,3 +177,120 @@ def convert_hiagent_schema_to_json_schema(
         if field.required:
             json_schema["required"].append(field.name)
     return json_schema
+
+
+Validator = Callable[[Any], None]
+
+_TYPE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+}
+
+
+def _compile(schema: dict[str, Any]) -> Optional[Callable[[Any, str], Optional[str]]]:
+    """Build a check returning an error message or None; None when anything goes."""
+    checks: list[Callable[[Any, str], Optional[str]]] = []
+
+    type_name = schema.get("type")
+    type_check = _TYPE_CHECKS.get(type_name) if isinstance(type_name, str) else None
+    if type_check is not None:
+
+        def check_type(value: Any, path: str) -> Optional[str]:
+            if not type_check(value):
+                return f"{path} should be {type_name}, got {type(value).__name__}"
+            return None
+
+        checks.append(check_type)
+
+    required = tuple(schema.get("required") or ())
+    properties = [
+        (name, check)
+        for name, sub in (schema.get("properties") or {}).items()
+        if isinstance(sub, dict) and (check := _compile(sub)) is not None
+    ]
+    if required or properties:
+
+        def check_object(value: Any, path: str) -> Optional[str]:
+            if not isinstance(value, dict):
+                return None
+            for name in required:
+                if name not in value:
+                    return f"{path}.{name} is required"
+            for name, check in properties:
+                if name in value and value[name] is not None:
+                    error = check(value[name], f"{path}.{name}")
+                    if error:
+                        return error
+            return None
+
+        checks.append(check_object)
+
+    items = schema.get("items")
+    if isinstance(items, dict) and (item_check := _compile(items)) is not None:
+
+        def check_items(value: Any, path: str) -> Optional[str]:
+            if not isinstance(value, list):
+                return None
+            for i, item in enumerate(value):
+                error = item_check(item, f"{path}[{i}]")
+                if error:
+                    return error
+            return None
+
+        checks.append(check_items)
+    elif isinstance(items, list):
+        positional = [_compile(sub) if isinstance(sub, dict) else None for sub in items]
+
+        def check_positional(value: Any, path: str) -> Optional[str]:
+            if not isinstance(value, list):
+                return None
+            for i, (item, check) in enumerate(zip(value, positional)):
+                error = check(item, f"{path}[{i}]") if check else None
+                if error:
+                    return error
+            return None
+
+        checks.append(check_positional)
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value: Any, path: str) -> Optional[str]:
+        for check in checks:
+            error = check(value, path)
+            if error:
+                return error
+        return None
+
+    return check_all
+
+
+@lru_cache(maxsize=256)
+def _compile_cached(schema: str) -> Validator:
+    check = _compile(json.loads(schema))
+
+    def validate(value: Any) -> None:
+        if check is not None:
+            error = check(value, "input")
+            if error:
+                raise ValueError(f"invalid input: {error}")
+
+    return validate
+
+
+def compile_validator(schema: dict[str, Any]) -> Validator:
+    """Compile the subset of JSON schema produced by
+    ``convert_hiagent_schema_to_json_schema`` into a function raising
+    ``ValueError`` for values that do not match.
+
+    Checks ``type``, ``required``, ``properties`` and ``items``; unknown
+    keywords and the ``any`` type accept everything, and ``None`` values
+    are left for the server to judge.
+    """
+    return _compile_cached(json.dumps(schema, sort_keys=True, ensure_ascii=False))
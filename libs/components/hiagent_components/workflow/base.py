@@ -15,8 +15,9 @@ import asyncio
 import json
 import time
 from concurrent.futures import Executor
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Iterator, Optional
 
+from hiagent_api.chat_types import WorkflowEvent
 from hiagent_api.workflow import WorkflowService
 from hiagent_api.workflow_types import (
     GetWorkflowRequest,
@@ -26,7 +27,10 @@ from hiagent_api.workflow_types import (
 from strenum import StrEnum
 
 from hiagent_components.base import Executable
+from hiagent_components.base.callbacks import traced
+from hiagent_components.base.deadline import poll_intervals, timeout_kwarg
 from hiagent_components.utils.schema import (
+    compile_validator,
     convert_hiagent_schema_to_json_schema,
 )
 from hiagent_components.workflow.utils import get_start_node_of_workflow
@@ -50,6 +54,15 @@ WorkflowCompleteStatus = [
 
 
 class Workflow(Executable):
+    """Runs a workflow app and polls until it completes.
+
+    Status is polled every ``min_poll_interval`` seconds at first, backing off
+    by ``poll_backoff`` up to ``max_poll_interval``. ``stream``/``astream``
+    yield ``WorkflowEvent``s as the workflow produces them instead.
+    Inputs are checked against ``input_schema`` before the run is started
+    unless ``validate_input`` is False.
+    """
+
     def __init__(
         self,
         svc: WorkflowService,
@@ -58,6 +71,10 @@ class Workflow(Executable):
         input_schema: dict,
         name: str,
         description: str,
+        min_poll_interval: float = 0.1,
+        max_poll_interval: float = 2.0,
+        poll_backoff: float = 2.0,
+        validate_input: bool = True,
     ) -> None:
         self.svc = svc
         self.app_key = app_key
@@ -65,6 +82,10 @@ class Workflow(Executable):
         self.name = name or ""
         self.description = description or ""
         self._input_schema = input_schema
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff = poll_backoff
+        self._validate = compile_validator(input_schema) if validate_input else None
 
     @property
     def input_schema(self) -> dict:
@@ -166,16 +187,29 @@ class Workflow(Executable):
 
         return workflow
 
+    def _poll_intervals(self) -> Iterator[float]:
+        return poll_intervals(
+            self.min_poll_interval, self.max_poll_interval, self.poll_backoff
+        )
+
+    def _run_request(self, input: dict) -> RunWorkflowRequest:
+        if self._validate is not None:
+            self._validate(input)
+        return RunWorkflowRequest(
+            input_data=json.dumps(input, ensure_ascii=False),
+            user_id=self.user_id,
+            app_key=self.app_key,
+        )
+
+    @traced
+    @timeout_kwarg
     def invoke(self, input: dict, **kwargs: Any) -> str:
         resp = self.svc.run_workflow_async(
             self.app_key,
-            RunWorkflowRequest(
-                input_data=json.dumps(input, ensure_ascii=False),
-                user_id=self.user_id,
-                app_key=self.app_key,
-            ),
+            self._run_request(input),
         )
         run_id = resp.run_id
+        intervals = self._poll_intervals()
         while True:
             resp = self.svc.query_workflow_status(
                 self.app_key,
@@ -190,20 +224,19 @@ class Workflow(Executable):
                     return resp.output
                 else:
                     raise Exception(f"workflow completed with status {resp.status}")
-            time.sleep(1)
+            time.sleep(next(intervals))
 
+    @traced
+    @timeout_kwarg
     async def ainvoke(
         self, input: dict, executor: Optional[Executor] = None, **kwargs: Any
     ) -> str:
         resp = await self.svc.arun_workflow_async(
             self.app_key,
-            RunWorkflowRequest(
-                input_data=json.dumps(input, ensure_ascii=False),
-                user_id=self.user_id,
-                app_key=self.app_key,
-            ),
+            self._run_request(input),
         )
         run_id = resp.run_id
+        intervals = self._poll_intervals()
         while True:
             resp = await self.svc.aquery_workflow_status(
                 self.app_key,
@@ -218,34 +251,42 @@ class Workflow(Executable):
                     return resp.output
                 else:
                     raise Exception(f"workflow completed with status {resp.status}")
-            await asyncio.sleep(1)
+            await asyncio.sleep(next(intervals))
+
+    @traced
+    def stream(self, input: dict, **kwargs: Any) -> Iterator[WorkflowEvent]:
+        req = self._run_request(input)
+        return self.svc.run_workflow_streaming(self.app_key, req)
+
+    @traced
+    async def astream(self, input: dict, **kwargs: Any) -> AsyncIterator[WorkflowEvent]:
+        async for event in self.svc.arun_workflow_streaming(
+            self.app_key, self._run_request(input)
+        ):
+            yield event
 
 
 class BlockingWorkflow(Workflow):
+    @traced
+    @timeout_kwarg
     def invoke(self, input: dict, **kwargs: Any) -> str:
         resp = self.svc.run_workflow(
             self.app_key,
-            RunWorkflowRequest(
-                app_key=self.app_key,
-                input_data=json.dumps(input, ensure_ascii=False),
-                user_id=self.user_id,
-            ),
+            self._run_request(input),
         )
         if resp.status == WorkflowStatus.SUCCESS:
             return resp.output
         else:
             raise Exception(f"workflow completed with status {resp.status}")
 
+    @traced
+    @timeout_kwarg
     async def ainvoke(
         self, input: dict, executor: Optional[Executor] = None, **kwargs: Any
     ) -> str:
         resp = await self.svc.arun_workflow(
             self.app_key,
-            RunWorkflowRequest(
-                app_key=self.app_key,
-                input_data=json.dumps(input, ensure_ascii=False),
-                user_id=self.user_id,
-            ),
+            self._run_request(input),
         )
         if resp.status == WorkflowStatus.SUCCESS:
             return resp.output
@@ -0,0 +1,130 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import itertools
+import threading
+import time
+from collections import Counter
+
+from hiagent_api.chat_types import CreateConversationResponse
+
+from hiagent_components.agent import AgentPool
+
+
+class _FakeChatService:
+    """Answers with the conversation ID and checks conversations are never shared."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.active = Counter()
+        self.overlaps = 0
+        self.turns = Counter()
+
+    def create_conversation(self, app_key, conversation):
+        with self.lock:
+            n = next(self.ids)
+        return CreateConversationResponse.model_validate(
+            {"Conversation": {"AppConversationID": f"conv-{n}"}}
+        )
+
+    async def acreate_conversation(self, app_key, conversation):
+        return self.create_conversation(app_key, conversation)
+
+    def _enter(self, req):
+        with self.lock:
+            if self.active[req.app_conversation_id]:
+                self.overlaps += 1
+            self.active[req.app_conversation_id] += 1
+            self.turns[req.app_conversation_id] += 1
+
+    def _exit(self, req):
+        with self.lock:
+            self.active[req.app_conversation_id] -= 1
+
+    def _answer(self, req):
+        return {"event": "message", "answer": req.app_conversation_id}
+
+    def chat_streaming_raw(self, app_key, req):
+        self._enter(req)
+        time.sleep(self.delay)
+        self._exit(req)
+        yield self._answer(req)
+
+    async def achat_streaming_raw(self, app_key, req):
+        self._enter(req)
+        await asyncio.sleep(self.delay)
+        self._exit(req)
+        yield self._answer(req)
+
+
+def test_batch_runs_in_parallel_on_separate_conversations():
+    svc = _FakeChatService(delay=0.1)
+    pool = AgentPool(svc, "app", "u", size=4)
+    inputs = [{"query": f"q{i}"} for i in range(8)]
+
+    start = time.perf_counter()
+    answers = pool.batch(inputs, max_parallel=8)
+    elapsed = time.perf_counter() - start
+
+    assert len(set(answers)) == 4
+    assert svc.overlaps == 0
+    assert elapsed < 0.6
+
+    answers = asyncio.run(pool.abatch(inputs, max_parallel=8))
+    assert len(set(answers)) == 4 and svc.overlaps == 0
+
+
+def test_sessions_are_sticky_and_conversations_recycle():
+    svc = _FakeChatService(delay=0.01)
+    pool = AgentPool(svc, "app", "u", size=2, max_turns=3)
+
+    async def main():
+        return await asyncio.gather(
+            *(pool.ainvoke({"query": "hi", "session_id": s}) for s in "aabab")
+        )
+
+    a1, a2, b1, a3, b2 = asyncio.run(main())
+    assert a1 == a2 == a3 and b1 == b2 and a1 != b1
+    assert svc.overlaps == 0
+
+    fourth = pool.invoke({"query": "again", "session_id": "a"})
+    assert fourth != a1
+    assert pool.recycled == 1
+    assert max(svc.turns.values()) == 3
+
+
+def test_sessions_in_use_are_not_evicted():
+    pool = AgentPool(_FakeChatService(), "app", "u", max_sessions=1)
+    # "a" is checked out but has not taken its lock yet
+    held = pool._session("a")
+    b = pool._session("b")
+    assert pool._session("a") is held
+    pool._release(held)
+    pool._release(b)
+    assert list(pool._sessions) == ["a"]
+    pool._release(held)
+
+    svc = _FakeChatService(delay=0.01)
+    pool = AgentPool(svc, "app", "u", max_sessions=1)
+
+    async def main():
+        return await asyncio.gather(
+            *(pool.ainvoke({"query": "hi", "session_id": s}) for s in "abababab")
+        )
+
+    answers = asyncio.run(main())
+    assert len(set(answers[::2])) == 1 and len(set(answers[1::2])) == 1
+    assert svc.overlaps == 0 and len(pool._sessions) == 1
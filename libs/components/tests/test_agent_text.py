@@ -0,0 +1,89 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import time
+
+import pytest
+
+from hiagent_components.agent import Agent
+from hiagent_components.agent.base import TextStreamResult
+
+_EVENTS = [
+    {"event": "message_start"},
+    {"event": "tool_message", "answer": "searching"},
+    {"event": "tool_message_output_end", "message_title": "search"},
+    {"event": "agent_thought", "thought": "ignored"},
+    {"event": "message", "answer": "Hello"},
+    {"event": "message", "answer": ""},
+    {"event": "message", "answer": " world"},
+    {"event": "message_cost", "input_tokens": 3, "output_tokens": 2, "latency": 0.5},
+    {"event": "message_end"},
+]
+
+
+class _FakeChatService:
+    def __init__(self, events, delay=0.0):
+        self.events = events
+        self.delay = delay
+
+    def chat_streaming_raw(self, app_key, req):
+        for event in self.events:
+            time.sleep(self.delay)
+            yield event
+
+    async def achat_streaming_raw(self, app_key, req):
+        for event in self.events:
+            await asyncio.sleep(self.delay)
+            yield event
+
+
+def _agent(events, delay=0.0):
+    return Agent(_FakeChatService(events, delay), "app", "u", "conv", "agent", "")
+
+
+def test_invoke_and_ainvoke_agree_on_tool_separator():
+    agent = _agent(_EVENTS)
+    expected = "searching\n\nHello world"
+    assert agent.invoke({"query": "hi"}) == expected
+    assert asyncio.run(agent.ainvoke({"query": "hi"})) == expected
+
+
+def test_stream_text_yields_deltas_and_result():
+    agent = _agent(_EVENTS, delay=0.01)
+    *deltas, result = agent.stream_text({"query": "hi"}, include_result=True)
+    assert deltas == ["searching", "\n\n", "Hello", " world"]
+    assert isinstance(result, TextStreamResult)
+    assert result.text == "".join(deltas)
+    assert result.usage == {"input_tokens": 3, "output_tokens": 2, "latency": 0.5}
+    assert result.time_to_first_token >= 0.01
+    assert len(result.inter_chunk_latencies) == 3
+    assert result.max_inter_chunk_latency >= result.mean_inter_chunk_latency > 0
+
+    async def collect():
+        return [d async for d in agent.astream_text({"query": "hi"})]
+
+    assert asyncio.run(collect()) == deltas
+
+
+def test_stream_text_raises_on_failed_message():
+    agent = _agent(
+        [
+            {"event": "message", "answer": "a"},
+            {"event": "message_failed", "error": "quota"},
+        ]
+    )
+    with pytest.raises(Exception, match="quota"):
+        list(agent.stream_text({"query": "hi"}))
+    # invoke keeps returning the text it received
+    assert agent.invoke({"query": "hi"}) == "a"
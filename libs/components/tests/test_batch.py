@@ -0,0 +1,169 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from hiagent_components.base import Executable, get_shared_executor
+from hiagent_components.base.utils import SHARED_EXECUTOR_WORKERS
+
+
+class _Echo(Executable[int, int]):
+    name = "echo"
+    description = "echo"
+
+    def __init__(self, delays=None, fail_on=()):
+        self.delays = delays or {}
+        self.fail_on = set(fail_on)
+        self.calls = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def invoke(self, input: int, **kwargs) -> int:
+        with self._lock:
+            self.calls.append(input)
+            self.threads.add(threading.current_thread().name)
+        time.sleep(self.delays.get(input, 0))
+        if input in self.fail_on:
+            raise ValueError(f"bad {input}")
+        return input * 10
+
+
+def test_batch_returns_ordered_results():
+    echo = _Echo(delays={0: 0.05, 1: 0.01})
+    assert echo.batch([0, 1, 2, 3], max_parallel=4) == [0, 10, 20, 30]
+
+
+def test_batch_reuses_shared_executor():
+    echo = _Echo()
+    echo.batch([1, 2, 3], max_parallel=3)
+    echo.batch([4, 5, 6], max_parallel=3)
+    assert all(name.startswith("hiagent-batch") for name in echo.threads)
+    assert get_shared_executor() is get_shared_executor()
+
+
+def test_batch_return_exceptions():
+    results = _Echo(fail_on={1}).batch([0, 1, 2], 2, return_exceptions=True)
+    assert results[0] == 0 and results[2] == 20
+    assert isinstance(results[1], ValueError)
+
+
+def test_batch_failure_cancels_remaining():
+    echo = _Echo(delays={i: 0.02 for i in range(20)}, fail_on={0})
+    with pytest.raises(ValueError):
+        echo.batch(list(range(20)), max_parallel=2)
+    time.sleep(0.1)
+    assert len(echo.calls) < 20
+
+
+def test_batch_item_timeout():
+    echo = _Echo(delays={1: 0.5})
+    results = echo.batch([0, 1], 2, return_exceptions=True, item_timeout=0.1)
+    assert results[0] == 0
+    assert isinstance(results[1], TimeoutError)
+    with pytest.raises(TimeoutError):
+        echo.batch([0, 1], 2, item_timeout=0.1)
+
+
+def test_abatch_ordered_timeout_and_cancel():
+    class _Async(_Echo):
+        async def ainvoke(self, input, executor=None, **kwargs):
+            await asyncio.sleep(self.delays.get(input, 0))
+            self.calls.append(input)
+            if input in self.fail_on:
+                raise ValueError(f"bad {input}")
+            return input * 10
+
+    ok = _Async(delays={0: 0.03, 2: 0.5})
+    results = asyncio.run(
+        ok.abatch([0, 1, 2], 3, return_exceptions=True, item_timeout=0.1)
+    )
+    assert results[:2] == [0, 10]
+    assert isinstance(results[2], TimeoutError)
+
+    failing = _Async(delays={i: 0.05 for i in range(1, 10)}, fail_on={0})
+    with pytest.raises(ValueError):
+        asyncio.run(failing.abatch(list(range(10)), 10))
+    assert failing.calls == [0]
+
+
+def test_abatch_sync_executable_runs_on_shared_executor():
+    echo = _Echo()
+    assert asyncio.run(echo.abatch([1, 2, 3], 2)) == [10, 20, 30]
+    assert all(name.startswith("hiagent-batch") for name in echo.threads)
+
+
+class _NativeAsync(_Echo):
+    async def ainvoke(self, input, executor=None, **kwargs):
+        self.threads.add(threading.current_thread().name)
+        self.executors = getattr(self, "executors", set()) | {executor}
+        await asyncio.sleep(self.delays.get(input, 0))
+        self.calls.append(input)
+        if input in self.fail_on:
+            raise ValueError(f"bad {input}")
+        return input * 10
+
+
+def test_abatch_native_async_uses_no_threads():
+    echo = _NativeAsync()
+    assert echo._native_async and not _Echo()._native_async
+    assert asyncio.run(echo.abatch([1, 2, 3], 2)) == [10, 20, 30]
+    assert echo.threads == {threading.current_thread().name}
+    assert echo.executors == {None}
+    assert echo.as_tool()._native_async
+    assert echo.with_retry()._native_async
+
+
+def test_abatch_as_completed_yields_in_finish_order():
+    echo = _NativeAsync(delays={0: 0.1, 1: 0.0, 2: 0.05})
+
+    async def run():
+        return [item async for item in echo.abatch_as_completed([0, 1, 2], 3)]
+
+    assert asyncio.run(run()) == [(1, 10), (2, 20), (0, 0)]
+
+
+def test_abatch_as_completed_early_exit_cancels_rest():
+    echo = _NativeAsync(delays={0: 0.0, 1: 0.2, 2: 0.2})
+
+    async def run():
+        agen = echo.abatch_as_completed([0, 1, 2], 3)
+        async for item in agen:
+            await agen.aclose()
+            return item
+
+    assert asyncio.run(run()) == (0, 0)
+    assert echo.calls == [0]
+
+
+def test_batch_as_completed_yields_in_finish_order():
+    echo = _Echo(delays={0: 0.1, 1: 0.0})
+    assert list(echo.batch_as_completed([0, 1], 2)) == [(1, 10), (0, 0)]
+    results = dict(
+        _Echo(fail_on={1}).batch_as_completed([0, 1], 2, return_exceptions=True)
+    )
+    assert isinstance(results[1], ValueError)
+
+
+def test_max_parallel_beyond_cpu_count_and_shared_pool_is_honoured():
+    for n in ((os.cpu_count() or 1) + 8, SHARED_EXECUTOR_WORKERS + 8):
+        items = list(range(n))
+        echo = _Echo(delays=dict.fromkeys(items, 0.3))
+        start = time.perf_counter()
+        assert echo.batch(items, max_parallel=n) == [i * 10 for i in items]
+        assert asyncio.run(echo.abatch(items, max_parallel=n))[-1] == (n - 1) * 10
+        assert time.perf_counter() - start < 1.5
@@ -0,0 +1,191 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+
+import pytest
+
+from hiagent_components.base import (
+    CachedExecutable,
+    Executable,
+    InMemoryCache,
+    SQLiteCache,
+)
+from hiagent_components.base.cache import MISSING
+from hiagent_components.base.deadline import DeadlineExceededError
+
+
+class _Rate(Executable[dict, dict]):
+    name = "rate"
+    description = "exchange rate"
+
+    def __init__(self, delay=0.0, market="spot"):
+        self.delay = delay
+        self.market = market
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, input, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if input.get("fail"):
+            raise ValueError("boom")
+        return {"pair": input["pair"], "unit": kwargs.get("unit", "x")}
+
+    async def ainvoke(self, input, executor=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"pair": input["pair"], "market": self.market}
+
+
+def test_hits_ignore_dict_order_and_unselected_kwargs():
+    rate = _Rate()
+    cached = rate.with_cache(key_kwargs=["unit"])
+
+    assert isinstance(cached, CachedExecutable)
+    cached.invoke({"pair": "USD/CNY", "day": 1}, unit="a", trace_id="1")
+    cached.invoke({"day": 1, "pair": "USD/CNY"}, unit="a", trace_id="2")
+    cached.invoke({"pair": "USD/CNY", "day": 1}, unit="b")
+
+    assert rate.calls == 2
+    assert cached.stats.hits == 1 and cached.stats.misses == 2
+    assert cached.stats.hit_rate == pytest.approx(1 / 3)
+
+
+def test_failures_are_not_cached():
+    rate = _Rate()
+    cached = rate.with_cache()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cached.invoke({"pair": "x", "fail": True})
+    assert rate.calls == 2
+
+
+def test_lru_and_ttl():
+    cache = InMemoryCache(max_size=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING and cache.get("a") == 1 and len(cache) == 2
+    time.sleep(0.06)
+    assert cache.get("a") is MISSING
+
+
+def test_concurrent_misses_are_deduplicated():
+    rate = _Rate(delay=0.1)
+    cached = rate.with_cache()
+    results = cached.batch([{"pair": "p"}] * 5, 5)
+
+    assert rate.calls == 1
+    assert results == [{"pair": "p", "unit": "x"}] * 5
+    assert cached.stats.deduplicated == 4
+
+
+def test_async_dedup_and_hits():
+    rate = _Rate(delay=0.05)
+    cached = rate.with_cache()
+
+    async def run():
+        first = await asyncio.gather(*(cached.ainvoke({"pair": "p"}) for _ in range(3)))
+        second = await cached.ainvoke({"pair": "p"})
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert rate.calls == 1
+    assert first == [{"pair": "p", "market": "spot"}] * 3
+    assert second == {"pair": "p", "market": "spot"}
+    assert cached.stats.hits == 1 and cached.stats.deduplicated == 2
+
+
+def test_sqlite_backend_persists(tmp_path):
+    path = str(tmp_path / "cache.db")
+    rate = _Rate()
+    rate.with_cache(SQLiteCache(path)).invoke({"pair": "p"})
+
+    again = rate.with_cache(SQLiteCache(path))
+    assert again.invoke({"pair": "p"}) == {"pair": "p", "unit": "x"}
+    assert rate.calls == 1
+
+    expiring = SQLiteCache(str(tmp_path / "ttl.db"), ttl=0.01)
+    expiring.set("k", 1)
+    time.sleep(0.02)
+    assert expiring.get("k") is MISSING
+
+
+def test_waiters_take_over_from_a_cancelled_call():
+    rate = _Rate(delay=0.1)
+    cached = rate.with_cache()
+
+    async def run():
+        owner = asyncio.ensure_future(cached.ainvoke({"pair": "p"}))
+        await asyncio.sleep(0.01)
+        waiters = [
+            asyncio.ensure_future(cached.ainvoke({"pair": "p"})) for _ in range(2)
+        ]
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(run()) == [{"pair": "p", "market": "spot"}] * 2
+    assert rate.calls == 2
+
+    # a waiter giving up does not cancel the call for everyone else
+    async def timeout_waiter():
+        owner = asyncio.ensure_future(cached.ainvoke({"pair": "q"}))
+        await asyncio.sleep(0.01)
+        with pytest.raises(DeadlineExceededError):
+            await cached.ainvoke({"pair": "q"}, timeout=0.01)
+        return await owner
+
+    assert asyncio.run(timeout_waiter()) == {"pair": "q", "market": "spot"}
+
+
+def test_sync_waiters_respect_their_deadline():
+    rate = _Rate(delay=0.3)
+    cached = rate.with_cache()
+    owner = threading.Thread(target=cached.invoke, args=({"pair": "p"},))
+    owner.start()
+    time.sleep(0.02)
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceededError):
+        cached.invoke({"pair": "p"}, timeout=0.05)
+    assert time.perf_counter() - start < 0.2
+    owner.join()
+    assert cached.invoke({"pair": "p"}) == {"pair": "p", "unit": "x"}
+    assert rate.calls == 1
+
+
+def test_default_namespace_separates_configurations(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    spot, futures = _Rate(), _Rate(market="futures")
+    spot.with_cache(cache).invoke({"pair": "p"})
+    futures.with_cache(cache).invoke({"pair": "p"})
+    assert spot.calls == futures.calls == 1
+    assert spot.with_cache(cache).namespace == _Rate().with_cache(cache).namespace
+
+
+def test_unstorable_results_are_returned_and_do_not_block(tmp_path):
+    class _Locked(_Rate):
+        def invoke(self, input, **kwargs):
+            self.calls += 1
+            return {"lock": threading.Lock()}
+
+    locked = _Locked()
+    cached = locked.with_cache(SQLiteCache(str(tmp_path / "cache.db")))
+    assert "lock" in cached.invoke({"pair": "p"})
+    assert "lock" in cached.invoke({"pair": "p"}, timeout=1)
+    assert locked.calls == 2 and not cached._inflight
@@ -0,0 +1,156 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+
+import pytest
+
+from hiagent_components.base import (
+    CallbackHandler,
+    Executable,
+    MetricsHandler,
+    OpenTelemetryHandler,
+    add_callback_handler,
+    remove_callback_handler,
+)
+from hiagent_components.base.callbacks import traced
+from hiagent_components.tool.base import BaseTool
+
+
+class _Echo(BaseTool):
+    name = "echo"
+    description = "echo"
+
+    @property
+    def input_schema(self):
+        return {"type": "object"}
+
+    def _invoke(self, input, **kwargs):
+        if input.get("fail"):
+            raise ValueError("bad input")
+        return input["text"]
+
+
+class _Words(Executable[dict, str]):
+    name = "words"
+    description = "words"
+
+    @traced
+    def stream(self, input, **kwargs):
+        return iter(input["text"].split())
+
+    @traced
+    async def astream(self, input, **kwargs):
+        for word in input["text"].split():
+            yield word
+
+    def invoke(self, input, **kwargs):
+        return input["text"]
+
+
+@pytest.fixture
+def metrics():
+    handler = MetricsHandler(track_sizes=True)
+    add_callback_handler(handler)
+    yield handler
+    remove_callback_handler(handler)
+
+
+def test_metrics_handler_counts_calls_errors_and_sizes(metrics):
+    tool = _Echo()
+    assert tool.invoke({"text": "hello"}) == "hello"
+    assert asyncio.run(tool.ainvoke({"text": "hi"})) == "hi"
+    with pytest.raises(ValueError):
+        tool.invoke({"fail": True})
+
+    stats = metrics.snapshot()[("_Echo", "echo")]
+    assert stats["calls"] == 3 and stats["in_flight"] == 0
+    assert stats["errors"] == {"ValueError": 1}
+    assert stats["latency"]["count"] == 3
+    assert stats["output_bytes"] == len("hello") + len("hi")
+    assert stats["input_bytes"] > 0
+
+
+def test_stream_chunks_and_early_stop(metrics):
+    words = _Words()
+    assert list(words.stream({"text": "a b c"})) == ["a", "b", "c"]
+
+    async def consume():
+        return [word async for word in words.astream({"text": "x y"})]
+
+    assert asyncio.run(consume()) == ["x", "y"]
+    stream = words.stream({"text": "stop here"})
+    assert next(stream) == "stop"
+    stream.close()
+
+    stats = metrics.snapshot()[("_Words", "words")]
+    assert stats["calls"] == 3 and stats["in_flight"] == 0
+    assert stats["chunks"] == 6
+    assert stats["first_chunk"]["count"] == 3
+    assert stats["errors"] == {}
+
+
+def test_failing_handler_does_not_break_calls(metrics):
+    class Broken(CallbackHandler):
+        def on_start(self, run):
+            raise RuntimeError("handler bug")
+
+    broken = Broken()
+    add_callback_handler(broken)
+    try:
+        assert _Echo().invoke({"text": "ok"}) == "ok"
+    finally:
+        remove_callback_handler(broken)
+    assert metrics.snapshot()[("_Echo", "echo")]["calls"] == 1
+
+
+def test_opentelemetry_handler_records_to_meter():
+    class Instrument:
+        def __init__(self, name):
+            self.name = name
+            self.points = []
+
+        def record(self, value, attributes=None):
+            self.points.append((value, attributes))
+
+        add = record
+
+    class Meter:
+        def __init__(self):
+            self.instruments = {}
+
+        def _create(self, name, **kwargs):
+            return self.instruments.setdefault(name, Instrument(name))
+
+        create_histogram = create_counter = create_up_down_counter = _create
+
+    meter = Meter()
+    handler = OpenTelemetryHandler(meter=meter)
+    add_callback_handler(handler)
+    try:
+        _Echo().invoke({"text": "ok"})
+        with pytest.raises(ValueError):
+            _Echo().invoke({"fail": True})
+    finally:
+        remove_callback_handler(handler)
+
+    assert len(meter.instruments["hiagent.component.duration"].points) == 2
+    assert [v for v, _ in meter.instruments["hiagent.component.in_flight"].points] == [
+        1,
+        -1,
+        1,
+        -1,
+    ]
+    ((_, attributes),) = meter.instruments["hiagent.component.errors"].points
+    assert attributes["error.type"] == "ValueError"
+    assert attributes["hiagent.component"] == "_Echo"
@@ -0,0 +1,137 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hiagent_components.base import (
+    Executable,
+    ParallelExecutable,
+    SequenceExecutable,
+    set_shared_executor,
+)
+from hiagent_components.tool.base import BaseTool
+
+
+class _Lookup(Executable[dict, str]):
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.description = f"look up {name}"
+        self.delay = delay
+        self.fail = fail
+
+    @property
+    def input_schema(self):
+        return {
+            "type": "object",
+            "properties": {"query": {"type": "string"}},
+            "required": ["query"],
+        }
+
+    def invoke(self, input, **kwargs):
+        time.sleep(self.delay)
+        if self.fail:
+            raise ValueError(self.name)
+        return f"{self.name}:{input['query']}"
+
+    async def ainvoke(self, input, executor=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ValueError(self.name)
+        return f"{self.name}:{input['query']}"
+
+
+class _Answer(Executable[dict, str]):
+    name = "answer"
+    description = "answer"
+
+    def invoke(self, input, **kwargs):
+        return " + ".join(f"{k}={v}" for k, v in sorted(input.items()))
+
+    async def astream(self, input, **kwargs):
+        for key in sorted(input):
+            yield key
+
+
+def test_dict_pipe_builds_parallel_then_sequence():
+    pipeline = {"kb": _Lookup("kb"), "terms": _Lookup("terms")} | _Answer()
+
+    assert isinstance(pipeline, SequenceExecutable)
+    assert isinstance(pipeline.steps[0], ParallelExecutable)
+    assert pipeline.invoke({"query": "q"}) == "kb=kb:q + terms=terms:q"
+    assert asyncio.run(pipeline.ainvoke({"query": "q"})) == "kb=kb:q + terms=terms:q"
+    assert pipeline.input_schema["required"] == ["query"]
+
+
+def test_sequence_flattens_and_wraps_functions():
+    pipeline = _Lookup("a") | (lambda s: {"query": s.upper()}) | _Lookup("b")
+    assert len(pipeline.steps) == 3
+    assert pipeline.invoke({"query": "x"}) == "b:A:X"
+
+
+def test_parallel_branches_run_concurrently():
+    parallel = ParallelExecutable({"a": _Lookup("a", 0.2), "b": _Lookup("b", 0.2)})
+
+    start = time.perf_counter()
+    assert asyncio.run(parallel.ainvoke({"query": "q"})) == {"a": "a:q", "b": "b:q"}
+    assert time.perf_counter() - start < 0.35
+
+    start = time.perf_counter()
+    assert parallel.invoke({"query": "q"}) == {"a": "a:q", "b": "b:q"}
+    assert time.perf_counter() - start < 0.35
+
+
+def test_parallel_failure_propagates():
+    parallel = ParallelExecutable(
+        {"a": _Lookup("a", 0.5), "b": _Lookup("b", fail=True)}
+    )
+    with pytest.raises(ValueError, match="b"):
+        asyncio.run(parallel.ainvoke({"query": "q"}))
+
+
+def test_sequence_streams_last_stage():
+    pipeline = {"kb": _Lookup("kb"), "terms": _Lookup("terms")} | _Answer()
+
+    async def collect():
+        return [chunk async for chunk in pipeline.astream({"query": "q"})]
+
+    assert asyncio.run(collect()) == ["kb", "terms"]
+    assert list(pipeline.stream({"query": "q"})) == ["kb=kb:q + terms=terms:q"]
+
+
+def test_composite_as_tool_and_abatch():
+    pipeline = {"kb": _Lookup("kb", 0.05)} | _Answer()
+    tool = pipeline.as_tool(name="kb_answer")
+
+    assert isinstance(tool, BaseTool)
+    assert tool.invoke({"query": "q"}) == "kb=kb:q"
+    assert asyncio.run(tool.ainvoke({"query": "q"})) == "kb=kb:q"
+    assert asyncio.run(pipeline.abatch([{"query": "a"}, {"query": "b"}], 2)) == [
+        "kb=kb:a",
+        "kb=kb:b",
+    ]
+
+
+def test_nested_parallel_in_batch_does_not_deadlock():
+    previous = set_shared_executor(ThreadPoolExecutor(max_workers=2))
+    try:
+        parallel = ParallelExecutable(
+            {"a": _Lookup("a", 0.01), "b": _Lookup("b", 0.01)}
+        )
+        results = parallel.batch([{"query": str(i)} for i in range(4)], 4)
+        assert results[3] == {"a": "a:3", "b": "b:3"}
+    finally:
+        set_shared_executor(previous)
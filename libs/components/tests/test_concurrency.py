@@ -0,0 +1,103 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+
+import pytest
+
+from hiagent_components.base import (
+    ConcurrencyLimitedExecutable,
+    Executable,
+    get_concurrency_limiter,
+)
+from hiagent_components.base.deadline import DeadlineExceededError
+
+
+class _Probe(Executable[dict, int]):
+    """Sleeps and records the highest number of calls seen running at once."""
+
+    def __init__(self, counter, delay=0.05):
+        self.name = "probe"
+        self.description = "probe"
+        self.counter = counter
+        self.delay = delay
+
+    def _enter(self):
+        with self.counter["lock"]:
+            self.counter["running"] += 1
+            self.counter["peak"] = max(self.counter["peak"], self.counter["running"])
+
+    def _exit(self):
+        with self.counter["lock"]:
+            self.counter["running"] -= 1
+
+    def invoke(self, input, **kwargs):
+        self._enter()
+        time.sleep(self.delay)
+        self._exit()
+        return input["i"]
+
+    async def ainvoke(self, input, executor=None, **kwargs):
+        self._enter()
+        await asyncio.sleep(self.delay)
+        self._exit()
+        return input["i"]
+
+
+def _counter():
+    return {"lock": threading.Lock(), "running": 0, "peak": 0}
+
+
+def test_limit_is_shared_across_instances_threads_and_coroutines():
+    counter = _counter()
+    a = _Probe(counter).with_concurrency_limit("test-shared", 2)
+    b = _Probe(counter).with_concurrency_limit("test-shared")
+    assert isinstance(a, ConcurrencyLimitedExecutable)
+    assert a.limiter is b.limiter
+
+    async def run_async():
+        return await asyncio.gather(*(b.ainvoke({"i": i}) for i in range(6)))
+
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(a=asyncio.run(run_async())))
+    thread.start()
+    assert a.batch([{"i": i} for i in range(6)], max_parallel=6) == list(range(6))
+    thread.join()
+
+    assert results["a"] == list(range(6))
+    assert counter["peak"] == 2
+    stats = a.limiter.stats
+    assert stats.acquired == 12 and stats.queued > 0
+    assert stats.max_wait >= stats.mean_wait > 0
+    assert a.limiter.in_use == 0 and a.limiter.waiting == 0
+
+
+def test_queued_call_respects_deadline_and_frees_its_place():
+    limiter = get_concurrency_limiter("test-deadline", 1)
+    slow = _Probe(_counter(), delay=0.3).with_concurrency_limit("test-deadline")
+
+    async def main():
+        first = asyncio.ensure_future(slow.ainvoke({"i": 0}))
+        await asyncio.sleep(0.05)
+        with pytest.raises(DeadlineExceededError):
+            await slow.ainvoke({"i": 1}, timeout=0.05)
+        assert limiter.waiting == 0
+        return await first
+
+    assert asyncio.run(main()) == 0
+    with limiter.slot():
+        with pytest.raises(DeadlineExceededError):
+            slow.invoke({"i": 2}, timeout=0.05)
+    assert limiter.in_use == 0 and limiter.waiting == 0
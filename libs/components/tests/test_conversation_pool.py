@@ -0,0 +1,123 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import itertools
+import threading
+import time
+
+from hiagent_api.chat_types import CreateConversationResponse
+
+from hiagent_components.agent import Agent, ConversationPool
+
+
+class _FakeChatService:
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.calls = []
+
+    def _create(self, kind, conversation):
+        with self.lock:
+            self.calls.append((kind, dict(conversation.inputs)))
+            n = next(self.ids)
+        return CreateConversationResponse.model_validate(
+            {"Conversation": {"AppConversationID": f"conv-{n}"}}
+        )
+
+    def create_conversation(self, app_key, conversation):
+        return self._create("sync", conversation)
+
+    async def acreate_conversation(self, app_key, conversation):
+        return self._create("async", conversation)
+
+    def get_app(self, app_key, params):
+        raise AssertionError("get_app should be skipped when name is given")
+
+    aget_app = get_app
+
+
+def _wait_ready(pool, n, **key):
+    deadline = time.monotonic() + 5
+    while pool.ready("app", "u", **key) < n:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_checkout_is_served_from_pool_and_replenished():
+    svc = _FakeChatService()
+    pool = ConversationPool(svc, size=2)
+    pool.prefill("app", "u", {"lang": "en"})
+    _wait_ready(pool, 2, inputs={"lang": "en"})
+
+    first = pool.checkout("app", "u", {"lang": "en"})
+    second = pool.checkout("app", "u", {"lang": "en"})
+    assert first != second
+    assert pool.stats.hits == 2 and pool.stats.misses == 0
+    _wait_ready(pool, 2, inputs={"lang": "en"})
+    assert len(svc.calls) == 4
+    assert all(inputs == {"lang": "en"} for _, inputs in svc.calls)
+    # other inputs get their own conversations
+    assert pool.ready("app", "u", {"lang": "fr"}) == 0
+    pool.close()
+
+
+def test_ainit_uses_pool_then_async_create():
+    svc = _FakeChatService()
+    pool = ConversationPool(svc, size=1)
+    pool.prefill("app", "u", {})
+    _wait_ready(pool, 1, inputs={})
+
+    async def main():
+        pooled = await Agent.ainit(
+            svc, "app", "u", {}, name="a", conversation_pool=pool
+        )
+        direct = await Agent.ainit(svc, "app", "u", {"x": "1"}, name="a")
+        return pooled, direct
+
+    pooled, direct = asyncio.run(main())
+    assert pooled.conversation_id == "conv-1"
+    assert direct.conversation_id != pooled.conversation_id
+    assert ("async", {"x": "1"}) in svc.calls
+    assert ("sync", {"x": "1"}) not in svc.calls
+    pool.close()
+
+
+def test_key_accepts_any_inputs_and_ignores_order():
+    svc = _FakeChatService()
+    pool = ConversationPool(svc, size=1)
+    pool.prefill("app", "u", {"lang": "en", "tone": "formal"})
+    _wait_ready(pool, 1, inputs={"tone": "formal", "lang": "en"})
+    assert pool.ready("app", "u", {"tags": ["a"], "filters": {"top": 3}}) == 0
+    assert pool.ready("app", "u", {1: "x", "1": "y"}) == 0
+    pool.close()
+
+
+def test_cold_keys_are_not_filled_and_keys_are_bounded():
+    svc = _FakeChatService()
+    pool = ConversationPool(svc, size=2, max_keys=2)
+    # a one-off user costs one request and no background fill
+    pool.checkout("app", "once")
+    time.sleep(0.05)
+    assert len(svc.calls) == 1
+
+    # a returning user starts the fill on their second checkout
+    pool.checkout("app", "u")
+    pool.checkout("app", "u")
+    _wait_ready(pool, 2)
+    assert len(svc.calls) == 5
+
+    for user in ("x", "y", "z"):
+        pool.checkout("app", user)
+    assert len(pool) == 2 and pool.ready("app", "u") == 0
+    pool.close()
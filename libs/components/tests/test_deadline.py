@@ -0,0 +1,115 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from hiagent_components.base import Executable
+from hiagent_components.base.deadline import (
+    DeadlineExceededError,
+    deadline,
+    remaining_time,
+    timeout_kwarg,
+)
+from hiagent_components.workflow.base import Workflow
+
+
+class _Flaky(Executable[dict, str]):
+    name = "flaky"
+    description = "always fails"
+
+    def __init__(self):
+        self.attempts = 0
+
+    def invoke(self, input, **kwargs):
+        self.attempts += 1
+        raise ConnectionError("down")
+
+
+class _Probe(Executable[dict, float]):
+    name = "probe"
+    description = "reports the remaining deadline"
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def invoke(self, input, **kwargs):
+        assert "timeout" not in kwargs
+        return remaining_time()
+
+    @timeout_kwarg
+    async def ainvoke(self, input, executor=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        return remaining_time()
+
+
+class _RunningForever:
+    def run_workflow_async(self, app_key, req):
+        return SimpleNamespace(run_id="r1")
+
+    def query_workflow_status(self, app_key, req):
+        return SimpleNamespace(status="processing", output="")
+
+    async def arun_workflow_async(self, app_key, req):
+        return self.run_workflow_async(app_key, req)
+
+    async def aquery_workflow_status(self, app_key, req):
+        return self.query_workflow_status(app_key, req)
+
+
+def test_nested_deadline_keeps_the_earliest():
+    with deadline(0.5):
+        with deadline(10):
+            assert remaining_time() <= 0.5
+    assert remaining_time() is None
+
+
+def test_retry_stops_at_deadline():
+    flaky = _Flaky()
+    retrying = flaky.with_retry(max_attempts=1000)
+
+    start = time.monotonic()
+    with pytest.raises(ConnectionError):
+        retrying.invoke({}, timeout=0.5)
+    assert time.monotonic() - start < 1.5
+    assert 1 < flaky.attempts < 1000
+
+
+def test_workflow_polling_respects_timeout():
+    workflow = Workflow(_RunningForever(), "app", "user", {}, "wf", "")
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        workflow.invoke({"q": 1}, timeout=0.3)
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(workflow.ainvoke({"q": 1}, timeout=0.3))
+    assert time.monotonic() - start < 2
+
+
+def test_deadline_flows_into_composition_and_batch_threads():
+    pipeline = _Probe() | (lambda remaining: remaining)
+    assert 0 < pipeline.invoke({}, timeout=5) <= 5
+    assert pipeline.invoke({}) is None
+
+    results = _Probe().batch([{}, {}, {}], 2, timeout=5)
+    assert all(r is not None and r <= 5 for r in results)
+    results = asyncio.run(_Probe().abatch([{}, {}], 2, timeout=5))
+    assert all(r is not None and r <= 5 for r in results)
+
+
+def test_ainvoke_timeout_cancels_slow_call():
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(_Probe(delay=1).ainvoke({}, timeout=0.1))
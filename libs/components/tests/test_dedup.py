@@ -0,0 +1,86 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+import time
+
+import pytest
+from hiagent_api.knowledgebase_types import QueryResponse, Result
+
+from hiagent_components.retriever import NearDuplicateFilter
+
+BASE = (
+    "The retention policy keeps audit logs for ninety days. After that the logs "
+    "are archived to cold storage and deleted after one year unless a legal hold "
+    "applies to the workspace."
+)
+
+
+def _result(segment_id, content):
+    return Result(
+        dataset_id="ds",
+        dataset_name="ds",
+        document_id=segment_id,
+        document_name=segment_id,
+        segment_id=segment_id,
+        content=content,
+        score=0.5,
+    )
+
+
+def _results():
+    return [
+        _result("v1", BASE),
+        _result("other", "Workspaces can be shared with up to fifty members."),
+        _result("v2", BASE.replace("ninety", "90")),
+        _result("v3", "  " + BASE.upper() + "  "),
+        _result("zh", "审计日志保留九十天，之后归档到冷存储并在一年后删除。"),
+        _result("zh2", "审计日志保留九十天，之后归档到冷存储，并在一年后删除。"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "dedup",
+    [NearDuplicateFilter(), NearDuplicateFilter(method="simhash", max_distance=12)],
+)
+def test_near_duplicates_are_dropped(dedup):
+    kept = dedup(QueryResponse(results=_results()))
+    assert isinstance(kept, QueryResponse)
+    assert [r.segment_id for r in kept.results] == ["v1", "other", "zh"]
+
+
+def test_threshold_controls_strictness():
+    strict = NearDuplicateFilter(threshold=1.0)
+    kept = strict.filter(_results())
+    assert [r.segment_id for r in kept] == ["v1", "other", "v2", "zh", "zh2"]
+
+
+def test_filter_accepts_documents_and_keys():
+    class Document:
+        def __init__(self, page_content):
+            self.page_content = page_content
+
+    docs = [Document(BASE), Document(BASE + " ")]
+    assert len(NearDuplicateFilter().filter(docs)) == 1
+    texts = [BASE, BASE.lower()]
+    assert NearDuplicateFilter().filter(texts, key=lambda t: t) == [BASE]
+
+
+def test_scales_to_many_candidates():
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(2000)]
+    texts = [" ".join(rng.choices(words, k=80)) for _ in range(1000)]
+    start = time.perf_counter()
+    kept = NearDuplicateFilter().filter(texts + texts, key=lambda t: t)
+    assert len(kept) == 1000
+    assert time.perf_counter() - start < 2
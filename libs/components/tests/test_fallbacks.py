@@ -0,0 +1,132 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+
+import pytest
+
+from hiagent_components.base import Executable, FallbackExecutable
+from hiagent_components.base.deadline import DeadlineExceededError, poll_interval
+
+
+class _Answer(Executable[dict, str]):
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.description = name
+        self.delay = delay
+        self.error = error
+
+    def invoke(self, input, **kwargs):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.name
+
+    async def ainvoke(self, input, executor=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.name
+
+
+def test_error_falls_back_and_is_recorded():
+    chain = _Answer("agent", error=ConnectionError("down")).with_fallbacks(
+        [_Answer("blocking")]
+    )
+    assert isinstance(chain, FallbackExecutable)
+    assert chain.invoke({}) == "blocking"
+    assert asyncio.run(chain.ainvoke({})) == "blocking"
+    assert chain.served == {"blocking": 2}
+    assert chain.records[-1].index == 1 and chain.records[-1].failed == 1
+
+
+def test_latency_budget_starts_fallback():
+    chain = _Answer("agent", delay=1).with_fallbacks([_Answer("cached")], timeout=0.1)
+
+    start = time.perf_counter()
+    assert asyncio.run(chain.ainvoke({})) == "cached"
+    assert chain.invoke({}) == "cached"
+    assert time.perf_counter() - start < 1.5
+    assert chain.records[-1].timed_out == 1
+
+
+def test_slow_primary_can_still_win_after_budget():
+    chain = _Answer("agent", delay=0.15).with_fallbacks(
+        [_Answer("cached", delay=1)], timeout=0.05
+    )
+    assert asyncio.run(chain.ainvoke({})) == "agent"
+    assert chain.served == {"agent": 1}
+
+
+class _Poller(Executable[dict, str]):
+    """Polls for ``duration`` seconds, like a workflow waiting for its run."""
+
+    name = "poller"
+    description = "poller"
+
+    def __init__(self, duration=2):
+        self.duration = duration
+        self.stopped = threading.Event()
+
+    def invoke(self, input, **kwargs):
+        end = time.monotonic() + self.duration
+        try:
+            while time.monotonic() < end:
+                time.sleep(poll_interval(0.01))
+            return self.name
+        except DeadlineExceededError:
+            self.stopped.set()
+            raise
+
+
+def test_losing_thread_candidates_are_cancelled():
+    for run in (lambda c: c.invoke({}), lambda c: asyncio.run(c.ainvoke({}))):
+        poller = _Poller()
+        chain = poller.with_fallbacks([_Answer("fast", delay=0.05)], race=True)
+        assert run(chain) == "fast"
+        assert poller.stopped.wait(0.5)
+
+
+def test_race_takes_fastest():
+    chain = _Answer("agent", delay=0.3).with_fallbacks(
+        [_Answer("a", delay=0.2), _Answer("b", delay=0.01)], race=True
+    )
+    assert asyncio.run(chain.ainvoke({})) == "b"
+    assert chain.invoke({}) == "b"
+
+
+def test_errors_outside_on_are_raised():
+    chain = _Answer("agent", error=KeyError("x")).with_fallbacks(
+        [_Answer("b")], on=(ConnectionError,)
+    )
+    with pytest.raises(KeyError):
+        chain.invoke({})
+    with pytest.raises(KeyError):
+        asyncio.run(chain.ainvoke({}))
+
+
+def test_all_failing_raises_last_error():
+    chain = _Answer("agent", error=ConnectionError("a")).with_fallbacks(
+        [_Answer("b", error=ConnectionError("b"))]
+    )
+    with pytest.raises(ConnectionError, match="b"):
+        asyncio.run(chain.ainvoke({}))
+
+
+def test_stream_falls_back_before_first_chunk():
+    chain = _Answer("agent", error=ConnectionError("down")).with_fallbacks(
+        [_Answer("blocking")]
+    )
+    assert list(chain.stream({})) == ["blocking"]
@@ -0,0 +1,205 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+
+import pytest
+from hiagent_api.knowledgebase_types import QueryResponse, Result
+
+from hiagent_components.base.deadline import DeadlineExceededError, poll_interval
+from hiagent_components.retriever import (
+    FusedQueryResponse,
+    FusionRetriever,
+    KnowledgeRetriever,
+    fuse_results,
+)
+
+
+def _result(document_id, score, segment_id="0"):
+    return Result(
+        dataset_id="ds",
+        dataset_name="ds",
+        document_id=document_id,
+        document_name=document_id,
+        segment_id=segment_id,
+        content=f"{document_id}/{segment_id}",
+        score=score,
+    )
+
+
+class _Service:
+    def __init__(self, results, delay=0.0, error=None):
+        self.results = results
+        self.delay = delay
+        self.error = error
+
+    def query(self, req):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return QueryResponse(results=self.results)
+
+    async def aquery(self, req):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return QueryResponse(results=self.results)
+
+
+class _ShardedService:
+    """Answers each dataset after its own delay with one result named after it."""
+
+    def __init__(self, delays):
+        self.delays = delays
+
+    def _delay(self, req):
+        return max(self.delays[d] for d in req.dataset_ids)
+
+    def _answer(self, req):
+        return QueryResponse(results=[_result(d, 0.5) for d in req.dataset_ids])
+
+    def query(self, req):
+        time.sleep(self._delay(req))
+        return self._answer(req)
+
+    async def aquery(self, req):
+        await asyncio.sleep(self._delay(req))
+        return self._answer(req)
+
+
+class _PollingService:
+    """Waits for a result by polling, like a slow backend honouring deadlines."""
+
+    def __init__(self):
+        self.stopped = threading.Event()
+
+    def query(self, req):
+        end = time.monotonic() + 3
+        try:
+            while time.monotonic() < end:
+                time.sleep(poll_interval(0.01))
+            return QueryResponse(results=[])
+        except DeadlineExceededError:
+            self.stopped.set()
+            raise
+
+
+def _retriever(name, results, **kwargs):
+    return KnowledgeRetriever(
+        _Service(results, **kwargs), name, name, "workspace", ["ds"]
+    )
+
+
+def test_rrf_rewards_agreement_and_dedups():
+    fused = fuse_results(
+        [
+            [_result("a", 0.9), _result("b", 0.8), _result("c", 0.7)],
+            [_result("c", 0.95), _result("a", 0.6), _result("a", 0.5)],
+        ],
+        top_k=2,
+    )
+    assert [r.document_id for r in fused] == ["a", "c"]
+    assert fused[0].score == pytest.approx(1 / 61 + 1 / 62)
+
+
+def test_weighted_scores():
+    fused = fuse_results(
+        [[_result("a", 0.9)], [_result("b", 0.6), _result("a", 0.1)]],
+        weights=[0.5, 1.0],
+        method="weighted",
+    )
+    assert [(r.document_id, r.score) for r in fused] == [
+        ("b", pytest.approx(0.6)),
+        ("a", pytest.approx(0.55)),
+    ]
+
+
+def test_runs_concurrently_and_skips_slow_retrievers():
+    fusion = FusionRetriever(
+        [
+            _retriever("docs", [_result("a", 0.9), _result("b", 0.8)], delay=0.1),
+            _retriever("faq", [_result("b", 0.9)], delay=0.1),
+            _retriever("slow", [_result("z", 1.0)], delay=2),
+        ],
+        top_k=1,
+        timeout=0.5,
+    )
+
+    start = time.perf_counter()
+    for resp in (
+        fusion.invoke({"query": "q"}),
+        asyncio.run(fusion.ainvoke({"query": "q"})),
+    ):
+        assert isinstance(resp, FusedQueryResponse)
+        assert [r.document_id for r in resp.results] == ["b"]
+        assert resp.partial and resp.missing == ["slow"]
+    assert time.perf_counter() - start < 1.5
+
+
+def test_failures_are_tolerated_until_all_fail():
+    fusion = FusionRetriever(
+        [
+            _retriever("docs", [_result("a", 0.9)]),
+            _retriever("broken", [], error=ConnectionError("down")),
+        ]
+    )
+    resp = asyncio.run(fusion.ainvoke({"query": "q"}))
+    assert [r.document_id for r in resp.results] == ["a"]
+    assert resp.missing == ["broken"]
+
+    failing = FusionRetriever([_retriever("broken", [], error=ConnectionError("down"))])
+    with pytest.raises(ConnectionError):
+        failing.invoke({"query": "q"})
+
+
+def test_deadline_returns_partial_fused_results():
+    sharded = KnowledgeRetriever(
+        _ShardedService({"fast": 0.05, "slow": 2}),
+        "sharded",
+        "sharded",
+        "workspace",
+        ["fast", "slow"],
+        shard_by_dataset=True,
+    )
+    fusion = FusionRetriever(
+        [
+            _retriever("docs", [_result("a", 0.9)], delay=0.05),
+            _retriever("slow", [_result("z", 1.0)], delay=2),
+            sharded,
+        ]
+    )
+
+    start = time.perf_counter()
+    for resp in (
+        fusion.invoke({"query": "q"}, timeout=0.3),
+        asyncio.run(fusion.ainvoke({"query": "q"}, timeout=0.3)),
+    ):
+        assert [r.document_id for r in resp.results] == ["a", "fast"]
+        assert resp.partial and resp.missing == ["slow"]
+    assert time.perf_counter() - start < 1.5
+
+
+def test_slow_branches_are_released_at_the_budget():
+    polling = _PollingService()
+    fusion = FusionRetriever(
+        [
+            _retriever("docs", [_result("a", 0.9)]),
+            KnowledgeRetriever(polling, "slow", "slow", "workspace", ["ds"]),
+        ],
+        timeout=0.1,
+    )
+    resp = fusion.invoke({"query": "q"})
+    assert resp.missing == ["slow"]
+    assert polling.stopped.wait(0.5)
@@ -0,0 +1,75 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+
+import pytest
+from hiagent_api.tool_types import ExecArchivedToolResponse
+
+from hiagent_components.tool import Tool
+from hiagent_components.workflow import Workflow
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"city": {"type": "string"}, "days": {"type": "integer"}},
+    "required": ["city"],
+}
+
+
+class _ToolService:
+    def __init__(self):
+        self.requests = []
+
+    def exec_archived_tool(self, req):
+        self.requests.append(req)
+        return ExecArchivedToolResponse(output="sunny", success=True, reason="")
+
+    async def aexec_archived_tool(self, req):
+        return self.exec_archived_tool(req)
+
+
+def _tool(svc, **kwargs):
+    return Tool(svc, "ws", "plugin", "tool", SCHEMA, "weather", "weather", **kwargs)
+
+
+def test_tool_rejects_bad_input_locally():
+    svc = _ToolService()
+    tool = _tool(svc, credentials={"token": "密钥"})
+
+    assert tool.invoke({"city": "Beijing", "days": 3}) == "sunny"
+    assert asyncio.run(tool.ainvoke({"city": "Beijing"})) == "sunny"
+    with pytest.raises(ValueError, match="input.days should be integer"):
+        tool.invoke({"city": "Beijing", "days": "3"})
+    with pytest.raises(ValueError, match="input.city is required"):
+        asyncio.run(tool.ainvoke({}))
+    assert len(svc.requests) == 2
+    assert svc.requests[0].config == '{"token": "密钥"}'
+
+    tool.credentials = None
+    tool.invoke({"city": "Beijing"})
+    assert svc.requests[-1].config == ""
+
+    unchecked = _tool(svc, validate_input=False)
+    assert unchecked.invoke({}) == "sunny"
+
+
+def test_workflow_rejects_bad_input_before_running():
+    class _WorkflowService:
+        def run_workflow_async(self, app_key, req):
+            raise AssertionError("should not run")
+
+    workflow = Workflow(_WorkflowService(), "app", "user", SCHEMA, "wf", "wf")
+    with pytest.raises(ValueError, match="input.city is required"):
+        workflow.invoke({"days": 1})
+    with pytest.raises(ValueError):
+        workflow.stream({"city": 1})
@@ -0,0 +1,136 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+
+import pytest
+from hiagent_api.chat_types import CreateConversationResponse
+from hiagent_api.tool_types import GetArchivedToolResponse
+from hiagent_api.workflow_types import FieldDefinition
+
+from hiagent_components.base.deadline import remaining_time
+from hiagent_components.loader import ComponentLoader
+from hiagent_components.tool import Tool
+
+
+class _ToolService:
+    def __init__(self, delay=0.1, missing=()):
+        self.delay = delay
+        self.missing = set(missing)
+
+    def _response(self, req):
+        if req.id in self.missing:
+            raise Exception(f"tool {req.id} not found")
+        return GetArchivedToolResponse(
+            plugin_id="plugin",
+            name=f"tool-{req.id}",
+            description="",
+            input_schema=FieldDefinition(
+                name="input",
+                type=4,
+                sub_parameters=[FieldDefinition(name="q", type=0, required=True)],
+            ),
+        )
+
+    def get_archived_tool(self, req):
+        time.sleep(self.delay)
+        return self._response(req)
+
+    async def aget_archived_tool(self, req):
+        await asyncio.sleep(self.delay)
+        return self._response(req)
+
+
+class _PollingToolService(_ToolService):
+    """Waits like a request that honours the deadline, for at most 3s."""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def get_archived_tool(self, req):
+        end = time.monotonic() + 3
+        while time.monotonic() < end:
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                break
+            time.sleep(0.01)
+        self.released.set()
+        return self._response(req)
+
+
+class _ChatService:
+    def create_conversation(self, app_key, conversation):
+        return CreateConversationResponse.model_validate(
+            {"Conversation": {"AppConversationID": f"conv-{conversation.user_id}"}}
+        )
+
+
+def _loader(svc):
+    ids = [str(i) for i in range(40)]
+    return ComponentLoader(max_parallel=20).add_tools(svc, "ws", ids)
+
+
+def test_loads_concurrently_and_reports_failures():
+    svc = _ToolService(missing={"7"})
+    loader = _loader(svc)
+    assert len(loader) == 40
+
+    for load in (loader.load, lambda: asyncio.run(loader.aload())):
+        start = time.perf_counter()
+        result = load()
+        assert time.perf_counter() - start < 1
+        assert len(result.tools) == 39 and not result.ok
+        assert [(f.kind, f.key) for f in result.failures] == [("tool", "7")]
+        tool = result.tools["3"]
+        assert isinstance(tool, Tool) and tool.name == "tool-3"
+        assert tool.input_schema["required"] == ["q"]
+
+
+def test_timeout_applies_per_component():
+    svc = _ToolService(delay=1)
+    loader = ComponentLoader(timeout=0.1).add_tool(svc, "ws", "slow")
+    result = asyncio.run(loader.aload())
+    assert isinstance(result.failures[0].error, TimeoutError)
+
+
+def test_duplicate_keys_are_rejected():
+    loader = ComponentLoader().add_tool(_ToolService(), "ws", "1")
+    with pytest.raises(ValueError, match="tool 1 is already registered"):
+        loader.add_tool(_ToolService(), "ws", "1")
+    assert len(loader) == 1
+
+
+def test_timeout_bounds_the_requests_of_a_component():
+    svc = _PollingToolService()
+    loader = ComponentLoader(timeout=0.2).add_tool(svc, "ws", "slow")
+    result = loader.load()
+    assert isinstance(result.failures[0].error, TimeoutError)
+    assert svc.released.wait(1)
+
+
+def test_agents_are_keyed_by_app_key_and_user():
+    svc = _ChatService()
+    loader = ComponentLoader()
+    loader.add_agent(svc, "app", "alice", name="a").add_agent(
+        svc, "app", "bob", name="a"
+    )
+    with pytest.raises(ValueError, match="already registered"):
+        loader.add_agent(svc, "app", "alice", name="a")
+
+    result = loader.load()
+    assert result.ok
+    assert result.agents[("app", "alice")].conversation_id == "conv-alice"
+    assert result.agents[("app", "bob")].conversation_id == "conv-bob"
@@ -0,0 +1,79 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+import time
+
+from hiagent_api.knowledgebase_types import QueryResponse, Result
+
+from hiagent_components.retriever import approximate_tokens, pack_context
+
+
+def _result(segment_id, tokens, score):
+    return Result(
+        dataset_id="ds",
+        dataset_name="ds",
+        document_id="doc",
+        document_name="doc",
+        segment_id=segment_id,
+        content="abcd" * tokens,
+        score=score,
+    )
+
+
+def test_approximate_tokens():
+    assert approximate_tokens("") == 0
+    assert approximate_tokens("abcdefgh") == 2
+    assert approximate_tokens("检索增强") == 4
+
+
+def test_greedy_respects_budget_and_reports_dropped():
+    results = [
+        _result("big", 90, 0.9),
+        _result("a", 30, 0.6),
+        _result("b", 30, 0.5),
+        _result("c", 30, 0.4),
+    ]
+    packed = pack_context(QueryResponse(results=results), max_tokens=100, separator="")
+    assert [r.segment_id for r in packed.results] == ["a", "b", "c"]
+    assert packed.tokens == 90
+    assert packed.dropped == ["big"]
+
+    packed = pack_context(results, max_tokens=100, separator="", order="input")
+    assert packed.text == "abcd" * 90
+
+
+def test_knapsack_beats_greedy_when_density_misleads():
+    results = [_result("small", 10, 0.2), _result("x", 50, 0.8), _result("y", 50, 0.8)]
+    greedy = pack_context(results, max_tokens=100, separator="")
+    exact = pack_context(results, max_tokens=100, separator="", method="knapsack")
+    assert sum(r.score for r in greedy.results) < sum(r.score for r in exact.results)
+    assert [r.segment_id for r in exact.results] == ["x", "y"]
+
+
+def test_separators_count_towards_budget():
+    results = [_result(str(i), 10, 0.5) for i in range(5)]
+    packed = pack_context(results, max_tokens=32, separator="\n\n")
+    assert approximate_tokens(packed.text) <= 32
+    assert len(packed.results) == 3
+
+
+def test_thousands_of_chunks_are_fast():
+    rng = random.Random(0)
+    results = [_result(str(i), rng.randint(50, 300), rng.random()) for i in range(5000)]
+    start = time.perf_counter()
+    packed = pack_context(results, max_tokens=8000)
+    elapsed = time.perf_counter() - start
+    assert packed.tokens <= 8000
+    assert len(packed.results) + len(packed.dropped) == 5000
+    assert elapsed < 0.5
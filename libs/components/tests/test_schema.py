@@ -0,0 +1,60 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import re
+
+import pytest
+from hiagent_api.workflow_types import FieldDefinition
+
+from hiagent_components.utils.schema import (
+    compile_validator,
+    convert_hiagent_schema_to_json_schema,
+)
+
+
+def test_convert_returns_independent_copies():
+    fields = [FieldDefinition(name="q", type=0, desc="query", required=True)]
+    first = convert_hiagent_schema_to_json_schema(fields)
+    first["properties"]["q"]["description"] = "changed"
+    assert convert_hiagent_schema_to_json_schema(fields)["properties"]["q"] == {
+        "type": "string",
+        "description": "query",
+    }
+
+
+def test_compile_validator():
+    validate = compile_validator(
+        convert_hiagent_schema_to_json_schema(
+            [
+                FieldDefinition(name="q", type=0, required=True),
+                FieldDefinition(name="n", type=1),
+                FieldDefinition(name="tags", type=5),
+                FieldDefinition(name="extra", type=-1),
+                FieldDefinition(name="files", type=11),
+            ]
+        )
+    )
+    validate({"q": "x", "n": 1, "tags": ["a"], "extra": object(), "other": 1})
+    validate({"q": "x", "n": None})
+
+    cases = [
+        ({}, "input.q is required"),
+        ({"q": 1}, "input.q should be string, got int"),
+        ({"q": "x", "n": True}, "input.n should be integer, got bool"),
+        ({"q": "x", "tags": ["a", 2]}, "input.tags[1] should be string"),
+        ({"q": "x", "files": [{"name": "a"}]}, "input.files[0].url is required"),
+        ("x", "input should be object"),
+    ]
+    for value, message in cases:
+        with pytest.raises(ValueError, match=re.escape(message)):
+            validate(value)
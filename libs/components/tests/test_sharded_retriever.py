@@ -0,0 +1,116 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import time
+
+import pytest
+from hiagent_api.knowledgebase_types import QueryResponse, Result
+
+from hiagent_components.retriever import FusedQueryResponse, KnowledgeRetriever
+
+
+def _result(dataset_id, score):
+    return Result(
+        dataset_id=dataset_id,
+        dataset_name=dataset_id,
+        document_id=f"{dataset_id}-doc",
+        document_name="doc",
+        segment_id=str(score),
+        content=f"{dataset_id} {score}",
+        score=score,
+    )
+
+
+class _Service:
+    """Each dataset answers after its own delay with its own scores."""
+
+    def __init__(self, datasets):
+        self.datasets = datasets
+        self.requests = []
+
+    def _answer(self, req):
+        self.requests.append(req.dataset_ids)
+        results = []
+        for dataset_id in req.dataset_ids:
+            value = self.datasets[dataset_id][1]
+            if isinstance(value, Exception):
+                raise value
+            results += [_result(dataset_id, score) for score in value]
+        return QueryResponse(results=results)
+
+    def query(self, req):
+        time.sleep(max(self.datasets[d][0] for d in req.dataset_ids))
+        return self._answer(req)
+
+    async def aquery(self, req):
+        await asyncio.sleep(max(self.datasets[d][0] for d in req.dataset_ids))
+        return self._answer(req)
+
+
+def _retriever(datasets, **kwargs):
+    svc = _Service(datasets)
+    return svc, KnowledgeRetriever(
+        svc, "kb", "kb", "workspace", list(datasets), top_k=3, **kwargs
+    )
+
+
+def test_unsharded_by_default():
+    svc, retriever = _retriever({"a": (0, [0.9]), "b": (0, [0.8])})
+    resp = retriever.invoke({"query": "q"})
+    assert not isinstance(resp, FusedQueryResponse)
+    assert svc.requests == [["a", "b"]]
+
+
+def test_shards_merge_by_score():
+    datasets = {"a": (0.05, [0.9, 0.6]), "b": (0.1, [0.8, 0.7, 0.5])}
+    svc, retriever = _retriever(datasets, shard_by_dataset=True)
+    for resp in (
+        retriever.invoke({"query": "q"}),
+        asyncio.run(retriever.ainvoke({"query": "q"})),
+    ):
+        assert [r.score for r in resp.results] == [0.9, 0.8, 0.7]
+        assert not resp.partial
+    assert sorted(svc.requests) == [["a"], ["a"], ["b"], ["b"]]
+    metrics = retriever.shard_metrics()
+    assert metrics["a"]["calls"] == 2 and metrics["a"]["latency"]["count"] == 2
+
+
+def test_deadline_returns_partial_results():
+    datasets = {"fast": (0.05, [0.7]), "slow": (2, [0.99])}
+    _, retriever = _retriever(datasets, shard_by_dataset=True)
+
+    start = time.perf_counter()
+    for resp in (
+        retriever.invoke({"query": "q"}, timeout=0.5),
+        asyncio.run(retriever.ainvoke({"query": "q"}, timeout=0.5)),
+    ):
+        assert [r.score for r in resp.results] == [0.7]
+        assert resp.partial and resp.missing == ["slow"]
+    assert time.perf_counter() - start < 2
+    assert retriever.shard_metrics()["fast"]["timeouts"] == 0
+
+
+def test_failed_shard_is_missing_unless_all_fail():
+    datasets = {"ok": (0, [0.6]), "broken": (0, ConnectionError("down"))}
+    _, retriever = _retriever(datasets, shard_by_dataset=True)
+    resp = asyncio.run(retriever.ainvoke({"query": "q"}))
+    assert resp.missing == ["broken"]
+    assert retriever.shard_metrics()["broken"]["errors"] == 1
+
+    _, retriever = _retriever(
+        {"x": (0, ConnectionError("x")), "y": (0, ConnectionError("y"))},
+        shard_by_dataset=True,
+    )
+    with pytest.raises(ConnectionError):
+        retriever.invoke({"query": "q"})
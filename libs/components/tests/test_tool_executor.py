@@ -0,0 +1,115 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+
+from hiagent_components.base.deadline import DeadlineExceededError
+from hiagent_components.tool import BaseTool, ToolExecutor
+
+
+class _SleepTool(BaseTool):
+    def __init__(self, name, delay=0.1):
+        self.name = name
+        self.description = name
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def _exit(self):
+        with self._lock:
+            self.active -= 1
+
+    def _invoke(self, input, **kwargs):
+        self._enter()
+        try:
+            time.sleep(self.delay)
+            if input.get("fail"):
+                raise ValueError("bad input")
+            return f"{self.name}:{input['x']}"
+        finally:
+            self._exit()
+
+    async def _ainvoke(self, input, executor=None, **kwargs):
+        self._enter()
+        try:
+            await asyncio.sleep(self.delay)
+            if input.get("fail"):
+                raise ValueError("bad input")
+            return f"{self.name}:{input['x']}"
+        finally:
+            self._exit()
+
+
+def test_calls_run_concurrently_in_order_with_dedup():
+    search, weather = _SleepTool("search"), _SleepTool("weather")
+    calls = [
+        (search, {"x": 1}),
+        (weather, {"x": 1}),
+        (search, {"x": 2}),
+        (search, {"x": 1}),
+        (weather, {"fail": True, "x": 0}),
+    ]
+    executor = ToolExecutor()
+
+    for run in (executor.run, lambda c: asyncio.run(executor.arun(c))):
+        search.calls = weather.calls = 0
+        start = time.perf_counter()
+        results = run(calls)
+        assert time.perf_counter() - start < 0.35
+        assert [r.output for r in results] == [
+            "search:1",
+            "weather:1",
+            "search:2",
+            "search:1",
+            None,
+        ]
+        assert [r.deduplicated for r in results] == [False, False, False, True, False]
+        assert isinstance(results[4].error, ValueError) and not results[4].ok
+        assert search.calls == 2 and weather.calls == 2
+        assert all(r.elapsed >= 0.1 for r in results)
+
+
+def test_per_tool_limit_and_timeout():
+    search, slow = _SleepTool("search", delay=0.05), _SleepTool("slow", delay=1)
+    executor = ToolExecutor(limits={"search": 2}, timeouts={"slow": 0.1})
+    calls = [(search, {"x": i}) for i in range(6)] + [(slow, {"x": 0})]
+
+    results = asyncio.run(executor.arun(calls))
+    assert search.peak == 2
+    assert max(r.wait for r in results[:6]) >= 0.05
+    assert isinstance(results[-1].error, DeadlineExceededError)
+
+    search.peak = 0
+    executor.run(calls[:6])
+    assert search.peak == 2
+
+
+def test_saturated_tool_does_not_block_other_tools():
+    a, b = _SleepTool("a", delay=0.2), _SleepTool("b", delay=0.05)
+    executor = ToolExecutor(max_parallel=2, per_tool_limit=1)
+    calls = [(a, {"x": 1}), (a, {"x": 2}), (b, {"x": 1})]
+
+    for run in (executor.run, lambda c: asyncio.run(executor.arun(c))):
+        results = run(calls)
+        assert results[1].wait >= 0.15
+        assert results[2].wait < 0.1
@@ -0,0 +1,115 @@
+# Copyright (c) 2024 Bytedance Ltd. and/or its affiliates
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from hiagent_api.workflow import WorkflowService
+from hiagent_api.workflow_types import AsyncRunWorkflowResponse, RunWorkflowResponse
+
+from hiagent_components.base.deadline import deadline, poll_intervals
+from hiagent_components.workflow.base import Workflow
+
+
+class _FakeService:
+    """Completes a run after ``polls`` status queries."""
+
+    def __init__(self, polls):
+        self.polls = polls
+        self.queries = []
+
+    def run_workflow_async(self, app_key, req):
+        return AsyncRunWorkflowResponse(runId="run-1")
+
+    async def arun_workflow_async(self, app_key, req):
+        return self.run_workflow_async(app_key, req)
+
+    def query_workflow_status(self, app_key, req):
+        self.queries.append(time.perf_counter())
+        status = "success" if len(self.queries) >= self.polls else "processing"
+        return RunWorkflowResponse(runId=req.run_id, status=status, output='{"ok":1}')
+
+    async def aquery_workflow_status(self, app_key, req):
+        return self.query_workflow_status(app_key, req)
+
+
+def _workflow(svc, **kwargs):
+    return Workflow(svc, "app", "user", {"type": "object"}, "wf", "", **kwargs)
+
+
+def test_poll_intervals_back_off_and_respect_deadline():
+    intervals = poll_intervals(0.1, 1.0, 2.0)
+    assert [next(intervals) for _ in range(6)] == [0.1, 0.2, 0.4, 0.8, 1.0, 1.0]
+    with deadline(0.05):
+        assert next(poll_intervals(0.1)) <= 0.05
+
+
+def test_invoke_polls_quickly_then_backs_off():
+    svc = _FakeService(polls=4)
+    workflow = _workflow(svc, min_poll_interval=0.01, max_poll_interval=0.04)
+
+    start = time.perf_counter()
+    assert workflow.invoke({"q": 1}) == '{"ok":1}'
+    assert time.perf_counter() - start < 0.5
+    gaps = [b - a for a, b in zip(svc.queries, svc.queries[1:])]
+    assert gaps[0] < gaps[-1]
+
+    svc.queries.clear()
+    assert asyncio.run(workflow.ainvoke({"q": 1})) == '{"ok":1}'
+    assert len(svc.queries) == 4
+
+
+def test_stream_yields_parsed_workflow_events(monkeypatch):
+    svc = WorkflowService(endpoint="http://127.0.0.1:1")
+    payloads = [
+        {"event": "flow_start", "task_id": "t", "id": "1", "run_id": "r"},
+        {
+            "event": "message",
+            "task_id": "t",
+            "id": "2",
+            "run_id": "r",
+            "think_message_id": "m",
+            "answer": "hi",
+            "created_at": 1,
+        },
+        {"event": "unknown", "task_id": "t", "id": "3", "run_id": "r"},
+        {"event": "flow_end", "task_id": "t", "id": "4", "run_id": "r"},
+    ]
+    sent = []
+
+    def sse_post(app_key, action, params):
+        sent.append((action, params))
+        for payload in payloads:
+            yield SimpleNamespace(data=json.dumps(payload))
+
+    async def asse_post(app_key, action, params):
+        for event in sse_post(app_key, action, params):
+            yield event
+
+    monkeypatch.setattr(svc, "_sse_post", sse_post)
+    monkeypatch.setattr(svc, "_asse_post", asse_post)
+    workflow = _workflow(svc)
+
+    events = list(workflow.stream({"q": 1}))
+    assert [e.event for e in events] == ["flow_start", "message", "flow_end"]
+    assert events[1].answer == "hi"
+    action, params = sent[0]
+    assert action == "sync_run_app_workflow" and params["IsStream"] is True
+    assert json.loads(params["InputData"]) == {"q": 1}
+
+    async def collect():
+        return [e.event async for e in workflow.astream({"q": 1})]
+
+    assert asyncio.run(collect()) == ["flow_start", "message", "flow_end"]